@@ -5,8 +5,10 @@ Script to remove stale file references from the Xcode project.
 
 import re
 
+from pbxtool.instrument import Tracer
 
-def cleanup_stale_references():
+
+def cleanup_stale_references(tracer):
     """Remove stale ParentProfile references from project."""
 
     project_path = '/Users/srinivasgurana/self/claude/focuspal/FocusPal.xcodeproj/project.pbxproj'
@@ -14,33 +16,43 @@ def cleanup_stale_references():
     print("Cleaning up stale references...")
 
     # Read the project file
-    with open(project_path, 'r') as f:
-        content = f.read()
+    content = tracer.read_text(project_path)
 
-    # List of stale file references to remove (file IDs and their build IDs)
+    # Stale file references to remove (file IDs and their build IDs), each
+    # named for the trace
     stale_patterns = [
         # ParentProfileView.swift (standalone, not ParentProfilePromptView)
-        r'\t\t32306130616264322D633363 /\* ParentProfileView\.swift in Sources \*/ = \{isa = PBXBuildFile; fileRef = 37663562663537352D303561 /\* ParentProfileView\.swift \*/; \};\n',
-        r'\t\t37663562663537352D303561 /\* ParentProfileView\.swift \*/ = \{isa = PBXFileReference; lastKnownFileType = sourcecode\.swift; path = ParentProfileView\.swift; sourceTree = "<group>"; \};\n',
-        r'\t\t\t\t32306130616264322D633363 /\* ParentProfileView\.swift in Sources \*/,\n',
-        r'\t\t\t\t37663562663537352D303561 /\* ParentProfileView\.swift \*/,\n',
+        ("Removed ParentProfileView.swift build file",
+         r'\t\t32306130616264322D633363 /\* ParentProfileView\.swift in Sources \*/ = \{isa = PBXBuildFile; fileRef = 37663562663537352D303561 /\* ParentProfileView\.swift \*/; \};\n'),
+        ("Removed ParentProfileView.swift file reference",
+         r'\t\t37663562663537352D303561 /\* ParentProfileView\.swift \*/ = \{isa = PBXFileReference; lastKnownFileType = sourcecode\.swift; path = ParentProfileView\.swift; sourceTree = "<group>"; \};\n'),
+        ("Removed ParentProfileView.swift from Sources",
+         r'\t\t\t\t32306130616264322D633363 /\* ParentProfileView\.swift in Sources \*/,\n'),
+        ("Removed ParentProfileView.swift from its group",
+         r'\t\t\t\t37663562663537352D303561 /\* ParentProfileView\.swift \*/,\n'),
 
         # Old ProfileSelection references
-        r'\t\t93F1C396EBCE0EFC1B22E6E7 /\* ProfileSelectionView\.swift in Sources \*/ = \{isa = PBXBuildFile; fileRef = 157CC61C424E8E993ACE6CBF /\* ProfileSelectionView\.swift \*/; \};\n',
-        r'\t\t98D2D0865E9B467C739FEE1F /\* ProfileSelectionViewModel\.swift in Sources \*/ = \{isa = PBXBuildFile; fileRef = 5C084BC47C8ED4EECA50CA9C /\* ProfileSelectionViewModel\.swift \*/; \};\n',
-        r'\t\t157CC61C424E8E993ACE6CBF /\* ProfileSelectionView\.swift \*/ = \{isa = PBXFileReference; lastKnownFileType = sourcecode\.swift; path = ProfileSelectionView\.swift; sourceTree = "<group>"; \};\n',
-        r'\t\t5C084BC47C8ED4EECA50CA9C /\* ProfileSelectionViewModel\.swift \*/ = \{isa = PBXFileReference; lastKnownFileType = sourcecode\.swift; path = ProfileSelectionViewModel\.swift; sourceTree = "<group>"; \};\n',
-        r'\t\t\t\t93F1C396EBCE0EFC1B22E6E7 /\* ProfileSelectionView\.swift in Sources \*/,\n',
-        r'\t\t\t\t98D2D0865E9B467C739FEE1F /\* ProfileSelectionViewModel\.swift in Sources \*/,\n',
-        r'\t\t\t\t157CC61C424E8E993ACE6CBF /\* ProfileSelectionView\.swift \*/,\n',
-        r'\t\t\t\t5C084BC47C8ED4EECA50CA9C /\* ProfileSelectionViewModel\.swift \*/,\n',
+        ("Removed ProfileSelectionView.swift build file",
+         r'\t\t93F1C396EBCE0EFC1B22E6E7 /\* ProfileSelectionView\.swift in Sources \*/ = \{isa = PBXBuildFile; fileRef = 157CC61C424E8E993ACE6CBF /\* ProfileSelectionView\.swift \*/; \};\n'),
+        ("Removed ProfileSelectionViewModel.swift build file",
+         r'\t\t98D2D0865E9B467C739FEE1F /\* ProfileSelectionViewModel\.swift in Sources \*/ = \{isa = PBXBuildFile; fileRef = 5C084BC47C8ED4EECA50CA9C /\* ProfileSelectionViewModel\.swift \*/; \};\n'),
+        ("Removed ProfileSelectionView.swift file reference",
+         r'\t\t157CC61C424E8E993ACE6CBF /\* ProfileSelectionView\.swift \*/ = \{isa = PBXFileReference; lastKnownFileType = sourcecode\.swift; path = ProfileSelectionView\.swift; sourceTree = "<group>"; \};\n'),
+        ("Removed ProfileSelectionViewModel.swift file reference",
+         r'\t\t5C084BC47C8ED4EECA50CA9C /\* ProfileSelectionViewModel\.swift \*/ = \{isa = PBXFileReference; lastKnownFileType = sourcecode\.swift; path = ProfileSelectionViewModel\.swift; sourceTree = "<group>"; \};\n'),
+        ("Removed ProfileSelectionView.swift from Sources",
+         r'\t\t\t\t93F1C396EBCE0EFC1B22E6E7 /\* ProfileSelectionView\.swift in Sources \*/,\n'),
+        ("Removed ProfileSelectionViewModel.swift from Sources",
+         r'\t\t\t\t98D2D0865E9B467C739FEE1F /\* ProfileSelectionViewModel\.swift in Sources \*/,\n'),
+        ("Removed ProfileSelectionView.swift from its group",
+         r'\t\t\t\t157CC61C424E8E993ACE6CBF /\* ProfileSelectionView\.swift \*/,\n'),
+        ("Removed ProfileSelectionViewModel.swift from its group",
+         r'\t\t\t\t5C084BC47C8ED4EECA50CA9C /\* ProfileSelectionViewModel\.swift \*/,\n'),
     ]
 
     # Remove each stale pattern
-    for pattern in stale_patterns:
-        content = re.sub(pattern, '', content)
-        if re.search(pattern, content) is None:
-            print(f"  ✓ Removed pattern")
+    for name, pattern in stale_patterns:
+        content = tracer.sub(pattern, '', content, name)
 
     # Also remove the ProfileSelection group if it's empty or only has these files
     # First, let's check what's in the ProfileSelection group
@@ -54,25 +66,26 @@ def cleanup_stale_references():
         # If children only contains the files we're removing, or is empty, remove the whole group
         if not children or all(id in children for id in ['5C084BC47C8ED4EECA50CA9C', '157CC61C424E8E993ACE6CBF']):
             # Remove the group definition
-            content = re.sub(
+            content = tracer.sub(
                 r'\t\t4F501028C7DA394D2F9572DA /\* ProfileSelection \*/ = \{\s+isa = PBXGroup;\s+children = \((?:[^)]|\n)*?\);\s+path = ProfileSelection;\s+sourceTree = "<group>";\s+\};\n',
                 '',
-                content
+                content,
+                "Removed ProfileSelection group"
             )
             # Remove reference to the group in Features
-            content = re.sub(
+            content = tracer.sub(
                 r'\t\t\t\t4F501028C7DA394D2F9572DA /\* ProfileSelection \*/,\n',
                 '',
-                content
+                content,
+                "Removed ProfileSelection group from Features"
             )
-            print("  ✓ Removed ProfileSelection group")
 
     # Write back
-    with open(project_path, 'w') as f:
-        f.write(content)
+    if not tracer.write_text(project_path, content):
+        return
 
     print("\n✅ Successfully cleaned up stale references!")
 
 
 if __name__ == '__main__':
-    cleanup_stale_references()
+    Tracer.from_argv().run(cleanup_stale_references)
@@ -0,0 +1,11 @@
+"""
+Tooling for editing and inspecting FocusPal.xcodeproj.
+
+Run from the FocusPal project root directory:
+
+    python3 -m pbxtool <command> [options]
+
+The add_*.py scripts in the project root use the same helpers.
+"""
+
+PROJECT_FILE = 'FocusPal.xcodeproj/project.pbxproj'
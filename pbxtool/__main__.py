@@ -0,0 +1,26 @@
+"""
+Command line entry point: python3 -m pbxtool <command> [options]
+"""
+
+import argparse
+import sys
+
+from pbxtool import affected, assets, classify, diff, gc, hook, move, pipeline, settings, shards, tokenizer
+from pbxtool.instrument import Tracer
+
+COMMANDS = [affected, assets, classify, diff, gc, hook, move, pipeline, settings, shards, tokenizer]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pbxtool', description=__doc__)
+    Tracer.add_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for module in COMMANDS:
+        module.register(subparsers)
+    args = parser.parse_args(argv)
+    tracer = Tracer.from_args(args, verbose=False)
+    return tracer.run(lambda tracer: args.func(args, tracer))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
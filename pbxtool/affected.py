@@ -0,0 +1,293 @@
+"""
+Select the test classes affected by a change.
+
+Every Swift file that some target builds becomes a node.  A file depends
+on the files that declare (or extend) the types it references, as long
+as those files are visible to it: built into one of its targets, or into
+a module it imports (@testable import FocusPal).  A change affects the
+changed files and, transitively, everything that depends on them; the
+test classes declared in affected files of the test target are the ones
+to run.  A change to the project file affects the files whose target
+membership it changed; any other kind of file (resources, build scripts)
+cannot be narrowed down and runs every test.
+
+The edges are cached under .pbxtool-cache/.  On each run only the files
+whose scan or membership changed, and the files that reference a type
+those files declare, get their edges recomputed.
+
+    python3 -m pbxtool affected                  # working tree vs HEAD
+    python3 -m pbxtool affected main...HEAD      # a branch
+    git diff | python3 -m pbxtool affected -     # a diff on stdin
+    python3 -m pbxtool affected --files FocusPal/Core/Services/Implementation/PointsService.swift
+"""
+
+import collections
+import json
+import os
+import re
+import subprocess
+import sys
+
+from pbxtool import PROJECT_FILE, cache, swift
+from pbxtool.classify import find_sources, scan_all, source_roots
+from pbxtool.pbxproj import Project
+from pbxtool.shards import DEFAULT_TARGET, discover
+
+CACHE_NAME = 'affected'
+CACHE_VERSION = 1
+
+# Documentation and the project website: changes there never affect test results
+IGNORED_RE = re.compile(r'\.md$|^(docs|blog|_posts|assets)/|^(_config\.yml|focuspal-mockup\.jsx)$')
+
+DIFF_PATH_RE = re.compile(r'^(?:\+\+\+ b/|--- a/)(.+?)\s*$', re.M)
+
+
+def node(result, targets):
+    """The parts of a scan result the graph depends on."""
+    return {
+        'declares': sorted({d['name'].split('.')[0] for d in result['types']}),
+        'references': result['references'],
+        'imports': result['imports'],
+        'targets': sorted(targets),
+    }
+
+
+class Graph:
+    """File-level dependency graph with incremental edge updates."""
+
+    def __init__(self, nodes, deps):
+        self.nodes = nodes
+        self.deps = deps
+        self.updated = 0
+        # Paths whose targets changed in the last update (all of them on a cold cache)
+        self.retargeted = set()
+
+    @classmethod
+    def load(cls):
+        cached = cache.load(CACHE_NAME, CACHE_VERSION)
+        return cls(cached.get('nodes', {}), cached.get('deps', {}))
+
+    def save(self):
+        cache.save(CACHE_NAME, CACHE_VERSION, {'nodes': self.nodes, 'deps': self.deps})
+
+    def update(self, nodes):
+        """Replace the nodes and recompute edges where they may have changed."""
+        old = self.nodes
+        changed = {path for path in nodes if old.get(path) != nodes[path]}
+        changed |= {path for path in old if path not in nodes}
+        names = set()
+        for path in changed:
+            for version in (old.get(path), nodes.get(path)):
+                if version:
+                    names.update(version['declares'])
+        providers = collections.defaultdict(list)
+        referencers = collections.defaultdict(list)
+        for path, n in nodes.items():
+            for name in n['declares']:
+                providers[name].append(path)
+            for name in n['references']:
+                referencers[name].append(path)
+        dirty = {path for path in changed if path in nodes}
+        for name in names:
+            dirty.update(referencers.get(name, ()))
+        deps = {path: self.deps[path] for path in nodes if path in self.deps and path not in dirty}
+        recompute = sorted(set(nodes) - set(deps))
+        for path in recompute:
+            deps[path] = self.edges(path, nodes, providers)
+        self.nodes = nodes
+        self.deps = deps
+        self.updated = len(recompute)
+        self.retargeted = {path for path in changed
+                           if (old.get(path) or {}).get('targets') != (nodes.get(path) or {}).get('targets')}
+        return changed
+
+    @staticmethod
+    def edges(path, nodes, providers):
+        n = nodes[path]
+        visible = set(n['targets']) | set(n['imports'])
+        result = set()
+        for name in n['references']:
+            for provider in providers.get(name, ()):
+                if provider != path and visible & set(nodes[provider]['targets']):
+                    result.add(provider)
+        return sorted(result)
+
+    def dependents(self):
+        reverse = collections.defaultdict(set)
+        for path, deps in self.deps.items():
+            for dep in deps:
+                reverse[dep].add(path)
+        return reverse
+
+    def affected(self, paths, reverse=None):
+        """Return every file that transitively depends on paths (including them)."""
+        reverse = reverse or self.dependents()
+        seen = set(paths)
+        queue = collections.deque(paths)
+        while queue:
+            for dependent in reverse.get(queue.popleft(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        return seen
+
+
+def changed_files(revisions, files):
+    """Paths from --files, a diff on stdin ('-') or git diff --name-only."""
+    if files:
+        return sorted(files)
+    if revisions == ['-']:
+        return sorted(set(p for p in DIFF_PATH_RE.findall(sys.stdin.read()) if p != '/dev/null'))
+    output = subprocess.run(['git', 'diff', '--name-only'] + (revisions or ['HEAD']),
+                            check=True, capture_output=True, text=True).stdout
+    return sorted(line for line in output.splitlines() if line)
+
+
+def base_revision(revisions):
+    """The revision the change is compared against, or None for a diff on stdin."""
+    if revisions == ['-']:
+        return None
+    if not revisions:
+        return 'HEAD'
+    first = revisions[0]
+    if '...' in first:
+        left, right = first.split('...', 1)
+        output = subprocess.run(['git', 'merge-base', left or 'HEAD', right or 'HEAD'],
+                                check=True, capture_output=True, text=True).stdout
+        return output.strip()
+    return first.split('..')[0] or 'HEAD'
+
+
+def show(revision, path):
+    """The contents of path at revision, or None if git cannot tell."""
+    if revision is None:
+        return None
+    try:
+        return subprocess.run(['git', 'show', f'{revision}:{path}'],
+                              check=True, capture_output=True, text=True, errors='replace').stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def declared_at(revision, path):
+    """Type names path declared at revision, or None if git cannot tell."""
+    text = show(revision, path)
+    if text is None:
+        return None
+    return {d['name'].split('.')[0] for d in swift.scan(text)['types']}
+
+
+def retargeted_since(revision, project, paths):
+    """Those of paths whose targets differ between project and the project
+    file at revision, or None if git cannot tell."""
+    # ./ makes the path relative to the working directory, like project.path
+    text = show(revision, './' + (project.path or PROJECT_FILE))
+    if text is None:
+        return None
+    old, new = Project(text).index, project.index
+    return {path for path in paths if old.targets_of_path(path) != new.targets_of_path(path)}
+
+
+def build_graph(project, tracer, workers=None):
+    paths = find_sources(source_roots(project))
+    results = scan_all(paths, tracer, workers)
+    index = project.index
+    graph = Graph.load()
+    with tracer.step('affected: graph', files=len(results)) as step:
+        nodes = {}
+        for path, result in results.items():
+            targets = index.targets_of_path(path)
+            if targets:
+                nodes[path] = node(result, targets)
+        previous = dict(graph.nodes)
+        graph.update(nodes)
+        step.objects = graph.updated
+    if graph.updated or len(previous) != len(nodes):
+        graph.save()
+    return graph, previous, results
+
+
+def select(project, changes, target, tracer, workers=None, base='HEAD'):
+    """Return (test classes, reason) for a list of changed paths.
+
+    reason is set when the change cannot be narrowed down and every test
+    class of target is returned.  Deleted files the cached graph has no
+    record of, and the target membership before a project file change, are
+    read at base, the revision the change is compared against.
+    """
+    graph, previous, results = build_graph(project, tracer, workers)
+    with tracer.step('affected: select', changes=len(changes)) as step:
+        tests = {path: results[path] for path, n in graph.nodes.items() if target in n['targets']}
+        classes = discover(tests)
+        sources = [path for path in changes if path.endswith('.swift')]
+        projects = [path for path in changes if path.endswith('.pbxproj')]
+        others = [path for path in changes
+                  if not path.endswith(('.swift', '.pbxproj')) and not IGNORED_RE.search(path)]
+        if others:
+            return classes, f'{others[0]} is not a Swift file'
+        retargeted = set()
+        if projects:
+            retargeted = retargeted_since(base, project, set(graph.nodes) | set(previous) | set(results))
+            if retargeted is None:
+                # A diff on stdin: the graph's record of the last run is the
+                # best base there is
+                retargeted = graph.retargeted
+        start = set(path for path in sources + sorted(retargeted) if path in graph.nodes)
+        for path in sorted(set(sources) | retargeted):
+            if path in graph.nodes:
+                continue
+            if path in previous:
+                names = set(previous[path]['declares'])
+            elif path in retargeted and path in results:
+                # Still on disk, but the project change took it out of its targets
+                names = set(node(results[path], ())['declares'])
+            elif not os.path.exists(path):
+                # Deleted before the graph ever saw it gone (a cold cache,
+                # or a repeated query): ask git what it declared
+                names = declared_at(base, path)
+                if names is None:
+                    return classes, f'{path} was deleted and its old version cannot be read'
+            else:
+                continue
+            # Deleted or removed from its targets: whatever referenced its
+            # types before is affected
+            start.update(p for p, n in graph.nodes.items() if names & set(n['references']))
+        files = graph.affected(start)
+        selected = [c for c in classes if c['file'] in files]
+        step.objects = len(files)
+    return selected, None
+
+
+def main(args, tracer):
+    project = Project.load(args.project)
+    changes = changed_files(args.revisions, args.files)
+    base = 'HEAD' if args.files else base_revision(args.revisions)
+    selected, reason = select(project, changes, args.target, tracer, args.jobs, base)
+    names = [f"{args.target}/{c['class']}" for c in selected]
+    if args.json:
+        print(json.dumps({'changes': changes, 'all': reason is not None, 'reason': reason,
+                          'tests': names}, indent=2))
+    elif args.only_testing:
+        print(' '.join(f'-only-testing:{name}' for name in names))
+    else:
+        if reason:
+            print(f'⚠ Running every test: {reason}', file=sys.stderr)
+        for name in names:
+            print(name)
+        if not names:
+            print('✓ No tests affected', file=sys.stderr)
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('affected', help='list the test classes affected by a change')
+    parser.add_argument('revisions', nargs='*',
+                        help="git diff revisions (default: HEAD), or '-' to read a diff from stdin")
+    parser.add_argument('--files', nargs='+', help='changed paths, instead of asking git')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('-t', '--target', default=DEFAULT_TARGET, help='test target')
+    parser.add_argument('--only-testing', action='store_true',
+                        help='print xcodebuild -only-testing: arguments')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: CPU count)')
+    parser.set_defaults(func=main)
@@ -0,0 +1,386 @@
+"""
+Index asset catalogs and Core Data models and check them against the code.
+
+Every .xcassets and .xcdatamodeld the project builds (including those in
+file system synchronized folders) is walked for asset sets and entities.
+Directory listings and parsed Contents.json / model files are cached by
+mtime under .pbxtool-cache/, so a re-run only reads what changed, and
+the files that did change are parsed by a process pool when there are
+many.  The Swift sources are scanned through the classify cache.
+
+An asset is used when Swift code names it (Image("Star"),
+UIColor(named: "Brand")), uses its generated symbol (Image(.star),
+Color.brand) or a build setting names it (ASSETCATALOG_COMPILER_*_NAME).
+An entity is used when its class appears in Swift code or its name is
+passed as an entityName.  The report lists:
+
+    unused      asset sets and entities nothing refers to, and image
+                files no Contents.json lists
+    missing     names the code asks for that no catalog or model has,
+                files a Contents.json lists that are not there, and
+                relationships to entities that do not exist
+    duplicate   names defined twice for the same target
+
+    python3 -m pbxtool assets
+    python3 -m pbxtool assets --json
+"""
+
+import collections
+import json
+import os
+import plistlib
+import posixpath
+import re
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor
+
+from pbxtool import PROJECT_FILE, cache
+from pbxtool.classify import POOL_THRESHOLD, find_sources, scan_all, source_roots
+from pbxtool.pbxproj import Project
+
+CACHE_NAME = 'assets'
+CACHE_VERSION = 1
+
+BUNDLE_EXTENSIONS = ('.xcassets', '.xcdatamodeld')
+
+ASSET_KINDS = {
+    '.imageset': 'image',
+    '.colorset': 'color',
+    '.appiconset': 'app icon',
+    '.symbolset': 'symbol',
+    '.dataset': 'data',
+    '.imagestack': 'image stack',
+    '.brandassets': 'brand assets',
+}
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf', '.svg', '.heic', '.gif'}
+
+SETTING_RE = re.compile(r'ASSETCATALOG_COMPILER_\w+_NAME$')
+
+
+# -- parsing (runs in worker processes) -----------------------------------
+
+def parse_file(path):
+    """Worker: summarize one Contents.json or Core Data model file."""
+    if posixpath.basename(path) == 'Contents.json':
+        try:
+            with open(path, 'rb') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            return path, {'error': str(e)}
+        listed = []
+        for key in ('images', 'colors', 'symbols', 'data', 'layers', 'assets'):
+            for entry in data.get(key, ()):
+                if isinstance(entry, dict) and 'filename' in entry:
+                    listed.append(entry['filename'])
+        properties = data.get('properties', {})
+        return path, {'files': sorted(set(listed)),
+                      'namespace': bool(properties.get('provides-namespace'))}
+    if posixpath.basename(path) == '.xccurrentversion':
+        try:
+            with open(path, 'rb') as f:
+                current = plistlib.load(f).get('_XCCurrentVersionName')
+        except (OSError, ValueError, plistlib.InvalidFileException) as e:
+            return path, {'error': str(e)}
+        return path, {'current': current}
+    try:
+        root = ElementTree.parse(path).getroot()
+    except (OSError, ElementTree.ParseError) as e:
+        return path, {'error': str(e)}
+    entities = []
+    for entity in root.iter('entity'):
+        entities.append({
+            'name': entity.get('name'),
+            'class': entity.get('representedClassName') or entity.get('name'),
+            'destinations': sorted({r.get('destinationEntity') for r in entity.iter('relationship')
+                                    if r.get('destinationEntity')}),
+        })
+    return path, {'entities': entities}
+
+
+# -- walking --------------------------------------------------------------
+
+class Walker:
+    """Directory listings and parsed files, reused while their mtime holds."""
+
+    def __init__(self, cached, tracer):
+        self.dirs = cached.get('dirs', {})
+        self.files = cached.get('files', {})
+        self.tracer = tracer
+        self.seen_dirs = set()
+        self.seen_files = set()
+        self.pending = []
+        self.listed = 0
+
+    def listing(self, directory):
+        """Return (subdirectories, files) of directory."""
+        self.seen_dirs.add(directory)
+        mtime = os.stat(directory).st_mtime_ns
+        entry = self.dirs.get(directory)
+        if entry and entry[0] == mtime:
+            return entry[1], entry[2]
+        subdirs, files = [], []
+        with os.scandir(directory) as it:
+            for item in it:
+                (subdirs if item.is_dir() else files).append(item.name)
+        self.dirs[directory] = [mtime, sorted(subdirs), sorted(files)]
+        self.listed += 1
+        return self.dirs[directory][1], self.dirs[directory][2]
+
+    def want(self, path):
+        """Queue path for parsing unless its cached summary is current."""
+        self.seen_files.add(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.files.pop(path, None)
+            return
+        key = [st.st_mtime_ns, st.st_size]
+        entry = self.files.get(path)
+        if not entry or entry[:2] != key:
+            self.files[path] = key + [None]
+            self.pending.append(path)
+
+    def parse_pending(self, workers=None):
+        with self.tracer.step('assets: parse', files=len(self.pending)) as step:
+            if len(self.pending) >= POOL_THRESHOLD:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    parsed = list(pool.map(parse_file, self.pending, chunksize=16))
+            else:
+                parsed = [parse_file(path) for path in self.pending]
+            for path, summary in parsed:
+                self.files[path][2] = summary
+            step.objects = len(parsed)
+        self.pending = []
+
+    def summary(self, path):
+        entry = self.files.get(path)
+        return entry[2] if entry else None
+
+    def save(self):
+        cache.save(CACHE_NAME, CACHE_VERSION, {
+            'dirs': {d: e for d, e in self.dirs.items() if d in self.seen_dirs},
+            'files': {f: e for f, e in self.files.items() if f in self.seen_files},
+        })
+
+
+def walk_catalog(walker, catalog):
+    """Queue a catalog's Contents.json files; returns its sets and folders."""
+    sets = []
+    folders = []
+
+    def visit(directory, parents):
+        subdirs, _ = walker.listing(directory)
+        for name in subdirs:
+            path = posixpath.join(directory, name)
+            stem, ext = posixpath.splitext(name)
+            if ext in ASSET_KINDS:
+                _, files = walker.listing(path)
+                walker.want(posixpath.join(path, 'Contents.json'))
+                sets.append({'stem': stem, 'kind': ASSET_KINDS[ext], 'path': path,
+                             'parents': parents, 'on_disk': files})
+            elif not ext:
+                walker.want(posixpath.join(path, 'Contents.json'))
+                folders.append(path)
+                visit(path, parents + [path])
+
+    visit(catalog, [])
+    return sets, folders
+
+
+def walk_model(walker, bundle):
+    """Queue the current version of a .xcdatamodeld; returns the model paths."""
+    subdirs, files = walker.listing(bundle)
+    versions = [posixpath.join(bundle, name) for name in subdirs if name.endswith('.xcdatamodel')]
+    if '.xccurrentversion' in files:
+        walker.want(posixpath.join(bundle, '.xccurrentversion'))
+    for version in versions:
+        walker.want(posixpath.join(version, 'contents'))
+    return versions
+
+
+def current_version(walker, bundle, versions):
+    summary = walker.summary(posixpath.join(bundle, '.xccurrentversion')) or {}
+    current = summary.get('current')
+    if current:
+        return [posixpath.join(bundle, current)]
+    return versions[-1:] if versions else []
+
+
+# -- discovery ------------------------------------------------------------
+
+def bundles(project):
+    """Paths of the catalogs and models the project builds, with their targets."""
+    index = project.index
+    found = {}
+    for path, ref_id in index.path_to_ref.items():
+        if path.endswith(BUNDLE_EXTENSIONS):
+            found[path] = sorted(index.targets_of_ref(ref_id))
+    for obj in project.by_isa('XCVersionGroup'):
+        path = index.path(obj.id)
+        if path and path.endswith('.xcdatamodeld'):
+            found[path] = sorted(index.targets_of_ref(obj.id))
+    for root in index.synchronized:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, _ in os.walk(root):
+            for name in list(dirnames):
+                if name.endswith(BUNDLE_EXTENSIONS):
+                    path = posixpath.join(dirpath, name)
+                    found[path] = sorted(index.targets_of_path(path))
+                    dirnames.remove(name)
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+    return {path: targets for path, targets in sorted(found.items()) if os.path.isdir(path)}
+
+
+def symbol_name(name, kind):
+    """The Swift symbol Xcode generates for an asset name."""
+    words = [w for w in re.split(r'[^A-Za-z0-9]+', posixpath.basename(name)) if w]
+    if not words:
+        return None
+    symbol = words[0][:1].lower() + words[0][1:] + ''.join(w[:1].upper() + w[1:] for w in words[1:])
+    suffix = {'color': 'Color', 'image': 'Image'}.get(kind)
+    if suffix and symbol.endswith(suffix) and symbol != suffix.lower():
+        symbol = symbol[:-len(suffix)]
+    return symbol
+
+
+def setting_references(project):
+    """Asset names named by ASSETCATALOG_COMPILER_*_NAME build settings."""
+    names = set()
+    for obj in project.by_isa('XCBuildConfiguration'):
+        for key, value in obj.get('buildSettings', {}).items():
+            if SETTING_RE.match(key) and isinstance(value, str):
+                names.add(value)
+    return names
+
+
+# -- report ---------------------------------------------------------------
+
+def index_assets(project, tracer, workers=None):
+    """Return the report: {'assets', 'entities', 'unused', 'missing', 'duplicate'}."""
+    walker = Walker(cache.load(CACHE_NAME, CACHE_VERSION), tracer)
+    found = bundles(project)
+    with tracer.step('assets: walk', bundles=len(found)) as step:
+        catalogs = {}
+        models = {}
+        for path, targets in found.items():
+            if path.endswith('.xcassets'):
+                catalogs[path] = walk_catalog(walker, path)
+            else:
+                models[path] = walk_model(walker, path)
+        step.objects = walker.listed
+    walker.parse_pending(workers)
+    walker.save()
+
+    assets = []
+    unused, missing, duplicate = [], [], []
+    for catalog, (sets, folders) in catalogs.items():
+        namespaces = {folder: (walker.summary(posixpath.join(folder, 'Contents.json')) or {}).get('namespace')
+                      for folder in folders}
+        for asset in sets:
+            prefix = ''.join(posixpath.basename(p) + '/' for p in asset['parents'] if namespaces.get(p))
+            summary = walker.summary(posixpath.join(asset['path'], 'Contents.json')) or {}
+            if 'error' in summary:
+                missing.append(f"{asset['path']}/Contents.json cannot be read: {summary['error']}")
+            listed = summary.get('files', [])
+            for filename in listed:
+                if filename not in asset['on_disk']:
+                    missing.append(f"{asset['path']}/{filename} is listed in Contents.json but missing")
+            for filename in asset['on_disk']:
+                if posixpath.splitext(filename)[1].lower() in IMAGE_EXTENSIONS and filename not in listed:
+                    unused.append(f"{asset['path']}/{filename} is not listed in Contents.json")
+            assets.append({'name': prefix + asset['stem'], 'kind': asset['kind'],
+                           'catalog': catalog, 'targets': found[catalog], 'path': asset['path']})
+
+    entities = []
+    for bundle, versions in models.items():
+        for version in current_version(walker, bundle, versions):
+            summary = walker.summary(posixpath.join(version, 'contents')) or {}
+            if 'error' in summary:
+                missing.append(f'{version}/contents cannot be read: {summary["error"]}')
+            for entity in summary.get('entities', ()):
+                entities.append(dict(entity, model=version, targets=found[bundle]))
+
+    project_sources = find_sources(source_roots(project))
+    results = scan_all(project_sources, tracer, workers)
+    with tracer.step('assets: cross-reference', assets=len(assets), entities=len(entities)) as step:
+        literal = collections.defaultdict(list)
+        symbols = set()
+        entity_names = collections.defaultdict(list)
+        references = set()
+        for path, result in results.items():
+            for name in result['assets']:
+                literal[name].append(path)
+            symbols.update(result['asset_symbols'])
+            for name in result['entity_names']:
+                entity_names[name].append(path)
+            references.update(result['references'])
+        settings = setting_references(project)
+
+        names = {asset['name'] for asset in assets}
+        for asset in assets:
+            used = (asset['name'] in literal or asset['name'] in settings
+                    or symbol_name(asset['name'], asset['kind']) in symbols)
+            if not used:
+                unused.append(f"{asset['kind']} {asset['name']} ({asset['path']})")
+        for name, paths in sorted(literal.items()):
+            if name not in names:
+                missing.append(f'asset "{name}" used by {", ".join(sorted(paths))}')
+        for name in sorted(settings - names):
+            missing.append(f'asset "{name}" named by a build setting')
+        by_target = collections.defaultdict(list)
+        for asset in assets:
+            for target in asset['targets'] or [asset['catalog']]:
+                by_target[(target, asset['name'])].append(asset['path'])
+        for (target, name), paths in sorted(by_target.items()):
+            if len(paths) > 1:
+                duplicate.append(f'asset {name} in {target}: {", ".join(paths)}')
+
+        defined = {entity['name'] for entity in entities}
+        for entity in entities:
+            if entity['class'] not in references and entity['name'] not in entity_names:
+                unused.append(f"entity {entity['name']} in {entity['model']}")
+            for destination in entity['destinations']:
+                if destination not in defined:
+                    missing.append(f"entity {destination} (a relationship of {entity['name']})")
+        for name, paths in sorted(entity_names.items()):
+            if name not in defined:
+                missing.append(f'entity "{name}" used by {", ".join(sorted(paths))}')
+        classes = collections.defaultdict(list)
+        for entity in entities:
+            for target in entity['targets'] or [entity['model']]:
+                classes[(target, entity['class'])].append(entity['name'])
+        for (target, cls), owners in sorted(classes.items()):
+            if len(owners) > 1:
+                duplicate.append(f'entity class {cls} in {target}: {", ".join(owners)}')
+        step.objects = len(results)
+        step.matches = len(unused) + len(missing) + len(duplicate)
+    return {'assets': assets, 'entities': entities,
+            'unused': unused, 'missing': missing, 'duplicate': duplicate}
+
+
+def main(args, tracer):
+    project = Project.load(args.project)
+    report = index_assets(project, tracer, args.jobs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 1 if report['missing'] else 0
+    catalogs = len({asset['catalog'] for asset in report['assets']})
+    models = len({entity['model'] for entity in report['entities']})
+    print(f"{len(report['assets'])} asset(s) in {catalogs} catalog(s), "
+          f"{len(report['entities'])} entit(y/ies) in {models} model(s)")
+    for kind, mark in (('missing', '❌'), ('duplicate', '⚠'), ('unused', '⚠')):
+        for line in report[kind]:
+            print(f'{mark} {kind}: {line}')
+    if not (report['missing'] or report['duplicate'] or report['unused']):
+        print('✅ Every asset and entity is used and defined once')
+    return 1 if report['missing'] else 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('assets', help='find unused, missing and duplicated assets and entities')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: CPU count)')
+    parser.set_defaults(func=main)
@@ -0,0 +1,46 @@
+"""
+JSON caches kept under .pbxtool-cache/ in the project root.
+
+Each cache file carries a version number; a cache written by a different
+version of the tool is ignored rather than trusted.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+CACHE_DIR = '.pbxtool-cache'
+
+
+def content_hash(data):
+    """Hash of file contents used as a cache key."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load(name, version):
+    """Return the cached data for name, or {} if missing or stale."""
+    try:
+        with open(os.path.join(CACHE_DIR, name + '.json'), 'r') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if payload.get('version') != version:
+        return {}
+    return payload.get('data', {})
+
+
+def save(name, version, data):
+    """Atomically replace the cache file for name."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=name, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'version': version, 'data': data}, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp, os.path.join(CACHE_DIR, name + '.json'))
+
+
+def remove(name):
+    """Delete the cache file for name, if there is one."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(CACHE_DIR, name + '.json'))
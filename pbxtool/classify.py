@@ -0,0 +1,332 @@
+"""
+Classify Swift sources and suggest target membership and group placement.
+
+Every Swift file under the project's top-level folders is scanned for
+XCTestCase subclasses (directly or through a base class such as
+BaseUITest), @main entry points, WidgetKit Widget/WidgetBundle
+conformances and Mock naming.  Scan results are cached by content hash,
+so only new or changed files are read by the process pool, and results
+are sorted so re-runs print exactly the same thing.
+
+    python3 -m pbxtool classify              # suggestions for new files
+    python3 -m pbxtool classify --all        # audit every file
+    python3 -m pbxtool classify --apply      # add new files to the project
+"""
+
+import collections
+import json
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+from pbxtool import PROJECT_FILE, cache, swift
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.operations import AddFile, OperationError
+from pbxtool.pbxproj import Project
+
+CACHE_NAME = 'classify'
+CACHE_VERSION = 5
+
+# Below this many files a process pool costs more than it saves
+POOL_THRESHOLD = 64
+
+TEST_BASES = {'XCTestCase'}
+WIDGET_PROTOCOLS = {'Widget', 'WidgetBundle'}
+
+
+def scan_path(path):
+    """Worker: read and scan one file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return path, cache.content_hash(data), swift.scan(data.decode('utf-8', 'replace'))
+
+
+def source_roots(project):
+    """Top-level folders that hold the project's sources."""
+    index = project.index
+    roots = set()
+    for path in list(index.path_to_group) + list(index.synchronized):
+        top = path.split('/')[0]
+        if top and os.path.isdir(top) and not top.endswith('.xcodeproj'):
+            roots.add(top)
+    return sorted(roots)
+
+
+def find_sources(roots):
+    paths = []
+    for root in roots:
+        if os.path.isfile(root):
+            paths.append(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for filename in filenames:
+                if filename.endswith('.swift'):
+                    paths.append(posixpath.normpath(os.path.join(dirpath, filename)))
+    return sorted(paths)
+
+
+def scan_all(paths, tracer, workers=None, prune=True):
+    """Return {path: scan result}, using and refreshing the cache.
+
+    With prune=False the entries of files outside paths are kept, for
+    callers that only look at a few files (see hook.py).
+    """
+    cached = cache.load(CACHE_NAME, CACHE_VERSION)
+    stats = cached.get('stats', {})
+    scans = cached.get('scans', {})
+    results = {}
+    hashes = {}
+    misses = []
+    with tracer.step('classify: cache lookup', files=len(paths)) as step:
+        for path in paths:
+            st = os.stat(path)
+            key = [st.st_mtime_ns, st.st_size]
+            entry = stats.get(path)
+            if entry and entry[:2] == key and entry[2] in scans:
+                hashes[path] = entry[2]
+                results[path] = scans[entry[2]]
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            step.bytes_scanned += len(data)
+            digest = cache.content_hash(data)
+            stats[path] = key + [digest]
+            hashes[path] = digest
+            if digest in scans:
+                results[path] = scans[digest]
+            else:
+                misses.append(path)
+        step.matches = len(paths) - len(misses)
+    with tracer.step('classify: scan', files=len(misses)) as step:
+        if len(misses) >= POOL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scanned = list(pool.map(scan_path, misses, chunksize=16))
+        else:
+            scanned = [scan_path(path) for path in misses]
+        for path, digest, result in scanned:
+            scans[digest] = result
+            stats[path] = stats[path][:2] + [digest]
+            results[path] = result
+        step.objects = len(scanned)
+    if prune:
+        live = set(hashes.values())
+        stats = {p: s for p, s in stats.items() if p in hashes}
+        scans = {h: s for h, s in scans.items() if h in live}
+    if prune or misses:
+        cache.save(CACHE_NAME, CACHE_VERSION, {'stats': stats, 'scans': scans})
+    return results
+
+
+def inheritance(results):
+    """Map every declared type name to the names it inherits from."""
+    parents = collections.defaultdict(set)
+    for result in results.values():
+        for decl in result['types']:
+            parents[decl['name']].update(decl['inherits'])
+    return parents
+
+
+def is_subclass(name, bases, parents, seen=None):
+    seen = seen or set()
+    if name in bases:
+        return True
+    if name in seen:
+        return False
+    seen.add(name)
+    return any(is_subclass(p, bases, parents, seen) for p in parents.get(name, ()))
+
+
+def features(path, result, parents, ui_bases):
+    """Derive the classification features of one scanned file."""
+    declared = [d for d in result['types'] if d['kind'] != 'extension']
+    tests = [d['name'] for d in declared
+             if d['kind'] == 'class' and is_subclass(d['name'], TEST_BASES, parents)]
+    widgets = [d['name'] for d in declared if WIDGET_PROTOCOLS & set(d['inherits'])]
+    stem = posixpath.splitext(posixpath.basename(path))[0]
+    mock = stem.startswith('Mock') or stem.endswith('Mocks') or \
+        any(d['name'].startswith('Mock') for d in declared)
+    return {
+        'tests': tests,
+        'ui_tests': any(is_subclass(t, ui_bases, parents) for t in tests),
+        'widgets': widgets,
+        'main': result['main'],
+        'mock': mock,
+    }
+
+
+class Classifier:
+    """Suggests a target and group for Swift files from their features."""
+
+    def __init__(self, project):
+        self.project = project
+        index = project.index
+        self.app = (index.targets_by_product('application') or [None])[0]
+        self.unit_tests = (index.targets_by_product('unit-test') or [None])[0]
+        self.ui_tests = (index.targets_by_product('ui-testing') or [None])[0]
+        self.extensions = index.targets_by_product('app-extension')
+        # Target votes per directory, from files that are already members
+        self.votes = collections.defaultdict(collections.Counter)
+        for path, ref_id in index.path_to_ref.items():
+            for target in index.targets_of_ref(ref_id):
+                directory = posixpath.dirname(path)
+                while True:
+                    self.votes[directory][target] += 1
+                    if not directory:
+                        break
+                    directory = posixpath.dirname(directory)
+        self.sync_targets = collections.defaultdict(list)
+        for target_id in index.targets.values():
+            target = project.objects[target_id]
+            for group_id in target.get('fileSystemSynchronizedGroups', ()):
+                self.sync_targets[group_id].append(target['name'])
+
+    def target_by_directory(self, path):
+        directory = posixpath.dirname(path)
+        while True:
+            votes = self.votes.get(directory)
+            if votes:
+                return sorted(votes.items(), key=lambda kv: (-kv[1], kv[0]))[0][0]
+            if not directory:
+                return self.app
+            directory = posixpath.dirname(directory)
+
+    def classify(self, path, feats):
+        index = self.project.index
+        sync_group = index.synchronized_root(path)
+        if sync_group:
+            return {
+                'kind': 'synchronized',
+                'targets': sorted(self.sync_targets.get(sync_group, [])),
+                'group': index.path(sync_group),
+                'reason': 'folder is a file system synchronized group',
+            }
+        if feats['tests'] and feats['ui_tests'] and self.ui_tests:
+            kind, target, reason = 'ui-test', self.ui_tests, 'UI test case ' + feats['tests'][0]
+        elif feats['tests'] and self.unit_tests:
+            kind, target, reason = 'unit-test', self.unit_tests, 'XCTestCase subclass ' + feats['tests'][0]
+        elif feats['widgets'] and self.extensions:
+            kind, target, reason = 'widget', self.extensions[0], 'Widget conformance ' + feats['widgets'][0]
+        elif feats['main']:
+            kind, target, reason = 'entry-point', self.app, '@main entry point'
+        else:
+            target = self.target_by_directory(path)
+            kind = 'mock' if feats['mock'] else 'source'
+            reason = ('mock ' if feats['mock'] else '') + 'placed by directory'
+        directory = posixpath.dirname(path)
+        group = index.group_for_dir(directory)
+        return {
+            'kind': kind,
+            'targets': [target] if target else [],
+            'group': directory if group is not None else f'{directory} (new group)',
+            'reason': reason,
+        }
+
+
+def cached_scans():
+    """Every scan result in the cache, keyed by content hash."""
+    return cache.load(CACHE_NAME, CACHE_VERSION).get('scans', {})
+
+
+def classify(project, paths, tracer, workers=None, context=None, prune=True, results=None):
+    """Return sorted suggestion rows for paths.
+
+    context holds scan results of other files whose base classes should
+    count (e.g. cached_scans()) when paths is only part of the sources.
+    results, when given, are the scans of paths (e.g. of their staged
+    contents) and nothing is read from disk.
+    """
+    if results is None:
+        results = scan_all(paths, tracer, workers, prune)
+    known = dict(context or {})
+    known.update(results)
+    parents = inheritance(known)
+    # Types declared next to XCUIApplication usage make their subclasses UI tests
+    ui_bases = {d['name'] for r in known.values() if r['ui_testing'] for d in r['types']}
+    classifier = Classifier(project)
+    index = project.index
+    rows = []
+    entry_points = collections.defaultdict(list)
+    with tracer.step('classify: suggest', files=len(results)) as step:
+        for path in sorted(results):
+            feats = features(path, results[path], parents, ui_bases)
+            suggestion = classifier.classify(path, feats)
+            ref_id = index.path_to_ref.get(path)
+            if suggestion['kind'] == 'synchronized':
+                current = suggestion['targets']
+            else:
+                current = sorted(index.targets_of_ref(ref_id)) if ref_id else None
+            row = dict(path=path, current=current, **suggestion)
+            if feats['main']:
+                for target in (current or suggestion['targets']):
+                    entry_points[target].append(path)
+            rows.append(row)
+        step.objects = len(rows)
+    for target, files in entry_points.items():
+        if len(files) > 1:
+            for row in rows:
+                if row['path'] in files:
+                    row['warning'] = f'{len(files)} @main entry points in {target}'
+    return rows
+
+
+def apply(project, rows, tracer):
+    """Add every new, non-synchronized file to its suggested target and group."""
+    transaction = Transaction(project.path, tracer)
+    for row in rows:
+        if row['current'] is None and row['kind'] != 'synchronized':
+            transaction.queue(AddFile(row['path'], row['targets']))
+    with tracer.step('classify: apply', files=len(transaction.operations)):
+        return transaction.commit(project)
+
+
+def print_rows(rows):
+    for row in rows:
+        targets = ', '.join(row['targets']) or '-'
+        status = 'new' if row['current'] is None else 'member of ' + (', '.join(row['current']) or 'no target')
+        print(f"{row['path']}")
+        print(f"    {row['kind']}: {targets} in {row['group']} ({row['reason']}; {status})")
+        if row['current'] is not None and row['kind'] != 'synchronized' and row['current'] != row['targets']:
+            print(f"    ⚠ suggested {targets} but file is in {', '.join(row['current']) or 'no target'}")
+        if 'warning' in row:
+            print(f"    ⚠ {row['warning']}")
+
+
+def main(args, tracer):
+    with tracer.step('classify: parse', path=args.project):
+        project = Project.load(args.project)
+    paths = find_sources(args.paths or source_roots(project))
+    # Only a run over every source may drop the cache entries of other files
+    subset = bool(args.paths)
+    rows = classify(project, paths, tracer, args.jobs, context=cached_scans() if subset else None,
+                    prune=not subset)
+    if not args.all:
+        rows = [row for row in rows if row['current'] is None]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    elif rows:
+        print_rows(rows)
+    else:
+        print('✓ Every Swift file is already in the project')
+    if args.apply:
+        try:
+            changes = apply(project, rows, tracer)
+        except (OperationError, ConflictError) as e:
+            print(f'❌ {e}')
+            return 1
+        for change in changes:
+            print(f'✓ {change}')
+        if changes:
+            print(f'\n✅ Updated {args.project}')
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('classify', help='suggest targets and groups for Swift files')
+    parser.add_argument('paths', nargs='*', help='files or folders to scan (default: all sources)')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--all', action='store_true', help='include files already in the project')
+    parser.add_argument('--apply', action='store_true', help='add new files to the project')
+    parser.add_argument('--json', action='store_true', help='print suggestions as JSON')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: CPU count)')
+    parser.set_defaults(func=main)
@@ -0,0 +1,350 @@
+"""
+Semantic diff of two project.pbxproj revisions.
+
+Each object is hashed over its normalized fields (comments and layout
+ignored), objects are grouped into buckets by the first two characters
+of their ID, buckets into sections, and sections into a project root.
+Two revisions are compared top down and identical subtrees are skipped,
+so once both trees are cached the comparison is proportional to the
+number of changed objects.  Each tree is cached in a file of its own,
+keyed by the hash of the file contents, so a run reads at most the two
+trees it compares and writes only the trees it had to build.  The
+revisions are only parsed when there are changes to describe.
+
+Changes are reported in project terms rather than as text:
+
+    + PointsService.swift added to target FocusPal in group FocusPal/Core/Services/Implementation
+    ~ FocusPal Debug: SWIFT_VERSION 5.0 → 5.9
+
+    python3 -m pbxtool diff                  # HEAD against the working tree
+    python3 -m pbxtool diff main HEAD        # two revisions
+    python3 -m pbxtool diff old.pbxproj new.pbxproj
+"""
+
+import json
+import os
+import posixpath
+import subprocess
+
+from pbxtool import PROJECT_FILE, cache
+from pbxtool.pbxproj import Project
+
+# Holds the recency list; each tree lives in TREE_PREFIX + content hash
+CACHE_NAME = 'diff-trees'
+TREE_PREFIX = 'diff-tree-'
+CACHE_VERSION = 2
+
+# Trees kept in the cache; the least recently used are dropped first
+CACHE_ENTRIES = 32
+
+WORKTREE = 'WORKTREE'
+
+
+def digest(value):
+    return cache.content_hash(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+
+def bucket_of(id):
+    return id[:2]
+
+
+def build_tree(project):
+    """Return the Merkle tree of a parsed project."""
+    sections = {}
+    for obj in project.objects.values():
+        buckets = sections.setdefault(obj.isa, {})
+        buckets.setdefault(bucket_of(obj.id), {})[obj.id] = digest(obj.fields)
+    tree = {'sections': {}}
+    for isa, buckets in sections.items():
+        section = {'buckets': {}}
+        for key, objects in buckets.items():
+            section['buckets'][key] = {'hash': digest(sorted(objects.items())), 'objects': objects}
+        section['hash'] = digest(sorted((k, b['hash']) for k, b in section['buckets'].items()))
+        tree['sections'][isa] = section
+    tree['top'] = digest(project.top)
+    tree['hash'] = digest([tree['top'], sorted((isa, s['hash']) for isa, s in tree['sections'].items())])
+    return tree
+
+
+def compare(old, new):
+    """Return (added, removed, modified) object IDs and the number of objects visited."""
+    added, removed, modified = [], [], []
+    visited = 0
+    if old['hash'] == new['hash']:
+        return added, removed, modified, visited
+    empty = {'hash': None, 'buckets': {}}
+    for isa in sorted(set(old['sections']) | set(new['sections'])):
+        a = old['sections'].get(isa, empty)
+        b = new['sections'].get(isa, empty)
+        if a['hash'] == b['hash']:
+            continue
+        for key in sorted(set(a['buckets']) | set(b['buckets'])):
+            x = a['buckets'].get(key, {'hash': None, 'objects': {}})
+            y = b['buckets'].get(key, {'hash': None, 'objects': {}})
+            if x['hash'] == y['hash']:
+                continue
+            for id in sorted(set(x['objects']) | set(y['objects'])):
+                visited += 1
+                if id not in x['objects']:
+                    added.append(id)
+                elif id not in y['objects']:
+                    removed.append(id)
+                elif x['objects'][id] != y['objects'][id]:
+                    modified.append(id)
+    return added, removed, modified, visited
+
+
+class Revision:
+    """One version of the project file, parsed only when needed."""
+
+    def __init__(self, spec, path):
+        self.spec = spec
+        if spec == WORKTREE:
+            with open(path, 'rb') as f:
+                self.data = f.read()
+        elif os.path.isfile(spec):
+            with open(spec, 'rb') as f:
+                self.data = f.read()
+        else:
+            self.data = subprocess.run(['git', 'show', f'{spec}:{path}'], check=True,
+                                       capture_output=True).stdout
+        self.hash = cache.content_hash(self.data)
+        self._project = None
+        self.built = False
+
+    @property
+    def project(self):
+        if self._project is None:
+            self._project = Project(self.data.decode('utf-8'))
+        return self._project
+
+    def tree(self):
+        """The cached tree of this revision, built and cached if missing."""
+        tree = cache.load(TREE_PREFIX + self.hash, CACHE_VERSION)
+        if not tree:
+            tree = build_tree(self.project)
+            cache.save(TREE_PREFIX + self.hash, CACHE_VERSION, tree)
+            self.built = True
+        return tree
+
+
+class Describer:
+    """Turns object-level changes into sentences about files, targets and groups."""
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        # Project -> {build configuration: owner name}, built on first use
+        self._owners = {}
+
+    @staticmethod
+    def name(project, id):
+        obj = project.objects.get(id)
+        if obj is None:
+            return id
+        name = obj.get('name') or obj.get('path')
+        if name:
+            return posixpath.basename(name) if obj.isa == 'PBXFileReference' else name
+        return project.comments.get(id, id)
+
+    @staticmethod
+    def target_of_build(project, build_id):
+        index = project.index
+        target_id = index.target_of_phase.get(index.phase_of.get(build_id))
+        return project.objects[target_id]['name'] if target_id else None
+
+    @staticmethod
+    def group_path(project, id):
+        parent = project.index.parent.get(id)
+        if parent is None:
+            return None
+        return project.index.path(parent) or '<main>'
+
+    def configuration_owner(self, project, config_id):
+        owners = self._owners.get(project)
+        if owners is None:
+            owners = self._owners[project] = {}
+            for obj in project.by_isa('XCConfigurationList'):
+                comment = project.comments.get(obj.id, '')
+                owner = comment.split('"')[1] if '"' in comment else 'project'
+                for id in obj.get('buildConfigurations', ()):
+                    owners[id] = owner
+        return owners.get(config_id)
+
+    def describe(self, added, removed, modified):
+        lines = []
+        old, new = self.old, self.new
+        added_set = set(added)
+        removed_set = set(removed)
+        explained = set()
+        # Files added together with their build files
+        builds_for = {}
+        for id in added:
+            obj = new.objects[id]
+            if obj.isa == 'PBXBuildFile' and 'fileRef' in obj.fields:
+                builds_for.setdefault(obj['fileRef'], []).append(id)
+        for id in added:
+            obj = new.objects[id]
+            if obj.isa == 'PBXFileReference':
+                targets = sorted(filter(None, (self.target_of_build(new, b) for b in builds_for.get(id, ()))))
+                explained.update(builds_for.get(id, ()))
+                where = f' to target {", ".join(targets)}' if targets else ''
+                group = self.group_path(new, id)
+                lines.append(('+', f'{self.name(new, id)} added{where}'
+                                   + (f' in group {group}' if group else ' (not in any group)')))
+            elif obj.isa in ('PBXGroup', 'PBXFileSystemSynchronizedRootGroup'):
+                lines.append(('+', f'group {new.index.path(id) or self.name(new, id)} added'))
+        for id in added:
+            obj = new.objects[id]
+            if obj.isa == 'PBXBuildFile' and id not in explained:
+                target = self.target_of_build(new, id)
+                lines.append(('+', f'{self.name(new, obj.get("fileRef"))} added to target {target}'
+                              if target else f'{self.name(new, obj.get("fileRef"))} build file added (in no build phase)'))
+            elif obj.isa not in ('PBXBuildFile', 'PBXFileReference', 'PBXGroup',
+                                 'PBXFileSystemSynchronizedRootGroup'):
+                lines.append(('+', f'{obj.isa} {self.name(new, id)} added'))
+        removed_builds = {}
+        for id in removed:
+            obj = old.objects[id]
+            if obj.isa == 'PBXBuildFile' and 'fileRef' in obj.fields:
+                removed_builds.setdefault(obj['fileRef'], []).append(id)
+        for id in removed:
+            obj = old.objects[id]
+            if obj.isa == 'PBXFileReference':
+                targets = sorted(filter(None, (self.target_of_build(old, b) for b in removed_builds.get(id, ()))))
+                where = f' target {", ".join(targets)} and' if targets else ''
+                group = self.group_path(old, id)
+                lines.append(('-', f'{self.name(old, id)} removed'
+                                   + (f' from{where} group {group}' if group else '')))
+            elif obj.isa == 'PBXBuildFile':
+                ref = obj.get('fileRef')
+                if ref in removed_set:
+                    continue
+                target = self.target_of_build(old, id)
+                lines.append(('-', f'{self.name(old, ref)} removed from target {target}' if target
+                              else f'orphaned build file for {self.name(old, ref)} removed'))
+            elif obj.isa in ('PBXGroup', 'PBXFileSystemSynchronizedRootGroup'):
+                lines.append(('-', f'group {old.index.path(id) or self.name(old, id)} removed'))
+            else:
+                lines.append(('-', f'{obj.isa} {self.name(old, id)} removed'))
+        for id in modified:
+            lines.extend(self.modification(id, added_set, removed_set))
+        return lines
+
+    def modification(self, id, added, removed):
+        old_obj, new_obj = self.old.objects[id], self.new.objects[id]
+        isa = new_obj.isa
+        if isa == 'XCBuildConfiguration':
+            owner = self.configuration_owner(self.new, id)
+            label = f'{owner} {new_obj.get("name")}'
+            before = old_obj.get('buildSettings', {})
+            after = new_obj.get('buildSettings', {})
+            result = []
+            for key in sorted(set(before) | set(after)):
+                if before.get(key) != after.get(key):
+                    result.append(('~', f'{label}: {key} {format_setting(before.get(key))} → '
+                                        f'{format_setting(after.get(key))}'))
+            return result
+        if isa in ('PBXGroup', 'PBXVariantGroup', 'XCVersionGroup'):
+            result = []
+            before = old_obj.get('children', [])
+            after = new_obj.get('children', [])
+            group = self.new.index.path(id) or self.name(self.new, id)
+            for child in after:
+                if child not in before and child not in added:
+                    source = self.group_path(self.old, child)
+                    result.append(('~', f'{self.name(self.new, child)} moved from {source} to {group}'))
+            if old_obj.get('path') != new_obj.get('path') or old_obj.get('name') != new_obj.get('name'):
+                result.append(('~', f'group {self.old.index.path(id) or self.name(self.old, id)} '
+                                    f'renamed to {group}'))
+            if not result and sorted(before) == sorted(after) and before != after:
+                result.append(('~', f'children of group {group} reordered'))
+            return result
+        if isa.endswith('BuildPhase'):
+            before = set(old_obj.get('files', []))
+            after = set(new_obj.get('files', []))
+            # Membership changes are reported with the build files
+            rest = {k for k in set(old_obj.fields) | set(new_obj.fields)
+                    if k != 'files' and old_obj.get(k) != new_obj.get(k)}
+            if not rest and (after - before) <= added and (before - after) <= removed:
+                return []
+        if isa == 'PBXFileReference':
+            if old_obj.get('path') != new_obj.get('path') or old_obj.get('name') != new_obj.get('name'):
+                return [('~', f'{self.name(self.old, id)} renamed to {self.name(self.new, id)}')]
+        keys = sorted(k for k in set(old_obj.fields) | set(new_obj.fields) if old_obj.get(k) != new_obj.get(k))
+        return [('~', f'{isa} {self.name(self.new, id)}: {", ".join(keys)} changed')]
+
+
+def format_setting(value):
+    if value is None:
+        return '(unset)'
+    if isinstance(value, list):
+        return '(' + ', '.join(value) + ')'
+    return value
+
+
+def diff(old_spec, new_spec, path, tracer):
+    """Return (lines, stats) describing the changes between two revisions."""
+    recent = cache.load(CACHE_NAME, CACHE_VERSION).get('recent', [])
+    with tracer.step('diff: load') as step:
+        old = Revision(old_spec, path)
+        new = Revision(new_spec, path)
+        step.bytes_scanned = len(old.data) + len(new.data)
+    with tracer.step('diff: trees') as step:
+        old_tree = old.tree()
+        new_tree = new.tree() if new.hash != old.hash else old_tree
+        step.objects = old.built + new.built
+    with tracer.step('diff: compare') as step:
+        added, removed, modified, visited = compare(old_tree, new_tree)
+        step.objects = visited
+    used = [old.hash] if new.hash == old.hash else [old.hash, new.hash]
+    if recent[-len(used):] != used:
+        recent = [h for h in recent if h not in used] + used
+        for stale in recent[:-CACHE_ENTRIES]:
+            cache.remove(TREE_PREFIX + stale)
+        cache.save(CACHE_NAME, CACHE_VERSION, {'recent': recent[-CACHE_ENTRIES:]})
+    lines = []
+    if added or removed or modified:
+        with tracer.step('diff: describe') as step:
+            lines = Describer(old.project, new.project).describe(added, removed, modified)
+            step.objects = len(added) + len(removed) + len(modified)
+    stats = {'added': len(added), 'removed': len(removed), 'modified': len(modified),
+             'visited': visited, 'identical': old.hash == new.hash}
+    return lines, stats
+
+
+def main(args, tracer):
+    specs = list(args.revisions)
+    if len(specs) > 2:
+        print('❌ diff takes at most two revisions')
+        return 2
+    old_spec = specs[0] if specs else 'HEAD'
+    new_spec = specs[1] if len(specs) > 1 else WORKTREE
+    try:
+        lines, stats = diff(old_spec, new_spec, args.project, tracer)
+    except subprocess.CalledProcessError as e:
+        print(f'❌ {e.stderr.decode().strip() if e.stderr else e}')
+        return 2
+    if args.json:
+        print(json.dumps({'changes': [{'kind': kind, 'text': text} for kind, text in lines],
+                          **stats}, indent=2))
+        return 0
+    for kind, text in lines:
+        print(f'{kind} {text}')
+    if stats['identical']:
+        print('✓ No changes to the project')
+    elif not lines:
+        print('✓ No semantic changes (only formatting, comments or ordering)')
+    else:
+        print(f"\n{stats['added']} added, {stats['removed']} removed, {stats['modified']} modified "
+              f"({stats['visited']} objects compared)")
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('diff', help='semantic diff of two project revisions')
+    parser.add_argument('revisions', nargs='*',
+                        help='git revisions or pbxproj files (default: HEAD against the working tree)')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--json', action='store_true')
+    parser.set_defaults(func=main)
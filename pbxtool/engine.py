@@ -0,0 +1,218 @@
+"""
+Concurrency-safe writes to project.pbxproj.
+
+Edits are computed without holding any lock, so parallel jobs do their
+parsing and rewriting in parallel.  Only the final write is serialized:
+it takes an advisory lock on the .xcodeproj folder, checks that the file
+on disk still hashes to what was read, and atomically replaces it.  If
+another job got there first a ConflictError is raised, and the caller
+re-reads the file and replays its edits on top of the other job's, this
+time holding the lock from the read to the write so the replay cannot
+lose again.
+
+Transaction does this for operation objects (see operations.py); the
+add_* scripts get the same behaviour through Tracer.read_text() and
+Tracer.write_text(), with Tracer.run() replaying the whole script.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import tempfile
+
+from pbxtool import cache
+from pbxtool.operations import OperationError
+
+BLOCK_SIZE = 1 << 16
+
+# Depth of the locks this process holds, by folder: flock() on a second
+# descriptor for the same folder would wait for ourselves
+_held = {}
+
+
+class ConflictError(Exception):
+    """The project changed on disk after it was read."""
+
+    def __init__(self, path):
+        super().__init__(f'{path} changed on disk since it was read')
+        self.path = path
+
+
+def read(path):
+    """Return (text, hash) of path."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data.decode('utf-8'), cache.content_hash(data)
+
+
+def current_hash(path):
+    """Hash of the file on disk (as cache.content_hash), read in blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Hold an exclusive advisory lock on the folder containing path.
+
+    The file itself is replaced on every write, so locking it would lock
+    an inode nobody else opens; the .xcodeproj folder is stable.  Nested
+    calls for the same folder share the outermost lock.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory in _held:
+        _held[directory] += 1
+        try:
+            yield
+        finally:
+            _held[directory] -= 1
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        _held[directory] = 1
+        try:
+            yield
+        finally:
+            del _held[directory]
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def write(path, text, expected=None):
+    """Replace path with text if it still hashes to expected.
+
+    With expected=None the file is written unconditionally, but still
+    under the lock and atomically.  Returns the hash of the new contents.
+    """
+    return write_stream(path, (text.encode('utf-8'),), expected)
+
+
+def write_stream(path, chunks, expected=None):
+    """write() for an iterable of bytes, which is consumed exactly once.
+
+    The chunks go to a temporary file next to path before the lock is
+    taken, so a long streaming rewrite does not hold up other writers;
+    only the hash check and the rename happen under the lock.  Contents
+    identical to expected leave the file (and its mtime) alone.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    digest = hashlib.blake2b(digest_size=16)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.project.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                digest.update(chunk)
+        if digest.hexdigest() == expected:
+            os.unlink(tmp)
+            return expected
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            pass
+        with locked(path):
+            if expected is not None and current_hash(path) != expected:
+                raise ConflictError(path)
+            os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+    return digest.hexdigest()
+
+
+class Transaction:
+    """Queue operations and apply them to the project with retry on conflict.
+
+    With a tracer, loading the project, every operation and the commit
+    are each recorded as a step.  An operation with nothing to do counts
+    as an edit that matched nothing, so under --strict the transaction
+    refuses to write (OperationError) if any operation was a no-op.
+    """
+
+    def __init__(self, path, tracer=None):
+        self.path = path
+        self.tracer = tracer
+        self.operations = []
+        # Operations that found nothing to do on the last attempt
+        self.unchanged = []
+        # The project as last committed (re-read if the first attempt lost)
+        self.project = None
+
+    def queue(self, *operations):
+        self.operations.extend(operations)
+        return self
+
+    def step(self, name, **info):
+        if self.tracer:
+            return self.tracer.step(name, **info)
+        from pbxtool.instrument import Step
+        return contextlib.nullcontext(Step(name, **info))
+
+    def load(self):
+        from pbxtool.pbxproj import Project
+        with self.step('load', path=self.path) as step:
+            project = Project.load(self.path)
+            step.bytes_scanned = len(project.text)
+            step.objects = len(project.objects)
+        return project
+
+    def apply(self, project):
+        """Apply every operation, or none: a failure rolls the project back."""
+        changes = []
+        self.unchanged = []
+        with project.atomic():
+            for operation in self.operations:
+                touched = len(project.added) + len(project.modified) + len(project.removed)
+                with self.step(repr(operation)) as step:
+                    result = operation.apply(project)
+                    step.expect_match = True
+                    step.matches = len(result)
+                    step.objects = (len(project.added) + len(project.modified)
+                                    + len(project.removed) - touched)
+                    step.info['unchanged'] = not result
+                if not result:
+                    self.unchanged.append(operation)
+                changes += result
+        return changes
+
+    def commit(self, project=None):
+        """Apply the queued operations and save; returns the change list.
+
+        project may be an already parsed copy of the file; it is used for
+        the first attempt.  If another writer saved in between, the file
+        is re-read and the operations replayed with the lock held, so the
+        second attempt only fails if something ignores the lock (Xcode).
+        """
+        if project is None:
+            project = self.load()
+        try:
+            return self._commit(project, attempt=1)
+        except ConflictError:
+            print(f'⟳ {self.path} changed on disk, replaying {len(self.operations)} '
+                  'operation(s) with the project locked')
+        with locked(self.path):
+            return self._commit(self.load(), attempt=2)
+
+    def _commit(self, project, attempt):
+        self.project = project
+        changes = self.apply(project)
+        if self.unchanged and self.tracer and self.tracer.strict:
+            raise OperationError(f'Not writing {self.path}: {len(self.unchanged)} '
+                                 'operation(s) had nothing to do (--strict)')
+        with self.step('commit', path=self.path, attempt=attempt) as step:
+            step.objects = len(project.added | project.modified | project.removed)
+            step.info['written'] = project.dirty
+            if project.dirty:
+                project.save()
+                step.bytes_scanned = os.path.getsize(self.path)
+        return changes
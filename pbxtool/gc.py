@@ -0,0 +1,195 @@
+"""
+Remove objects nothing uses any more.
+
+Scripted edits leave orphans behind: build files no phase lists, file
+references no group or build file mentions, groups whose files have all
+gone.  gc marks every object reachable from the root object (targets,
+build phases, groups, configuration lists and whatever they refer to),
+sweeps the rest, then removes groups left without children.  Group
+entries pointing at objects that do not exist are reported and dropped
+first, so a group holding nothing else counts as empty.  Marking visits
+each object and reference once, so the cost is linear in the size of the
+project.
+
+    python3 -m pbxtool gc --dry-run
+    python3 -m pbxtool gc
+"""
+
+import collections
+import os
+
+from pbxtool import PROJECT_FILE
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.operations import OperationError
+from pbxtool.pbxproj import Project
+
+# Groups that may be removed once empty; version groups carry a model
+EMPTY_GROUP_ISAS = ('PBXGroup', 'PBXVariantGroup')
+
+REASONS = {
+    'PBXBuildFile': 'in no build phase',
+    'PBXFileReference': 'in no group or build phase',
+}
+
+
+def reachable(project):
+    """IDs of every object reachable from the root object."""
+    objects = project.objects
+    root = project.top['rootObject']
+    marked = {root}
+    pending = [root]
+    while pending:
+        values = [objects[pending.pop()].fields]
+        while values:
+            value = values.pop()
+            if isinstance(value, str):
+                if value in objects and value not in marked:
+                    marked.add(value)
+                    pending.append(value)
+            elif isinstance(value, list):
+                values.extend(value)
+            elif isinstance(value, dict):
+                values.extend(value.values())
+    return marked
+
+
+def dangling_children(project):
+    """Return {group: [child IDs]} for group entries naming objects that don't exist."""
+    objects = project.objects
+    result = {}
+    for id, obj in objects.items():
+        missing = [child for child in obj.get('children', ()) if child not in objects]
+        if missing:
+            result[id] = missing
+    return result
+
+
+def empty_groups(project):
+    """Return {group: parent} for groups with nothing left in them, innermost first."""
+    objects = project.objects
+    keep = {project.root.get('mainGroup'), project.root.get('productRefGroup')}
+    result = {}
+
+    def visit(group_id, parent_id):
+        empty = True
+        for child in objects[group_id].get('children', ()):
+            obj = objects[child]
+            if obj.isa in EMPTY_GROUP_ISAS and visit(child, group_id):
+                continue
+            empty = False
+        if empty and group_id not in keep:
+            result[group_id] = parent_id
+            return True
+        return False
+
+    main_group = project.root.get('mainGroup')
+    if main_group in objects:
+        visit(main_group, None)
+    return result
+
+
+def ungrouped(project, marked):
+    """File references that are built but appear in no group."""
+    objects = project.objects
+    grouped = set()
+    for obj in objects.values():
+        if 'children' in obj.fields:
+            grouped.update(obj['children'])
+    return sorted(id for id in marked if id in objects and id not in grouped
+                  and objects[id].isa == 'PBXFileReference')
+
+
+def describe(project, id):
+    obj = project.objects[id]
+    name = project.comments.get(id) or obj.get('name') or obj.get('path') or id
+    return f'{obj.isa} {name}'
+
+
+class CollectGarbage:
+    """Remove unreachable objects and, optionally, empty groups."""
+
+    def __init__(self, groups=True):
+        self.groups = groups
+        self.counts = collections.Counter()
+        self.warnings = []
+
+    def __repr__(self):
+        return f'CollectGarbage(groups={self.groups!r})'
+
+    def apply(self, project):
+        if project.top.get('rootObject') not in project.objects:
+            raise OperationError('project has no root object')
+        changes = []
+        self.counts.clear()
+        marked = reachable(project)
+        garbage = [id for id in project.objects if id not in marked]
+        for id in garbage:
+            isa = project.objects[id].isa
+            changes.append(f'removed {describe(project, id)} '
+                           f'({REASONS.get(isa, "unreachable from the root object")})')
+            self.counts[isa] += 1
+        for id in garbage:
+            project.remove(id)
+        for group_id, missing in dangling_children(project).items():
+            for child in missing:
+                changes.append(f'removed {child} from {describe(project, group_id)} (no such object)')
+            self.counts['dangling reference'] += len(missing)
+            group = project.modify(group_id)
+            group.fields['children'] = [c for c in group['children'] if c not in missing]
+        empty = empty_groups(project) if self.groups else {}
+        for group_id in empty:
+            changes.append(f'removed {describe(project, group_id)} (empty group)')
+            self.counts[project.objects[group_id].isa] += 1
+        for parent_id in dict.fromkeys(empty.values()):
+            if parent_id not in empty:
+                parent = project.modify(parent_id)
+                parent.fields['children'] = [c for c in parent['children'] if c not in empty]
+        for group_id in empty:
+            project.remove(group_id)
+        self.warnings = [f'{describe(project, id)} is built but appears in no group'
+                         for id in ungrouped(project, marked)]
+        return changes
+
+
+def main(args, tracer):
+    operation = CollectGarbage(groups=not args.keep_empty_groups)
+    try:
+        if args.dry_run:
+            project = Project.load(args.project)
+            with tracer.step('gc', path=args.project) as step:
+                changes = operation.apply(project)
+                step.objects = len(project.objects)
+                step.matches = len(changes)
+            reclaimed = len(project.text.encode('utf-8')) - len(project.to_text().encode('utf-8'))
+        else:
+            before = os.path.getsize(args.project)
+            transaction = Transaction(args.project, tracer).queue(operation)
+            with tracer.step('gc', path=args.project) as step:
+                changes = transaction.commit()
+                step.matches = len(changes)
+            reclaimed = before - os.path.getsize(args.project)
+    except (OperationError, ConflictError) as e:
+        print(f'❌ {e}')
+        return 1
+    for change in changes:
+        print(f'✓ {change}')
+    for warning in operation.warnings:
+        print(f'⚠ {warning}')
+    if not changes:
+        print('✓ Nothing to collect')
+        return 0
+    summary = ', '.join(f'{count} {isa}' for isa, count in sorted(operation.counts.items()))
+    if args.dry_run:
+        print(f'\nWould remove {summary} and reclaim {reclaimed} bytes (dry run, nothing written)')
+    else:
+        print(f'\n✅ Removed {summary}; reclaimed {reclaimed} bytes')
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('gc', help='remove unreachable objects and empty groups')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--dry-run', action='store_true', help='report without writing')
+    parser.add_argument('--keep-empty-groups', action='store_true',
+                        help='only remove unreachable objects and entries naming none')
+    parser.set_defaults(func=main)
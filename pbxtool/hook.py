@@ -0,0 +1,278 @@
+"""
+Pre-commit hook: keep the project in step with staged Swift files.
+
+Reads the staged changes (git diff --cached --name-status) and edits the
+project only for Swift files that were added, deleted or renamed:
+
+    added     classified (see classify.py) and added to its target and group
+    deleted   removed with its build files
+    renamed   moved in place, keeping its targets (see operations.Move)
+
+Only the staged files are scanned and nothing walks the source tree.
+When no staged Swift file was added, deleted or renamed the project is
+not even read.  Otherwise the registered paths of the last project the
+hook parsed are looked up in .pbxtool-cache/ (keyed by the file's mtime
+and size, or by the staged blob id for --check), and if the project
+already has every change the hook is done without parsing it.  Only a
+commit that really needs an edit parses the project and loads the
+classify cache, since the file is rewritten anyway.
+
+The staged contents are what gets classified, a new file only has to
+exist in the index, and --check reads the staged project, so all three
+judge the commit rather than the working tree.
+
+The updated project is staged along with the commit.  The hook refuses
+to run if the project has unstaged changes, since staging it would
+commit those too.
+
+To install:
+
+    printf '#!/bin/sh\\nexec python3 -m pbxtool hook\\n' > .git/hooks/pre-commit
+    chmod +x .git/hooks/pre-commit
+
+    python3 -m pbxtool hook --check      # CI: fail if the project is behind
+"""
+
+import os
+import subprocess
+import sys
+
+from pbxtool import PROJECT_FILE, cache, classify, swift
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.operations import AddFile, Move, OperationError, RemoveFile
+from pbxtool.pbxproj import Project
+
+CACHE_NAME = 'hook'
+CACHE_VERSION = 1
+
+
+def parse_name_status(text, nul=False):
+    """Return (status, old, new) for each entry; old or new is None when absent.
+
+    text is git diff --name-status output, NUL-separated with -z.
+    """
+    entries = []
+    if nul:
+        fields = text.split('\0')
+        i = 0
+        while i < len(fields) and fields[i]:
+            status = fields[i][0]
+            if status in 'RC':
+                entries.append((status, fields[i + 1], fields[i + 2]))
+                i += 3
+            else:
+                entries.append((status, fields[i + 1], fields[i + 1]))
+                i += 2
+    else:
+        for line in text.splitlines():
+            parts = line.split('\t')
+            if len(parts) == 3:
+                entries.append((parts[0][0], parts[1], parts[2]))
+            elif len(parts) == 2:
+                entries.append((parts[0][0], parts[1], parts[1]))
+    return [(status, None if status in 'AC' else old, None if status == 'D' else new)
+            for status, old, new in entries]
+
+
+def staged():
+    output = subprocess.run(['git', 'diff', '--cached', '--name-status', '-M', '-z', '--relative'],
+                            check=True, capture_output=True, text=True).stdout
+    return parse_name_status(output, nul=True)
+
+
+def staged_blobs(paths):
+    """Return {path: staged contents} for paths, in one git call."""
+    if not paths:
+        return {}
+    output = subprocess.run(['git', 'cat-file', '--batch'], check=True, capture_output=True,
+                            input=''.join(f':{path}\n' for path in paths).encode('utf-8')).stdout
+    blobs = {}
+    pos = 0
+    for path in paths:
+        end = output.index(b'\n', pos)
+        header = output[pos:end].split()
+        pos = end + 1
+        if header[-1] == b'missing':
+            raise OperationError(f'{path} is not staged')
+        size = int(header[2])
+        blobs[path] = output[pos:pos + size]
+        pos += size + 1
+    return blobs
+
+
+def staged_scans(paths, scans, tracer):
+    """Scan results of the staged contents of paths, reusing the cached scans."""
+    results = {}
+    with tracer.step('hook: scan staged', files=len(paths)) as step:
+        for path, data in staged_blobs(paths).items():
+            step.bytes_scanned += len(data)
+            result = scans.get(cache.content_hash(data))
+            if result is None:
+                result = swift.scan(data.decode('utf-8', 'replace'))
+                step.objects += 1
+            results[path] = result
+    return results
+
+
+def unstaged(path):
+    """Whether path has changes that are not staged."""
+    return subprocess.run(['git', 'diff', '--quiet', '--', path]).returncode != 0
+
+
+def project_key(path, staged):
+    """A cheap key for the contents of the project: the staged blob id, or
+    the working tree file's mtime and size."""
+    if staged:
+        output = subprocess.run(['git', 'ls-files', '--stage', '--', path],
+                                check=True, capture_output=True, text=True).stdout
+        return output.split()[1] if output else None
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_summary(kind, key):
+    """The registered paths of the project last parsed as kind, if key still matches."""
+    entry = cache.load(CACHE_NAME, CACHE_VERSION).get(kind)
+    return entry if entry and entry['key'] == key else None
+
+
+def save_summary(kind, key, index):
+    data = cache.load(CACHE_NAME, CACHE_VERSION)
+    data[kind] = {'key': key, 'files': sorted(index.path_to_ref), 'synchronized': sorted(index.synchronized)}
+    cache.save(CACHE_NAME, CACHE_VERSION, data)
+
+
+def pending(summary, added, deleted, renamed):
+    """Whether the project summarized needs an edit for the staged changes."""
+    files = set(summary['files'])
+
+    def tracked(path):
+        return path in files or any(path == root or path.startswith(root + '/')
+                                    for root in summary['synchronized'])
+
+    return (any(path in files for path in deleted)
+            or any(old in files or not tracked(new) for old, new in renamed)
+            or any(not tracked(path) for path in added))
+
+
+def swift_changes(entries):
+    """Split entries into (added, deleted, renamed (old, new)) Swift paths."""
+    added, deleted, renamed = [], [], []
+    for status, old, new in entries:
+        old_swift = old is not None and old.endswith('.swift')
+        new_swift = new is not None and new.endswith('.swift')
+        if status == 'R' and old_swift and new_swift:
+            renamed.append((old, new))
+            continue
+        if status in 'RD' and old_swift:
+            deleted.append(old)
+        if status in 'RAC' and new_swift:
+            added.append(new)
+    return added, deleted, renamed
+
+
+def operations(project, added, deleted, renamed, tracer, staged=True):
+    """The project edits for the staged Swift changes.
+
+    New files are classified by their staged contents, or by the working
+    tree copies when staged is false.
+    """
+    index = project.index
+    result = []
+    added = list(added)
+    for old, new in renamed:
+        if old in index.path_to_ref or index.path_to_ref.get(new):
+            result.append(Move(old, new))
+        else:
+            # Never registered (or in a synchronized folder): as good as new
+            added.append(new)
+    result += [RemoveFile(path) for path in deleted]
+    new = sorted(path for path in added if path not in index.path_to_ref)
+    if new:
+        scans = classify.cached_scans()
+        results = staged_scans(new, scans, tracer) if staged else None
+        # Staged files are in the index, whatever the working tree says
+        exists = results.__contains__ if staged else os.path.exists
+        rows = classify.classify(project, new, tracer, context=scans, prune=False, results=results)
+        result += [AddFile(row['path'], row['targets'], exists=exists) for row in rows
+                   if row['current'] is None and row['kind'] != 'synchronized']
+    return result
+
+
+def main(args, tracer):
+    with tracer.step('hook: staged') as step:
+        if args.name_status:
+            with (sys.stdin if args.name_status == '-' else open(args.name_status)) as f:
+                entries = parse_name_status(f.read())
+        else:
+            try:
+                entries = staged()
+            except subprocess.CalledProcessError as e:
+                print(f'❌ {e.stderr.strip() or e}')
+                return 1
+        added, deleted, renamed = swift_changes(entries)
+        step.objects = len(entries)
+        step.matches = len(added) + len(deleted) + len(renamed)
+    if not step.matches:
+        return 0
+    from_git = not args.name_status
+    staged_project = args.check and from_git
+    kind = 'staged' if staged_project else 'worktree'
+    transaction = Transaction(args.project, tracer)
+    try:
+        if not args.check and not args.no_stage and unstaged(args.project):
+            print(f'❌ {args.project} has unstaged changes; stage or stash them first, '
+                  f'or they would be committed along with the hook\'s edits')
+            return 1
+        with tracer.step('hook: summary', path=args.project) as step:
+            key = project_key(args.project, staged_project)
+            summary = load_summary(kind, key)
+            step.matches = summary is not None
+        if summary is not None and not pending(summary, added, deleted, renamed):
+            return 0
+        if staged_project:
+            with tracer.step('load', path=f':{args.project}') as step:
+                data = staged_blobs([args.project])[args.project]
+                project = Project(data.decode('utf-8'), args.project)
+                step.bytes_scanned = len(data)
+                step.objects = len(project.objects)
+        else:
+            project = transaction.load()
+        transaction.queue(*operations(project, added, deleted, renamed, tracer, from_git))
+        if args.check:
+            changes = transaction.apply(project)
+        else:
+            changes = transaction.commit(project)
+            project = transaction.project
+            key = project_key(args.project, False)
+        if not args.check or not changes:
+            # What the file now holds, so the next commit need not parse it
+            save_summary(kind, key, project.index)
+    except (OSError, OperationError, ConflictError, subprocess.CalledProcessError) as e:
+        print(f'❌ pbxtool hook: {e}')
+        return 1
+    for change in changes:
+        print(f'✓ {change}')
+    if args.check:
+        if changes:
+            print(f'❌ The staged {args.project} does not match the staged Swift files; '
+                  f'run: python3 -m pbxtool hook')
+            return 1
+        return 0
+    if changes and not args.no_stage:
+        subprocess.run(['git', 'add', args.project], check=True)
+        print(f'✅ Updated and staged {args.project}')
+    elif changes:
+        print(f'✅ Updated {args.project}')
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('hook', help='pre-commit hook: sync the project with staged Swift files')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--check', action='store_true',
+                        help='only report; exit 1 if the project needs changes')
+    parser.add_argument('--no-stage', action='store_true', help='do not git add the updated project')
+    parser.add_argument('--name-status', metavar='FILE',
+                        help="read git diff --name-status output from FILE ('-' for stdin) instead of git")
+    parser.set_defaults(func=main)
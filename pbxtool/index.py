@@ -0,0 +1,222 @@
+"""
+Lookup tables over a parsed Project.
+
+Paths are relative to the project root (the directory holding
+FocusPal.xcodeproj) and use forward slashes.  Operations keep the index in
+step with their edits through the note_* methods, so it is built once per
+parse no matter how many edits follow.  Inside a Project savepoint each
+entry is journaled before it changes, so a rollback restores the index
+instead of rebuilding it.
+"""
+
+import posixpath
+
+GROUP_ISAS = ('PBXGroup', 'PBXVariantGroup', 'XCVersionGroup')
+PHASE_ISAS = ('PBXSourcesBuildPhase', 'PBXResourcesBuildPhase',
+              'PBXFrameworksBuildPhase', 'PBXCopyFilesBuildPhase',
+              'PBXHeadersBuildPhase', 'PBXShellScriptBuildPhase')
+
+
+class ProjectIndex:
+    """Parent links, resolved paths and build membership for a Project."""
+
+    def __init__(self, project):
+        self.project = project
+        # Updates are journaled for savepoints once the tables are built
+        self._ready = False
+        self.parent = {}
+        self.phase_of = {}
+        self.target_of_phase = {}
+        self.build_files = {}
+        self.targets = {}
+        self._paths = {}
+        objects = project.objects
+        for obj in objects.values():
+            isa = obj.isa
+            if isa in GROUP_ISAS:
+                for child in obj.get('children', ()):
+                    self.parent[child] = obj.id
+            elif isa in PHASE_ISAS:
+                for build_id in obj.get('files', ()):
+                    self.phase_of[build_id] = obj.id
+            elif isa == 'PBXBuildFile' and 'fileRef' in obj.fields:
+                self.build_files.setdefault(obj['fileRef'], set()).add(obj.id)
+            elif isa in ('PBXNativeTarget', 'PBXAggregateTarget', 'PBXLegacyTarget'):
+                self.targets[obj['name']] = obj.id
+                for phase_id in obj.get('buildPhases', ()):
+                    self.target_of_phase[phase_id] = obj.id
+        self.path_to_ref = {}
+        self.path_to_group = {}
+        self.synchronized = {}
+        for obj in objects.values():
+            if obj.isa == 'PBXFileReference':
+                path = self.path(obj.id)
+                if path is not None:
+                    self.path_to_ref.setdefault(path, obj.id)
+            elif obj.isa == 'PBXGroup' and 'path' in obj.fields:
+                path = self.path(obj.id)
+                if path is not None:
+                    self.path_to_group.setdefault(path, obj.id)
+            elif obj.isa == 'PBXFileSystemSynchronizedRootGroup':
+                path = self.path(obj.id)
+                if path is not None:
+                    self.synchronized[path] = obj.id
+        main_group = project.root.get('mainGroup')
+        if main_group:
+            self.path_to_group.setdefault('', main_group)
+        # (fileRef, phase) -> build file, for O(1) "already a member" checks
+        self.members = {}
+        for ref_id, build_ids in self.build_files.items():
+            for build_id in build_ids:
+                phase_id = self.phase_of.get(build_id)
+                if phase_id is not None:
+                    self.members.setdefault((ref_id, phase_id), build_id)
+        self._ready = True
+
+    def _set(self, table, key, value, replace=True):
+        if not replace and key in table:
+            return
+        if self._ready:
+            self.project._journal_index(table, key)
+        table[key] = value
+
+    def _pop(self, table, key):
+        if key not in table:
+            return None
+        if self._ready:
+            self.project._journal_index(table, key)
+        return table.pop(key)
+
+    # -- paths --------------------------------------------------------------
+
+    def path(self, id):
+        """Resolve the on-disk path of a group or file reference."""
+        if id in self._paths:
+            return self._paths[id]
+        obj = self.project.objects.get(id)
+        result = None
+        if obj is not None:
+            tree = obj.get('sourceTree', '<group>')
+            own = obj.get('path')
+            if tree == '<group>':
+                parent = self.parent.get(id)
+                if parent is None:
+                    base = '' if id == self.project.root.get('mainGroup') else None
+                else:
+                    base = self.path(parent)
+                if base is not None:
+                    result = posixpath.normpath(posixpath.join(base, own)) if own else base
+            elif tree == 'SOURCE_ROOT':
+                result = posixpath.normpath(own) if own else ''
+            if result == '.':
+                result = ''
+        self._set(self._paths, id, result)
+        return result
+
+    def group_for_dir(self, directory):
+        return self.path_to_group.get(directory)
+
+    def in_group(self, group_id, child_id):
+        return self.parent.get(child_id) == group_id
+
+    def build_file(self, ref_id, phase_id):
+        """Return the build file adding ref_id to phase_id, if there is one."""
+        return self.members.get((ref_id, phase_id))
+
+    def synchronized_root(self, path):
+        """Return the file system synchronized group containing path, if any."""
+        for root, group in self.synchronized.items():
+            if path == root or path.startswith(root + '/'):
+                return group
+        return None
+
+    # -- targets and phases -------------------------------------------------
+
+    def target(self, name):
+        return self.targets.get(name)
+
+    def phase(self, target_id, isa='PBXSourcesBuildPhase'):
+        for phase_id in self.project.objects[target_id].get('buildPhases', ()):
+            if self.project.objects[phase_id].isa == isa:
+                return phase_id
+        return None
+
+    def targets_of_ref(self, ref_id):
+        """Names of the targets whose build phases include ref_id."""
+        names = set()
+        for build_id in self.build_files.get(ref_id, ()):
+            phase_id = self.phase_of.get(build_id)
+            target_id = self.target_of_phase.get(phase_id)
+            if target_id:
+                names.add(self.project.objects[target_id]['name'])
+        return names
+
+    def targets_of_path(self, path):
+        """Names of the targets that build path, including synchronized folders."""
+        ref_id = self.path_to_ref.get(path)
+        if ref_id is not None:
+            return self.targets_of_ref(ref_id)
+        group_id = self.synchronized_root(path)
+        if group_id is None:
+            return set()
+        return {name for name, id in self.targets.items()
+                if group_id in self.project.objects[id].get('fileSystemSynchronizedGroups', ())}
+
+    def targets_by_product(self, suffix):
+        """Target names whose productType ends with suffix, e.g. 'unit-test'."""
+        return sorted(name for name, id in self.targets.items()
+                      if self.project.objects[id].get('productType', '').endswith(suffix))
+
+    # -- updates from operations --------------------------------------------
+
+    def note_file_ref(self, ref_id, parent_id):
+        self._set(self.parent, ref_id, parent_id)
+        path = self.path(ref_id)
+        if path is not None:
+            self._set(self.path_to_ref, path, ref_id, replace=False)
+
+    def note_group(self, group_id, parent_id):
+        self._set(self.parent, group_id, parent_id)
+        path = self.path(group_id)
+        if path is not None:
+            self._set(self.path_to_group, path, group_id, replace=False)
+
+    def note_build_file(self, build_id, ref_id, phase_id):
+        self._set(self.build_files, ref_id, self.build_files.get(ref_id, set()) | {build_id})
+        self._set(self.phase_of, build_id, phase_id)
+        self._set(self.members, (ref_id, phase_id), build_id, replace=False)
+
+    def note_removed(self, ref_id):
+        """Forget a removed file reference and its build files."""
+        path = self._pop(self._paths, ref_id)
+        if path is not None and self.path_to_ref.get(path) == ref_id:
+            self._pop(self.path_to_ref, path)
+        self._pop(self.parent, ref_id)
+        for build_id in self._pop(self.build_files, ref_id) or ():
+            phase_id = self._pop(self.phase_of, build_id)
+            if self.members.get((ref_id, phase_id)) == build_id:
+                self._pop(self.members, (ref_id, phase_id))
+
+    def note_move(self, id, parent_id):
+        """Re-parent id and re-resolve the paths of it and everything below it."""
+        self._set(self.parent, id, parent_id)
+        objects = self.project.objects
+        pending = [id]
+        while pending:
+            node = pending.pop()
+            old = self._pop(self._paths, node)
+            obj = objects[node]
+            if old is not None:
+                for table in (self.path_to_ref, self.path_to_group, self.synchronized):
+                    if table.get(old) == node:
+                        self._pop(table, old)
+            path = self.path(node)
+            if path is not None:
+                if obj.isa == 'PBXFileReference':
+                    self._set(self.path_to_ref, path, node, replace=False)
+                elif obj.isa == 'PBXFileSystemSynchronizedRootGroup':
+                    self._set(self.synchronized, path, node)
+                elif obj.isa == 'PBXGroup' and 'path' in obj.fields:
+                    self._set(self.path_to_group, path, node, replace=False)
+            # Children resolve against this node, which is resolved by now
+            pending.extend(obj.get('children', ()))
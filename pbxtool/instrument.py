@@ -0,0 +1,256 @@
+"""
+Instrumentation for project operations.
+
+A Tracer records one entry per step: wall time, bytes scanned, objects
+touched and matches/replacements.  The trace is emitted as JSON so slow
+steps and edits that matched nothing show up at once.
+
+Scripts opt in with:
+
+    def main(tracer):
+        content = tracer.read_text(project_file)
+        content = tracer.sub(pattern, replacement, content, "Added entries")
+        tracer.write_text(project_file, content)
+
+    sys.exit(Tracer.from_argv().run(main))
+
+write_text() only replaces the file if it is unchanged since read_text()
+(see engine.py).  If another job wrote it in between, run() calls main
+again with the file locked, so its edits are replayed on top of the other
+job's and cannot lose a second time.
+
+Command line flags understood by Tracer.from_argv():
+
+    --trace PATH      write the JSON trace to PATH ('-' for stdout)
+    --profile PATH    run the session under cProfile and dump stats to PATH
+    --tracemalloc     record peak traced memory per step
+    --strict          refuse to write files if any step matched nothing
+
+Under --strict a Transaction (and so scripts.add_files()) refuses to
+write if any of its operations had nothing to do.
+"""
+
+import argparse
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from pbxtool import engine
+
+
+class Step:
+    """Measurements for a single operation step."""
+
+    def __init__(self, name, **info):
+        self.name = name
+        self.info = info
+        self.seconds = 0.0
+        self.bytes_scanned = 0
+        self.objects = 0
+        self.matches = 0
+        self.replacements = 0
+        self.peak_memory = None
+        self.expect_match = False
+
+    @property
+    def zero_match(self):
+        return self.expect_match and self.matches == 0
+
+    def to_dict(self):
+        data = {
+            'name': self.name,
+            'seconds': round(self.seconds, 6),
+            'bytes_scanned': self.bytes_scanned,
+            'objects': self.objects,
+            'matches': self.matches,
+            'replacements': self.replacements,
+            'zero_match': self.zero_match,
+        }
+        if self.peak_memory is not None:
+            data['peak_memory'] = self.peak_memory
+        if self.info:
+            data.update(self.info)
+        return data
+
+
+class Tracer:
+    """Collects Steps for one run and writes them out as a JSON trace."""
+
+    def __init__(self, trace_path=None, profile_path=None, memory=False,
+                 strict=False, verbose=True):
+        self.trace_path = trace_path or os.environ.get('PBXTOOL_TRACE')
+        self.profile_path = profile_path
+        self.memory = memory
+        self.strict = strict
+        self.verbose = verbose
+        self.steps = []
+        self.started = None
+        # Steps before this index belong to attempts lost to a conflict
+        self.attempt_start = 0
+        self.read_hashes = {}
+
+    @staticmethod
+    def add_arguments(parser):
+        """Register the instrumentation flags on an argparse parser."""
+        group = parser.add_argument_group('instrumentation')
+        group.add_argument('--trace', metavar='PATH',
+                           help="write a JSON trace to PATH ('-' for stdout)")
+        group.add_argument('--profile', metavar='PATH',
+                           help='run under cProfile and dump stats to PATH')
+        group.add_argument('--tracemalloc', action='store_true',
+                           help='record peak traced memory per step')
+        group.add_argument('--strict', action='store_true',
+                           help='refuse to write if any step matched nothing')
+
+    @classmethod
+    def from_args(cls, args, verbose=True):
+        return cls(trace_path=args.trace, profile_path=args.profile,
+                   memory=args.tracemalloc, strict=args.strict,
+                   verbose=verbose)
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        """Build a Tracer from the instrumentation flags in argv."""
+        parser = argparse.ArgumentParser(add_help=False)
+        cls.add_arguments(parser)
+        args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+        return cls.from_args(args)
+
+    @contextlib.contextmanager
+    def session(self):
+        """Wrap a whole run: enables profiling hooks and writes the trace."""
+        self.started = time.perf_counter()
+        profiler = cProfile.Profile() if self.profile_path else None
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(self.profile_path)
+            self.emit()
+            if self.memory and tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    def run(self, func):
+        """Call func(tracer) inside a session and return its result.
+
+        If func's write_text() lost a race with another writer, func is
+        called once more with the file locked.  A conflict from anything
+        else (a Transaction, which has replayed its operations already)
+        is reported and ends the run.
+        """
+        with self.session():
+            try:
+                return func(self)
+            except engine.ConflictError as e:
+                if e.path not in self.read_hashes:
+                    print(f"❌ {e}")
+                    return 1
+                print(f"⟳ {e}, replaying edits with the project locked")
+                conflict = e
+            self.attempt_start = len(self.steps)
+            self.read_hashes = {}
+            try:
+                with engine.locked(conflict.path):
+                    return func(self)
+            except engine.ConflictError as e:
+                print(f"❌ {e}")
+                return 1
+
+    @contextlib.contextmanager
+    def step(self, name, **info):
+        """Time a block; the yielded Step receives the counters."""
+        step = Step(name, **info)
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield step
+        finally:
+            step.seconds = time.perf_counter() - start
+            if self.memory and tracemalloc.is_tracing():
+                step.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.steps.append(step)
+
+    @contextlib.contextmanager
+    def edit(self, name, **info):
+        """step() for hand-located edits; set step.matches when applied."""
+        with self.step(name, **info) as step:
+            step.expect_match = True
+            yield step
+            step.replacements = step.replacements or step.matches
+        self.report(step)
+
+    def report(self, step):
+        """Print the usual check mark, or a warning for a zero-match edit."""
+        if not self.verbose:
+            return
+        if step.zero_match:
+            print(f"⚠ {step.name} (no match, nothing changed)")
+        else:
+            print(f"✓ {step.name}")
+
+    def sub(self, pattern, repl, content, name, count=0, flags=0):
+        """re.sub() that records the step and warns when nothing matched."""
+        with self.step(name) as step:
+            step.expect_match = True
+            step.bytes_scanned = len(content)
+            content, step.matches = re.subn(pattern, repl, content,
+                                            count=count, flags=flags)
+            step.replacements = step.objects = step.matches
+        self.report(step)
+        return content
+
+    def read_text(self, path):
+        with self.step('read', path=path) as step:
+            content, self.read_hashes[path] = engine.read(path)
+            step.bytes_scanned = len(content)
+        return content
+
+    def write_text(self, path, content):
+        """Write content unless --strict is set and an edit matched nothing.
+
+        Raises engine.ConflictError if path changed since read_text().
+        """
+        failed = self.zero_match_steps()
+        if self.strict and failed:
+            print(f"⚠ Not writing {path}: {len(failed)} step(s) matched nothing")
+            return False
+        with self.step('write', path=path) as step:
+            self.read_hashes[path] = engine.write(path, content, self.read_hashes.get(path))
+            step.bytes_scanned = len(content)
+        return True
+
+    def zero_match_steps(self):
+        return [step for step in self.steps[self.attempt_start:] if step.zero_match]
+
+    def to_dict(self):
+        total = time.perf_counter() - self.started if self.started else None
+        return {
+            'command': ' '.join([os.path.basename(sys.argv[0])] + sys.argv[1:]),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'total_seconds': round(total, 6) if total is not None else None,
+            'steps': [step.to_dict() for step in self.steps],
+            'zero_match_steps': [step.name for step in self.zero_match_steps()],
+        }
+
+    def emit(self):
+        """Write the JSON trace if a destination was requested."""
+        if not self.trace_path:
+            return
+        data = json.dumps(self.to_dict(), indent=2)
+        if self.trace_path == '-':
+            print(data)
+        else:
+            with open(self.trace_path, 'w') as f:
+                f.write(data + '\n')
@@ -0,0 +1,136 @@
+"""
+Move or rename files and groups, on disk and in the project at once.
+
+    python3 -m pbxtool move OLD NEW [OLD NEW ...]
+    python3 -m pbxtool move FocusPal/Features/ParentControls/Views/ParentProfilePromptView.swift \\
+        FocusPal/Features/ParentControls/ViewModels/
+    python3 -m pbxtool move --from moves.txt     # one "old -> new" per line
+
+As with mv, a NEW that ends in / or names an existing folder receives
+OLD, file or folder, under its own name.  All the moves are one transaction: the files
+are renamed first, and if the project cannot be updated they are renamed
+back, so disk and project never disagree.  Paths that were already moved
+(on disk, in the project or both) are left alone, so a batch can simply
+be run again.
+"""
+
+import os
+import posixpath
+import re
+import sys
+
+from pbxtool import PROJECT_FILE
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.operations import Move, OperationError
+
+PAIR_RE = re.compile(r'\s*(.+?)\s*(?:->|→|\t)\s*(.+?)\s*$')
+
+
+def read_pairs(path):
+    """(old, new) pairs from a file of 'old -> new' lines; '-' reads stdin."""
+    f = sys.stdin if path == '-' else open(path, 'r')
+    try:
+        pairs = []
+        for number, line in enumerate(f, 1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            m = PAIR_RE.match(line)
+            if not m:
+                raise ValueError(f'{path}:{number}: expected "old -> new"')
+            pairs.append(m.groups())
+        return pairs
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def resolve(old, new):
+    """Normalize a pair, placing old inside new when new is a folder."""
+    old = posixpath.normpath(old)
+    inside = posixpath.join(new, posixpath.basename(old))
+    # Once a folder has been renamed to new, new is no target to move into;
+    # once old has been moved into new, keep resolving to the same place
+    if new.endswith('/') or (os.path.isdir(new) and (os.path.lexists(old) or os.path.lexists(inside))):
+        new = inside
+    return old, posixpath.normpath(new)
+
+
+def rename(pairs):
+    """Rename on disk; returns the renames done, for undo()."""
+    done = []
+    try:
+        for old, new in pairs:
+            if os.path.lexists(old) and not os.path.lexists(new):
+                os.makedirs(os.path.dirname(new) or '.', exist_ok=True)
+                os.rename(old, new)
+                done.append((old, new))
+            elif os.path.lexists(old):
+                raise OperationError(f'{new} already exists')
+            elif not os.path.lexists(new):
+                raise OperationError(f'{old} does not exist')
+    except BaseException:
+        undo(done)
+        raise
+    return done
+
+
+def undo(done):
+    for old, new in reversed(done):
+        os.rename(new, old)
+
+
+def main(args, tracer):
+    try:
+        pairs = read_pairs(args.pairs_file) if args.pairs_file else []
+    except (OSError, ValueError) as e:
+        print(f'❌ {e}')
+        return 1
+    if len(args.paths) % 2:
+        print('❌ Paths must come in OLD NEW pairs')
+        return 2
+    pairs += list(zip(args.paths[::2], args.paths[1::2]))
+    if not pairs:
+        print('❌ Nothing to move')
+        return 2
+    pairs = [resolve(old, new) for old, new in pairs]
+    transaction = Transaction(args.project, tracer).queue(*(Move(old, new) for old, new in pairs))
+    project = transaction.load()
+    try:
+        if args.dry_run:
+            with tracer.step('move: plan', moves=len(pairs)) as step:
+                changes = transaction.apply(project)
+                step.objects = len(project.modified | project.added)
+        else:
+            with tracer.step('move: rename', moves=len(pairs)) as step:
+                done = rename(pairs)
+                step.objects = len(done)
+            try:
+                changes = transaction.commit(project)
+            except BaseException:
+                undo(done)
+                raise
+    except (OSError, OperationError, ConflictError) as e:
+        print(f'❌ {e}')
+        if not args.dry_run:
+            print('Nothing was moved')
+        return 1
+    for change in changes:
+        print(f'✓ {change}')
+    for operation in transaction.unchanged:
+        print(f'= {operation.old} → {operation.new} (already moved)')
+    moved = len(pairs) - len(transaction.unchanged)
+    if args.dry_run:
+        print(f'\n{moved} move(s) planned (dry run, nothing written)')
+    elif moved:
+        print(f'\n✅ Moved {moved} file(s) and group(s)')
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('move', help='move or rename files and groups on disk and in the project')
+    parser.add_argument('paths', nargs='*', metavar='OLD NEW', help='pairs of old and new paths')
+    parser.add_argument('--from', dest='pairs_file', metavar='FILE',
+                        help="read 'old -> new' lines from FILE ('-' for stdin)")
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--dry-run', action='store_true', help='check the moves without making them')
+    parser.set_defaults(func=main)
@@ -0,0 +1,311 @@
+"""
+Project edit operations.
+
+Each operation is a small object whose apply(project) performs the edit
+on a parsed Project and returns a list of human readable changes.  Object
+IDs are derived from the file path, so applying the same operation to the
+same project always produces the same result.
+
+Operations are idempotent: they look up the project index before adding
+anything, and an operation with nothing left to do returns no changes and
+leaves the project untouched.
+
+An operation whose precondition fails raises OperationError.  Transaction
+and Composite apply operations inside a Project savepoint, so whatever the
+earlier steps did is rolled back and nothing half-done gets written.
+"""
+
+import os
+import posixpath
+
+FILE_TYPES = {
+    '.swift': 'sourcecode.swift',
+    '.m': 'sourcecode.c.objc',
+    '.h': 'sourcecode.c.h',
+    '.plist': 'text.plist.xml',
+    '.entitlements': 'text.plist.entitlements',
+    '.json': 'text.json',
+    '.md': 'net.daringfireball.markdown',
+    '.strings': 'text.plist.strings',
+    '.xcassets': 'folder.assetcatalog',
+    '.storyboard': 'file.storyboard',
+    '.xib': 'file.xib',
+}
+
+# Extensions that belong in a target's Sources phase; others go to Resources
+SOURCE_EXTENSIONS = {'.swift', '.m', '.mm', '.c', '.cpp'}
+NO_PHASE_EXTENSIONS = {'.plist', '.entitlements', '.md', '.h'}
+
+
+class OperationError(Exception):
+    """Raised when an operation cannot be applied to the project."""
+
+
+def file_type(path):
+    return FILE_TYPES.get(posixpath.splitext(path)[1], 'text')
+
+
+def display_name(project, id):
+    obj = project.objects[id]
+    return obj.get('name') or obj.get('path') or project.comments.get(id, id)
+
+
+def insert_child(project, group_id, child_id):
+    """Add child_id to a group, keeping groups first and names sorted."""
+    if project.index.in_group(group_id, child_id):
+        return
+    group = project.modify(group_id)
+    children = group.fields.setdefault('children', [])
+    is_group = project.objects[child_id].isa != 'PBXFileReference'
+    name = display_name(project, child_id).lower()
+    position = len(children)
+    for i, sibling in enumerate(children):
+        sibling_obj = project.objects.get(sibling)
+        if sibling_obj is None:
+            continue
+        sibling_is_group = sibling_obj.isa != 'PBXFileReference'
+        if is_group and not sibling_is_group:
+            position = i
+            break
+        if is_group == sibling_is_group and display_name(project, sibling).lower() > name:
+            position = i
+            break
+    children.insert(position, child_id)
+
+
+def ensure_group(project, directory, changes):
+    """Return the group for directory, creating missing groups on the way."""
+    index = project.index
+    group_id = index.group_for_dir(directory)
+    if group_id is not None:
+        return group_id
+    if not directory:
+        raise OperationError('project has no main group')
+    parent_id = ensure_group(project, posixpath.dirname(directory), changes)
+    name = posixpath.basename(directory)
+    group = project.add({
+        'isa': 'PBXGroup',
+        'children': [],
+        'path': name,
+        'sourceTree': '<group>',
+    }, seed=f'group:{directory}', comment=name)
+    insert_child(project, parent_id, group.id)
+    index.note_group(group.id, parent_id)
+    changes.append(f'created group {directory}')
+    return group.id
+
+
+def phase_for(project, target_name, path):
+    """Return the build phase of target_name that path belongs in, or None."""
+    ext = posixpath.splitext(path)[1]
+    if ext in NO_PHASE_EXTENSIONS:
+        return None
+    target_id = project.index.target(target_name)
+    if target_id is None:
+        raise OperationError(f'no target named {target_name}')
+    isa = 'PBXSourcesBuildPhase' if ext in SOURCE_EXTENSIONS else 'PBXResourcesBuildPhase'
+    phase_id = project.index.phase(target_id, isa)
+    if phase_id is None:
+        raise OperationError(f'target {target_name} has no {isa}')
+    return phase_id
+
+
+def phase_name(project, phase_id):
+    phase = project.objects[phase_id]
+    return phase.get('name') or phase.isa[3:-len('BuildPhase')]
+
+
+class AddFile:
+    """Register a file on disk with the project, its group and targets.
+
+    exists tells whether the file is there to register; it checks the
+    working tree unless the caller knows better (hook.py asks the git
+    index).
+    """
+
+    def __init__(self, path, targets=(), group=None, exists=os.path.exists):
+        self.path = posixpath.normpath(path)
+        self.targets = list(targets)
+        self.group = group
+        self.exists = exists
+
+    def __repr__(self):
+        return f'AddFile({self.path!r}, targets={self.targets!r})'
+
+    def apply(self, project):
+        changes = []
+        index = project.index
+        name = posixpath.basename(self.path)
+        ref_id = index.path_to_ref.get(self.path)
+        if ref_id is None:
+            if not self.exists(self.path):
+                raise OperationError(f'{self.path} does not exist')
+            directory = self.group if self.group is not None else posixpath.dirname(self.path)
+            group_id = ensure_group(project, directory, changes)
+            group_path = index.path(group_id)
+            ref = project.add({
+                'isa': 'PBXFileReference',
+                'lastKnownFileType': file_type(self.path),
+                'path': posixpath.relpath(self.path, group_path or '.'),
+                'sourceTree': '<group>',
+            }, seed=f'ref:{self.path}', comment=name)
+            ref_id = ref.id
+            insert_child(project, group_id, ref_id)
+            index.note_file_ref(ref_id, group_id)
+            changes.append(f'added {self.path} to group {group_path or "<main>"}')
+        for target_name in self.targets:
+            phase_id = phase_for(project, target_name, self.path)
+            if phase_id is None or index.build_file(ref_id, phase_id):
+                continue
+            build = project.add({
+                'isa': 'PBXBuildFile',
+                'fileRef': ref_id,
+            }, seed=f'build:{self.path}:{target_name}',
+               comment=f'{name} in {phase_name(project, phase_id)}')
+            project.modify(phase_id).fields.setdefault('files', []).append(build.id)
+            index.note_build_file(build.id, ref_id, phase_id)
+            changes.append(f'added {name} to target {target_name}')
+        return changes
+
+
+class RemoveFile:
+    """Remove a file from the project: its reference, group entry and build files."""
+
+    def __init__(self, path):
+        self.path = posixpath.normpath(path)
+
+    def __repr__(self):
+        return f'RemoveFile({self.path!r})'
+
+    def apply(self, project):
+        index = project.index
+        ref_id = index.path_to_ref.get(self.path)
+        if ref_id is None:
+            return []
+        changes = []
+        for build_id in sorted(index.build_files.get(ref_id, ())):
+            phase_id = index.phase_of.get(build_id)
+            if phase_id is not None:
+                phase = project.modify(phase_id)
+                phase.fields['files'] = [f for f in phase.get('files', ()) if f != build_id]
+                target_id = index.target_of_phase.get(phase_id)
+                if target_id is not None:
+                    changes.append(f'removed {posixpath.basename(self.path)} from target '
+                                   f'{project.objects[target_id]["name"]}')
+            if build_id in project.objects:
+                project.remove(build_id)
+        parent_id = index.parent.get(ref_id)
+        if parent_id is not None:
+            group = project.modify(parent_id)
+            group.fields['children'] = [c for c in group.get('children', ()) if c != ref_id]
+        project.remove(ref_id)
+        index.note_removed(ref_id)
+        changes.append(f'removed {self.path} from group {index.path(parent_id) or "<main>"}'
+                       if parent_id is not None else f'removed {self.path}')
+        return changes
+
+
+def move_name(fields, old, new):
+    """Carry an explicit name over a move; None when path says it all."""
+    name = fields.get('name')
+    if name is None:
+        return None
+    return posixpath.basename(new) if name == posixpath.basename(old) else name
+
+
+class Move:
+    """Move a registered file or group to another path and group.
+
+    Only the project is edited; renaming on disk is up to the caller (see
+    move.py), so the operation can be replayed after a conflict.  Groups
+    are moved as a whole: their children resolve relative to them.
+    """
+
+    def __init__(self, old, new):
+        self.old = posixpath.normpath(old)
+        self.new = posixpath.normpath(new)
+
+    def __repr__(self):
+        return f'Move({self.old!r}, {self.new!r})'
+
+    def apply(self, project):
+        index = project.index
+        id = index.path_to_ref.get(self.old) or index.path_to_group.get(self.old)
+        if id is None:
+            if index.path_to_ref.get(self.new) or index.path_to_group.get(self.new):
+                return []
+            if index.synchronized_root(self.old) and index.synchronized_root(self.new):
+                # Both sides are folders Xcode tracks on its own
+                return []
+            raise OperationError(f'{self.old} is not in the project')
+        if self.new == self.old or self.new.startswith(self.old + '/'):
+            raise OperationError(f'cannot move {self.old} into itself')
+        if index.path_to_ref.get(self.new) or index.path_to_group.get(self.new):
+            raise OperationError(f'{self.new} is already in the project')
+        obj = project.objects[id]
+        tree = obj.get('sourceTree', '<group>')
+        if tree not in ('<group>', 'SOURCE_ROOT') or 'path' not in obj.fields:
+            raise OperationError(f'cannot move {self.old}: it has no path relative to the project')
+        changes = []
+        group_id = ensure_group(project, posixpath.dirname(self.new), changes)
+        group_path = index.path(group_id)
+        obj = project.modify(id)
+        if tree == '<group>':
+            obj.fields['path'] = posixpath.relpath(self.new, group_path or '.')
+        else:
+            obj.fields['path'] = self.new
+        name = move_name(obj.fields, self.old, self.new)
+        if name is None or name == obj.fields['path']:
+            obj.fields.pop('name', None)
+        else:
+            obj.fields['name'] = name
+        if (obj.isa == 'PBXFileReference' and 'lastKnownFileType' in obj.fields
+                and posixpath.splitext(self.old)[1] != posixpath.splitext(self.new)[1]):
+            obj.fields['lastKnownFileType'] = file_type(self.new)
+        # Re-parent after renaming, so insert_child() sorts by the new name
+        parent_id = index.parent.get(id)
+        if parent_id != group_id:
+            if parent_id is not None:
+                parent = project.modify(parent_id)
+                parent.fields['children'] = [c for c in parent['children'] if c != id]
+            insert_child(project, group_id, id)
+        elif parent_id is not None:
+            # Same group, new name: its children list comment changes
+            project.modify(parent_id)
+        display = name or posixpath.basename(self.new)
+        project.set_comment(id, display)
+        for build_id in sorted(index.build_files.get(id, ())):
+            phase_id = index.phase_of.get(build_id)
+            if phase_id is None or build_id not in project.objects:
+                continue
+            project.set_comment(build_id, f'{display} in {phase_name(project, phase_id)}')
+            project.modify(build_id)
+            project.modify(phase_id)
+        index.note_move(id, group_id)
+        changes.append(f'moved {self.old} to {self.new}')
+        return changes
+
+
+class Composite:
+    """Operations that only make sense together, applied all or nothing.
+
+    A failing step rolls back the steps before it, so a caller that
+    catches the OperationError carries on with the project as it was.
+    """
+
+    def __init__(self, name, operations):
+        self.name = name
+        self.operations = list(operations)
+
+    def __repr__(self):
+        return f'Composite({self.name!r}, {self.operations!r})'
+
+    def apply(self, project):
+        changes = []
+        with project.atomic():
+            for operation in self.operations:
+                try:
+                    changes += operation.apply(project)
+                except OperationError as e:
+                    raise OperationError(f'{self.name}: {e}') from e
+        return changes
@@ -0,0 +1,534 @@
+"""
+Reader and writer for project.pbxproj files.
+
+The whole file is parsed into PBXObjects, but the original text is kept:
+objects that were not modified are written back byte for byte, modified
+objects are re-serialized in Xcode's style and new objects are inserted
+into their section in ID order.  Edits therefore produce the same small
+diffs Xcode itself would.
+
+All mutation goes through Project.add(), Project.modify() and
+Project.remove() so the writer knows which objects changed.  The same
+hooks make savepoints cheap: the first change to an object inside a
+savepoint copies its fields, and ProjectIndex journals each entry it
+updates, so rolling back costs O(changed objects) and nothing is ever
+re-read from disk or re-indexed.
+"""
+
+import bisect
+import contextlib
+import copy
+import hashlib
+import re
+
+from pbxtool import engine
+
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>/\*.*?\*/|//[^\n]*)
+  | (?P<quoted>"(?:[^"\\]|\\.)*")
+  | (?P<punct>[{}()=;,])
+  | (?P<bare>[^\s{}()=;,"]+)
+''', re.S | re.X)
+
+SAFE_RE = re.compile(r'[A-Za-z0-9_./]+')
+SECTION_RE = re.compile(r'/\* (Begin|End) (\w+) section \*/')
+
+# Objects Xcode writes on a single line
+SINGLE_LINE_ISAS = {'PBXBuildFile', 'PBXFileReference'}
+
+# Keys whose object ID values are written without a comment
+UNCOMMENTED_KEYS = {'remoteGlobalIDString', 'TestTargetID'}
+
+ESCAPES = {'"': '\\"', '\\': '\\\\', '\n': '\\n', '\t': '\\t'}
+UNESCAPES = {'n': '\n', 't': '\t', '"': '"', '\\': '\\'}
+
+
+class ParseError(Exception):
+    """Raised when project.pbxproj cannot be parsed."""
+
+
+# Marks an index entry that did not exist before a change
+MISSING = object()
+
+
+class Savepoint:
+    """The state of every object and comment before its first change."""
+
+    __slots__ = ('objects', 'comments', 'index', 'index_built')
+
+    def __init__(self, index_built=False):
+        # id -> (fields copy or None, in added, in modified, in removed)
+        self.objects = {}
+        # id -> comment, or None if there was none
+        self.comments = {}
+        # (table, key, previous value or MISSING) for each index update, in order
+        self.index = []
+        # Whether the index existed when the savepoint started
+        self.index_built = index_built
+
+
+class PBXObject:
+    """One entry of the objects dictionary."""
+
+    __slots__ = ('id', 'fields')
+
+    def __init__(self, id, fields):
+        self.id = id
+        self.fields = fields
+
+    @property
+    def isa(self):
+        return self.fields.get('isa')
+
+    def get(self, key, default=None):
+        return self.fields.get(key, default)
+
+    def __getitem__(self, key):
+        return self.fields[key]
+
+    def __repr__(self):
+        return f'<{self.isa} {self.id}>'
+
+
+def unquote(token):
+    if not token.startswith('"'):
+        return token
+    body = token[1:-1]
+    if '\\' not in body:
+        return body
+    return re.sub(r'\\(.)', lambda m: UNESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def quote(value):
+    if SAFE_RE.fullmatch(value):
+        return value
+    return '"' + ''.join(ESCAPES.get(c, c) for c in value) + '"'
+
+
+def tokenize(text):
+    """Yield (kind, value, start, end) for every significant token."""
+    pos = 0
+    length = len(text)
+    match = TOKEN_RE.match
+    while pos < length:
+        m = match(text, pos)
+        if not m:
+            raise ParseError(f'unexpected character {text[pos]!r} at offset {pos}')
+        kind = m.lastgroup
+        if kind != 'ws':
+            yield kind, m.group(), m.start(), m.end()
+        pos = m.end()
+
+
+class Parser:
+    """Recursive-descent parser that also records object and section spans."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = list(tokenize(text))
+        self.pos = 0
+        self.comments = {}
+        self.spans = {}
+        self.sections = {}
+        self.objects_end = None
+
+    def peek(self):
+        while self.pos < len(self.tokens) and self.tokens[self.pos][0] == 'comment':
+            self.pos += 1
+        if self.pos >= len(self.tokens):
+            raise ParseError('unexpected end of file')
+        return self.tokens[self.pos]
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        token = self.next()
+        if token[1] != value:
+            raise ParseError(f'expected {value!r} at offset {token[2]}, found {token[1]!r}')
+        return token
+
+    def trailing_comment(self):
+        """Return the /* comment */ directly after the last token, if any."""
+        if self.pos < len(self.tokens) and self.tokens[self.pos][0] == 'comment':
+            value = self.tokens[self.pos][1]
+            if value.startswith('/*'):
+                return value[2:-2].strip()
+        return None
+
+    def value(self):
+        kind, value, start, end = self.next()
+        if value == '{':
+            return self.dictionary()
+        if value == '(':
+            return self.array()
+        if kind not in ('quoted', 'bare'):
+            raise ParseError(f'unexpected {value!r} at offset {start}')
+        string = unquote(value)
+        comment = self.trailing_comment()
+        if comment is not None and kind == 'bare':
+            self.comments.setdefault(string, comment)
+        return string
+
+    def dictionary(self):
+        result = {}
+        while self.peek()[1] != '}':
+            key = unquote(self.next()[1])
+            self.expect('=')
+            result[key] = self.value()
+            self.expect(';')
+        self.expect('}')
+        return result
+
+    def array(self):
+        result = []
+        while self.peek()[1] != ')':
+            result.append(self.value())
+            if self.peek()[1] == ',':
+                self.next()
+        self.expect(')')
+        return result
+
+    def line_start(self, offset):
+        return self.text.rfind('\n', 0, offset) + 1
+
+    def line_end(self, offset):
+        end = self.text.find('\n', offset)
+        return len(self.text) if end == -1 else end + 1
+
+    def objects(self):
+        """Parse the objects dictionary, remembering where everything lives."""
+        result = {}
+        self.expect('{')
+        while True:
+            # Section markers are comments, so scan them before peek() skips them
+            while self.tokens[self.pos][0] == 'comment':
+                m = SECTION_RE.fullmatch(self.tokens[self.pos][1])
+                if m:
+                    begin_or_end, isa = m.groups()
+                    span = self.sections.setdefault(isa, [None, None])
+                    line = self.line_start(self.tokens[self.pos][2])
+                    span[0 if begin_or_end == 'Begin' else 1] = line
+                self.pos += 1
+            kind, value, start, _ = self.next()
+            if value == '}':
+                self.objects_end = self.line_start(start)
+                break
+            id = unquote(value)
+            comment = self.trailing_comment()
+            if comment is not None:
+                self.comments[id] = comment
+            self.expect('=')
+            fields = self.value()
+            if not isinstance(fields, dict):
+                raise ParseError(f'object {id} is not a dictionary')
+            _, _, _, end = self.expect(';')
+            result[id] = PBXObject(id, fields)
+            self.spans[id] = (self.line_start(start), self.line_end(end))
+        return result
+
+    def parse(self):
+        self.expect('{')
+        top = {}
+        while self.peek()[1] != '}':
+            key = unquote(self.next()[1])
+            self.expect('=')
+            top[key] = self.objects() if key == 'objects' else self.value()
+            self.expect(';')
+        return top
+
+
+class Project:
+    """An in-memory project.pbxproj that can be edited and written back."""
+
+    def __init__(self, text, path=None, digest=None):
+        self.path = path
+        self.text = text
+        # Hash of the file as read, checked again before saving over it
+        self.digest = digest
+        parser = Parser(text)
+        top = parser.parse()
+        self.objects = top.pop('objects')
+        self.top = top
+        self.comments = parser.comments
+        self.spans = parser.spans
+        self.sections = parser.sections
+        self.objects_end = parser.objects_end
+        self.added = set()
+        self.modified = set()
+        self.removed = set()
+        self._index = None
+        self._savepoints = []
+
+    @classmethod
+    def load(cls, path):
+        text, digest = engine.read(path)
+        return cls(text, path, digest)
+
+    def save(self, path=None):
+        """Write the project; raises engine.ConflictError if the file changed."""
+        path = path or self.path
+        expected = self.digest if path == self.path else None
+        digest = engine.write(path, self.to_text(), expected)
+        if path == self.path:
+            self.digest = digest
+
+    @property
+    def root(self):
+        return self.objects[self.top['rootObject']]
+
+    @property
+    def index(self):
+        """Lookup tables over the project, built on first use."""
+        if self._index is None:
+            from pbxtool.index import ProjectIndex
+            self._index = ProjectIndex(self)
+        return self._index
+
+    @property
+    def dirty(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def get(self, id):
+        return self.objects.get(id)
+
+    def by_isa(self, *isas):
+        return [obj for obj in self.objects.values() if obj.isa in isas]
+
+    def new_id(self, seed):
+        """Return an unused 24-character ID derived deterministically from seed."""
+        salt = 0
+        while True:
+            digest = hashlib.md5(f'{seed}#{salt}'.encode()).hexdigest()
+            id = digest[:24].upper()
+            if id not in self.objects and id not in self.removed:
+                return id
+            salt += 1
+
+    # -- mutation -----------------------------------------------------------
+
+    def add(self, fields, seed, comment=None):
+        """Create an object from fields and return it."""
+        obj = PBXObject(self.new_id(seed), fields)
+        self._journal(obj.id)
+        self.objects[obj.id] = obj
+        self.added.add(obj.id)
+        if comment is not None:
+            self.set_comment(obj.id, comment)
+        return obj
+
+    def modify(self, id):
+        """Return object id, marking it as changed; mutate the result in place."""
+        self._journal(id)
+        obj = self.objects[id]
+        if id not in self.added:
+            self.modified.add(id)
+        return obj
+
+    def remove(self, id):
+        self._journal(id)
+        obj = self.objects.pop(id)
+        if id in self.added:
+            self.added.discard(id)
+        else:
+            self.modified.discard(id)
+            self.removed.add(id)
+        return obj
+
+    def set_comment(self, id, comment):
+        """Change the comment written after id; callers must modify() referrers."""
+        if self._savepoints:
+            self._savepoints[-1].comments.setdefault(id, self.comments.get(id))
+        self.comments[id] = comment
+
+    # -- savepoints ---------------------------------------------------------
+
+    def _journal(self, id):
+        """Copy object id into the innermost savepoint before its first change."""
+        if not self._savepoints:
+            return
+        journal = self._savepoints[-1].objects
+        if id not in journal:
+            obj = self.objects.get(id)
+            journal[id] = (copy.deepcopy(obj.fields) if obj is not None else None,
+                           id in self.added, id in self.modified, id in self.removed)
+
+    def _journal_index(self, table, key):
+        """Record an index entry before ProjectIndex changes it."""
+        if not self._savepoints:
+            return
+        old = table.get(key, MISSING)
+        if isinstance(old, set):
+            old = set(old)
+        self._savepoints[-1].index.append((table, key, old))
+
+    def savepoint(self):
+        """Start a (possibly nested) savepoint; end it with release() or rollback()."""
+        savepoint = Savepoint(index_built=self._index is not None)
+        self._savepoints.append(savepoint)
+        return savepoint
+
+    def release(self, savepoint):
+        """Keep the changes made since savepoint (and any savepoints inside it)."""
+        self._check_active(savepoint)
+        while True:
+            inner = self._savepoints.pop()
+            if self._savepoints:
+                # The enclosing savepoint keeps its own, older copies
+                outer = self._savepoints[-1]
+                for id, state in inner.objects.items():
+                    outer.objects.setdefault(id, state)
+                for id, comment in inner.comments.items():
+                    outer.comments.setdefault(id, comment)
+                outer.index.extend(inner.index)
+            if inner is savepoint:
+                return
+
+    def rollback(self, savepoint):
+        """Undo every change made since savepoint, including nested savepoints."""
+        self._check_active(savepoint)
+        while True:
+            inner = self._savepoints.pop()
+            for id, (fields, added, modified, removed) in inner.objects.items():
+                if fields is None:
+                    self.objects.pop(id, None)
+                elif id in self.objects:
+                    # Keep object identity for callers holding a reference
+                    self.objects[id].fields = fields
+                else:
+                    self.objects[id] = PBXObject(id, fields)
+                for flag, ids in ((added, self.added), (modified, self.modified),
+                                  (removed, self.removed)):
+                    if flag:
+                        ids.add(id)
+                    else:
+                        ids.discard(id)
+            for id, comment in inner.comments.items():
+                if comment is None:
+                    self.comments.pop(id, None)
+                else:
+                    self.comments[id] = comment
+            if not inner.index_built:
+                # Built from the edited objects; rebuild it on demand
+                self._index = None
+            elif self._index is not None:
+                for table, key, old in reversed(inner.index):
+                    if old is MISSING:
+                        table.pop(key, None)
+                    else:
+                        table[key] = old
+            if inner is savepoint:
+                return
+
+    def _check_active(self, savepoint):
+        if not any(active is savepoint for active in self._savepoints):
+            raise ValueError('savepoint is not active')
+
+    @contextlib.contextmanager
+    def atomic(self):
+        """Apply the edits made in the block all together or, on error, not at all."""
+        savepoint = self.savepoint()
+        try:
+            yield savepoint
+        except BaseException:
+            self.rollback(savepoint)
+            raise
+        self.release(savepoint)
+
+    # -- writing ------------------------------------------------------------
+
+    def format_string(self, value, key=None):
+        text = quote(value)
+        if key not in UNCOMMENTED_KEYS and value in self.objects:
+            comment = self.comments.get(value)
+            if comment is not None:
+                text += f' /* {comment} */'
+        return text
+
+    def format_value(self, value, indent, single_line, key=None):
+        if isinstance(value, str):
+            return self.format_string(value, key)
+        if isinstance(value, list):
+            if single_line:
+                return '(' + ''.join(self.format_value(v, indent, True) + ', ' for v in value) + ')'
+            inner = '\t' * (indent + 1)
+            items = ''.join(f'{inner}{self.format_value(v, indent + 1, False)},\n' for v in value)
+            return '(\n' + items + '\t' * indent + ')'
+        return self.format_dict(value, indent, single_line)
+
+    def format_dict(self, fields, indent, single_line, keyed=False):
+        if single_line:
+            parts = ''.join(f'{quote(k)} = {self.format_value(v, indent, True, k)}; '
+                            for k, v in fields.items())
+            return '{' + parts + '}'
+        inner = '\t' * (indent + 1)
+        lines = ''.join(f'{inner}{quote(k)} = {self.format_value(v, indent + 1, False, k)};\n'
+                        for k, v in fields.items())
+        return '{\n' + lines + '\t' * indent + '}'
+
+    def format_object(self, obj):
+        """Serialize one object the way Xcode does, including the newline."""
+        head = '\t\t' + self.format_string(obj.id)
+        single = obj.isa in SINGLE_LINE_ISAS
+        return f'{head} = {self.format_dict(obj.fields, 2, single)};\n'
+
+    def _insertions(self):
+        """Map text offsets to the new objects inserted there."""
+        by_isa = {}
+        for id in self.added:
+            by_isa.setdefault(self.objects[id].isa, []).append(id)
+        inserts = {}
+        new_sections = []
+        for isa, ids in by_isa.items():
+            ids.sort()
+            span = self.sections.get(isa)
+            if not span or span[1] is None:
+                new_sections.append((isa, ids))
+                continue
+            existing = sorted((id, self.spans[id][0]) for id in self.objects
+                              if id in self.spans and self.objects[id].isa == isa)
+            positions = [start for _, start in existing]
+            keys = [id for id, _ in existing]
+            for id in ids:
+                i = bisect.bisect_left(keys, id)
+                offset = positions[i] if i < len(positions) and positions[i] >= span[0] else span[1]
+                inserts.setdefault(offset, []).append(self.format_object(self.objects[id]))
+        for isa, ids in sorted(new_sections):
+            block = f'\n/* Begin {isa} section */\n'
+            block += ''.join(self.format_object(self.objects[id]) for id in ids)
+            block += f'/* End {isa} section */\n'
+            following = sorted((name, span[0]) for name, span in self.sections.items()
+                               if name > isa and span[0] is not None)
+            if following:
+                # Insert before the blank line that precedes the next section
+                offset = self.text.rfind('\n', 0, following[0][1] - 1) + 1
+                inserts.setdefault(offset, []).append(block.lstrip('\n') + '\n')
+            else:
+                inserts.setdefault(self.objects_end, []).append(block)
+        return inserts
+
+    def to_text(self):
+        """Return the project text with every pending change applied."""
+        if not self.dirty:
+            return self.text
+        replacements = []
+        for id in self.modified:
+            start, end = self.spans[id]
+            replacements.append((start, end, self.format_object(self.objects[id])))
+        for id in self.removed:
+            start, end = self.spans[id]
+            replacements.append((start, end, ''))
+        for offset, chunks in self._insertions().items():
+            replacements.append((offset, offset, ''.join(chunks)))
+        replacements.sort(key=lambda r: (r[0], r[1]))
+        out = []
+        pos = 0
+        for start, end, chunk in replacements:
+            out.append(self.text[pos:start])
+            out.append(chunk)
+            pos = max(pos, end)
+        out.append(self.text[pos:])
+        return ''.join(out)
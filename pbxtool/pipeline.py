@@ -0,0 +1,524 @@
+"""
+Constant-memory rewrites of project.pbxproj.
+
+Project parses the whole file and the scripts' re.sub() calls each copy
+it, which is fine for a handful of edits but not for bulk rewrites that
+touch most objects.  A Pipeline instead streams the memory-mapped file
+once as a sequence of Chunks (one per object, section marker or run of
+other text), passes them through composed generator stages and writes
+the result to a temporary file that then replaces the project.  Only the
+chunk being processed is ever decoded, so peak memory does not depend on
+the size of the project.
+
+    Pipeline(
+        RewriteObjects(rename, contains=b'ProfileSelection'),
+        FilterObjects(lambda chunk: chunk.id not in stale),
+        RewriteChildren(lambda chunk, children: [c for c in children if c not in stale]),
+        InsertIntoSection('PBXFileReference', [(id, fields, comment)]),
+    ).run(PROJECT_FILE, tracer=tracer)
+
+Stages see chunks in file order, so a stage that depends on an earlier
+decision (references to an object that was filtered out) only works for
+objects in later sections; Xcode writes sections in isa order.  A stage
+that needs to know about later objects first looks at the whole buffer
+in prepare(), before anything is streamed.
+
+    python3 -m pbxtool rewrite --rename ProfileSelection ProfileChooser
+    python3 -m pbxtool rewrite --remove 71E188DE922CC2570ABB382F --dry-run
+"""
+
+import re
+
+from pbxtool import PROJECT_FILE, cache, engine
+from pbxtool.index import GROUP_ISAS
+from pbxtool.pbxproj import PBXObject, Parser, Project, unquote
+from pbxtool.tokenizer import (CLOSE_BRACE, CLOSE_PAREN, OPEN_BRACE, OPEN_PAREN,
+                               SEMICOLON, TOKEN_RE, mapped)
+
+TEXT = 'text'
+OBJECT = 'object'
+SECTION_BEGIN = 'section-begin'
+SECTION_END = 'section-end'
+# The closing brace of the objects dictionary and everything after it
+OBJECTS_END = 'objects-end'
+
+SECTION_RE = re.compile(rb'/\* (Begin|End) (\w+) section \*/\n')
+# Xcode always writes isa first, so the first match is the object's own
+ISA_RE = re.compile(rb'isa\s*=\s*"?(\w+)"?\s*;')
+
+
+class Formatter:
+    """Project's writer for a single object, knowing only its comments.
+
+    The comments of the IDs an object references are the ones written in
+    the object itself, so they are all a re-serialized object needs.
+    """
+
+    format_string = Project.format_string
+    format_value = Project.format_value
+    format_dict = Project.format_dict
+    format_object = Project.format_object
+
+    def __init__(self, comments):
+        self.comments = comments
+        # format_string() only comments values that are object IDs
+        self.objects = comments
+
+
+class Chunk:
+    """A piece of the file: an object, a section marker or other text."""
+
+    __slots__ = ('kind', 'raw', 'id', 'isa', 'updated', '_object', '_comments')
+
+    def __init__(self, kind, raw, id=None, isa=None):
+        self.kind = kind
+        self.raw = raw
+        self.id = id
+        self.isa = isa
+        self.updated = False
+        self._object = None
+        self._comments = None
+
+    @classmethod
+    def new(cls, id, fields, comment=None, comments=None):
+        """An object chunk for fields; comments holds those of referenced IDs."""
+        chunk = cls(OBJECT, b'', id, fields.get('isa'))
+        chunk._object = PBXObject(id, fields)
+        chunk._comments = dict(comments or {})
+        if comment is not None:
+            chunk._comments[id] = comment
+        chunk.update()
+        return chunk
+
+    def __repr__(self):
+        return f'<{self.kind} {self.id or self.isa or self.raw[:20]!r}>'
+
+    def _parse(self):
+        parser = Parser(self.raw.decode('utf-8'))
+        parser.next()
+        comment = parser.trailing_comment()
+        parser.expect('=')
+        fields = parser.value()
+        self._comments = parser.comments
+        if comment is not None:
+            self._comments[self.id] = comment
+        self._object = PBXObject(self.id, fields)
+
+    @property
+    def object(self):
+        """The parsed PBXObject; parsed on first use."""
+        if self._object is None:
+            self._parse()
+        return self._object
+
+    @property
+    def comments(self):
+        """ID -> comment for this object and every ID it references."""
+        if self._comments is None:
+            self._parse()
+        return self._comments
+
+    @property
+    def comment(self):
+        return self.comments.get(self.id)
+
+    def describe(self):
+        comment = self.comment
+        return f'{self.isa} {self.id}' + (f' ({comment})' if comment else '')
+
+    def update(self):
+        """Re-serialize after changing .object or .comments in place."""
+        self.raw = Formatter(self.comments).format_object(self.object).encode('utf-8')
+        self.updated = True
+
+
+def line_start(buf, offset):
+    return buf.rfind(b'\n', 0, offset) + 1
+
+
+def line_end(buf, offset):
+    end = buf.find(b'\n', offset)
+    return len(buf) if end == -1 else end + 1
+
+
+def between(buf, start, stop):
+    """Chunks for the text between two objects, one per section marker."""
+    pos = start
+    while pos < stop:
+        end = min(line_end(buf, pos), stop)
+        m = SECTION_RE.fullmatch(buf, pos, end)
+        if m:
+            kind = SECTION_BEGIN if m.group(1) == b'Begin' else SECTION_END
+            yield Chunk(kind, buf[pos:end], isa=m.group(2).decode())
+        else:
+            yield Chunk(TEXT, buf[pos:end])
+        pos = end
+
+
+def chunks(buf):
+    """Split a project buffer into Chunks; joining their raw bytes gives buf back."""
+    depth = 0
+    key = None
+    in_objects = False
+    object_start = object_id = None
+    pos = 0
+    for m in TOKEN_RE.finditer(buf):
+        kind = m.lastgroup
+        if kind is None:
+            continue
+        start, end = m.span()
+        if kind != 'punct':
+            if depth == 1:
+                key = buf[start:end]
+            elif in_objects and depth == 2 and object_start is None:
+                object_start = line_start(buf, start)
+                object_id = unquote(buf[start:end].decode('utf-8'))
+            continue
+        c = buf[start]
+        if c == OPEN_BRACE or c == OPEN_PAREN:
+            depth += 1
+            if depth == 2 and c == OPEN_BRACE and key == b'objects':
+                in_objects = True
+                head = line_end(buf, end)
+                yield Chunk(TEXT, buf[pos:head])
+                pos = head
+        elif c == CLOSE_BRACE or c == CLOSE_PAREN:
+            depth -= 1
+            if in_objects and depth == 1:
+                in_objects = False
+                tail = line_start(buf, start)
+                yield from between(buf, pos, tail)
+                yield Chunk(OBJECTS_END, buf[tail:])
+                pos = len(buf)
+        elif c == SEMICOLON and in_objects and depth == 2 and object_start is not None:
+            stop = line_end(buf, end)
+            yield from between(buf, pos, object_start)
+            raw = buf[object_start:stop]
+            isa = ISA_RE.search(raw)
+            yield Chunk(OBJECT, raw, object_id, isa.group(1).decode() if isa else None)
+            pos = stop
+            object_start = None
+    if pos < len(buf):
+        yield Chunk(TEXT, buf[pos:])
+
+
+# -- stages -----------------------------------------------------------------
+
+class Stage:
+    """A generator over chunks; subclasses implement process()."""
+
+    def __init__(self):
+        self.changes = []
+
+    def __call__(self, chunks):
+        return self.process(chunks)
+
+    def prepare(self, buf):
+        """Look at the whole buffer before the stream starts; most stages don't."""
+
+    def process(self, chunks):
+        raise NotImplementedError
+
+
+class FilterObjects(Stage):
+    """Drop the objects keep(chunk) rejects, and sections left empty."""
+
+    def __init__(self, keep):
+        super().__init__()
+        self.keep = keep
+
+    def process(self, chunks):
+        # A section's blank line and Begin marker wait for its first object
+        held = []
+        for chunk in chunks:
+            if chunk.kind == OBJECT and not self.keep(chunk):
+                self.changes.append(f'removed {chunk.describe()}')
+                continue
+            if chunk.kind == TEXT and chunk.raw == b'\n' and not held:
+                held.append(chunk)
+                continue
+            if chunk.kind == SECTION_BEGIN:
+                held.append(chunk)
+                continue
+            if chunk.kind == SECTION_END and held and held[-1].kind == SECTION_BEGIN:
+                held = []
+                continue
+            yield from held
+            held = []
+            yield chunk
+        yield from held
+
+
+class RemoveObjects(FilterObjects):
+    """Drop the objects in removed, everything inside removed groups and the
+    build files of removed references, adding them all to removed.
+
+    Groups come after the build files and file references in the file, so
+    prepare() expands removed groups into their contents, recursively,
+    before the stream starts.  Only group objects are parsed for that.
+    """
+
+    def __init__(self, removed):
+        super().__init__(self.keep)
+        self.removed = removed
+
+    def prepare(self, buf):
+        children = {}
+        for chunk in chunks(buf):
+            if chunk.kind == OBJECT and chunk.isa in GROUP_ISAS:
+                children[chunk.id] = chunk.object.get('children', [])
+        pending = [id for id in self.removed if id in children]
+        while pending:
+            for child in children.get(pending.pop(), ()):
+                if child not in self.removed:
+                    self.removed.add(child)
+                    pending.append(child)
+
+    def keep(self, chunk):
+        if chunk.id in self.removed:
+            return False
+        if chunk.isa == 'PBXBuildFile' and chunk.object.get('fileRef') in self.removed:
+            self.removed.add(chunk.id)
+            return False
+        return True
+
+
+class RewriteObjects(Stage):
+    """Let rewrite(chunk) edit objects in place; it returns its changes.
+
+    rewrite mutates chunk.object.fields or chunk.comments and calls
+    chunk.update().  Only objects of isas whose raw text contains the
+    contains bytes are parsed at all.
+    """
+
+    def __init__(self, rewrite, isas=None, contains=None):
+        super().__init__()
+        self.rewrite = rewrite
+        self.isas = set(isas) if isas else None
+        self.contains = contains
+        self.rewritten = 0
+
+    def wanted(self, chunk):
+        return (chunk.kind == OBJECT
+                and (self.isas is None or chunk.isa in self.isas)
+                and (self.contains is None or self.contains in chunk.raw))
+
+    def process(self, chunks):
+        for chunk in chunks:
+            if self.wanted(chunk):
+                chunk.updated = False
+                self.changes += self.rewrite(chunk)
+                self.rewritten += chunk.updated
+            yield chunk
+
+
+class RewriteChildren(RewriteObjects):
+    """Replace ID lists: rewrite(chunk, ids) returns a new list or None.
+
+    keys names the list fields to offer (children of groups by default);
+    keys=None offers every list of the object, including nested ones.
+    """
+
+    def __init__(self, rewrite, keys=('children',), isas=None, contains=None):
+        super().__init__(self.rewrite_lists, isas, contains)
+        self.rewrite_list = rewrite
+        self.keys = keys
+
+    def rewrite_lists(self, chunk):
+        changed = []
+        self.visit(chunk, chunk.object.fields, changed)
+        if changed:
+            chunk.update()
+        return [f'rewrote {", ".join(changed)} of {chunk.describe()}'] if changed else []
+
+    def visit(self, chunk, fields, changed):
+        for key, value in fields.items():
+            if isinstance(value, dict):
+                self.visit(chunk, value, changed)
+            elif isinstance(value, list) and (self.keys is None or key in self.keys):
+                result = self.rewrite_list(chunk, value)
+                if result is not None and result != value:
+                    fields[key] = list(result)
+                    changed.append(key)
+
+
+class InsertIntoSection(Stage):
+    """Insert new objects into the section for isa, in ID order.
+
+    objects are (id, fields, comment) tuples; comments gives the comments
+    of IDs they reference.  A missing section is created in isa order.
+    """
+
+    def __init__(self, isa, objects, comments=None):
+        super().__init__()
+        self.isa = isa
+        self.objects = sorted((Chunk.new(id, fields, comment, comments)
+                               for id, fields, comment in objects), key=lambda c: c.id)
+
+    def take(self, before=None):
+        while self.objects and (before is None or self.objects[0].id < before):
+            chunk = self.objects.pop(0)
+            self.changes.append(f'added {chunk.describe()}')
+            yield chunk
+
+    def section(self):
+        yield Chunk(SECTION_BEGIN, f'/* Begin {self.isa} section */\n'.encode(), isa=self.isa)
+        yield from self.take()
+        yield Chunk(SECTION_END, f'/* End {self.isa} section */\n'.encode(), isa=self.isa)
+
+    def process(self, chunks):
+        inside = False
+        for chunk in chunks:
+            if self.objects:
+                if chunk.kind == SECTION_BEGIN and chunk.isa == self.isa:
+                    inside = True
+                elif inside and chunk.kind == OBJECT:
+                    yield from self.take(chunk.id)
+                elif inside and chunk.kind == SECTION_END:
+                    yield from self.take()
+                elif chunk.kind == SECTION_BEGIN and chunk.isa > self.isa:
+                    # Before the next section's Begin marker; its blank
+                    # line has gone out already, so add one after ours
+                    yield from self.section()
+                    yield Chunk(TEXT, b'\n')
+                elif chunk.kind == OBJECTS_END:
+                    yield Chunk(TEXT, b'\n')
+                    yield from self.section()
+            yield chunk
+
+
+# -- pipeline ---------------------------------------------------------------
+
+class Pipeline:
+    """Stages composed over one streaming pass of the project."""
+
+    def __init__(self, *stages):
+        self.stages = list(stages)
+
+    def then(self, stage):
+        self.stages.append(stage)
+        return self
+
+    @property
+    def changes(self):
+        return [change for stage in self.stages for change in stage.changes]
+
+    def stream(self, buf):
+        stream = chunks(buf)
+        for stage in self.stages:
+            stream = stage(stream)
+        return stream
+
+    def run(self, path=PROJECT_FILE, output=None, tracer=None, dry_run=False):
+        """Rewrite path (or write the result to output); returns the changes.
+
+        Raises engine.ConflictError if path changes while it is streamed;
+        the pipeline can simply be run again on the new contents.
+        """
+        if tracer:
+            with tracer.step('pipeline', path=path, stages=len(self.stages)) as step:
+                self._run(path, output, dry_run, step)
+        else:
+            self._run(path, output, dry_run, None)
+        return self.changes
+
+    def _run(self, path, output, dry_run, step):
+        objects = 0
+
+        def raw(stream):
+            nonlocal objects
+            for chunk in stream:
+                objects += chunk.kind == OBJECT
+                yield chunk.raw
+
+        with mapped(path) as buf:
+            expected = cache.content_hash(buf)
+            for stage in self.stages:
+                stage.prepare(buf)
+            stream = raw(self.stream(buf))
+            if dry_run:
+                for _ in stream:
+                    pass
+            elif output is None:
+                engine.write_stream(path, stream, expected)
+            else:
+                engine.write_stream(output, stream)
+            if step:
+                step.bytes_scanned = len(buf)
+                step.objects = objects
+                step.matches = len(self.changes)
+
+
+# -- command line -----------------------------------------------------------
+
+def renamer(old, new):
+    """A RewriteObjects function replacing old with new in names, paths and comments."""
+    def rewrite(chunk):
+        changes = []
+        fields = chunk.object.fields
+        for key in ('name', 'path'):
+            value = fields.get(key)
+            if isinstance(value, str) and old in value:
+                fields[key] = value.replace(old, new)
+                changes.append(f'{chunk.describe()}: {key} {value} → {fields[key]}')
+        comments = chunk.comments
+        for id, comment in comments.items():
+            if old in comment:
+                comments[id] = comment.replace(old, new)
+                changes = changes or [None]
+        if changes:
+            chunk.update()
+        return [change for change in changes if change]
+    return rewrite
+
+
+def remover(ids):
+    """Stages removing ids (groups with everything in them), the build files
+    of removed references and every list entry."""
+    removed = set(ids)
+
+    def strip(chunk, values):
+        return [value for value in values if value not in removed]
+
+    return [RemoveObjects(removed), RewriteChildren(strip, keys=None)]
+
+
+def main(args, tracer):
+    pipeline = Pipeline()
+    for old, new in args.rename or ():
+        pipeline.then(RewriteObjects(renamer(old, new), contains=old.encode('utf-8')))
+    if args.remove:
+        for stage in remover(args.remove):
+            pipeline.then(stage)
+    if not pipeline.stages:
+        print('❌ Nothing to do: pass --rename and/or --remove')
+        return 1
+    try:
+        changes = pipeline.run(args.project, args.output, tracer, args.dry_run)
+    except engine.ConflictError as e:
+        print(f'❌ {e}; run the rewrite again')
+        return 1
+    for change in changes:
+        print(f'✓ {change}')
+    rewritten = sum(getattr(stage, 'rewritten', 0) for stage in pipeline.stages)
+    if not changes and not rewritten:
+        print('✓ Nothing matched; the project is unchanged')
+    elif args.dry_run:
+        print(f'\n{len(changes)} change(s), {rewritten} object(s) rewritten (dry run, nothing written)')
+    else:
+        print(f'\n✅ Rewrote {args.output or args.project}: {len(changes)} change(s), '
+              f'{rewritten} object(s) rewritten')
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('rewrite', help='streaming bulk rewrite of the project')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--rename', nargs=2, action='append', metavar=('OLD', 'NEW'),
+                        help='replace OLD with NEW in file and group names, paths and comments')
+    parser.add_argument('--remove', nargs='+', metavar='ID',
+                        help='remove objects (groups with their contents), their build files '
+                             'and every reference to them')
+    parser.add_argument('-o', '--output', help='write the result here instead of in place')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing')
+    parser.set_defaults(func=main)
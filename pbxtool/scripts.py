@@ -0,0 +1,32 @@
+"""
+Shared body of the add_* scripts in the project root.
+
+Each script lists the files it registers and their targets; add_files()
+turns the list into AddFile operations and commits them in one
+transaction.  Files that are already registered are reported unchanged,
+so re-running a script is a no-op that leaves project.pbxproj untouched.
+"""
+
+from pbxtool import PROJECT_FILE
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.operations import AddFile, OperationError
+
+
+def add_files(files, tracer, project_file=PROJECT_FILE):
+    """Register (path, targets) pairs; returns the changes, or None on error."""
+    transaction = Transaction(project_file, tracer)
+    transaction.queue(*(AddFile(path, targets) for path, targets in files))
+    try:
+        changes = transaction.commit()
+    except FileNotFoundError:
+        print(f"Error: Could not find {project_file}")
+        print("Make sure you run this script from the FocusPal project root directory")
+        return None
+    except (OperationError, ConflictError) as e:
+        print(f"❌ {e}")
+        return None
+    for change in changes:
+        print(f"✓ {change}")
+    for operation in transaction.unchanged:
+        print(f"= {operation.path} (unchanged)")
+    return changes
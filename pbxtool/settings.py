@@ -0,0 +1,346 @@
+"""
+Read and edit build settings across targets and configurations.
+
+Effective settings are resolved the way Xcode layers them, lowest first:
+
+    project.yml settings        (settings.base, then settings.configs)
+    project configuration       (the PBXProject's XCBuildConfiguration)
+    project.yml target settings (targets.<name>.settings)
+    target configuration        (the target's XCBuildConfiguration)
+
+$(inherited) in a value is replaced by the value from the layers below.
+Resolved views are cached per configuration, keyed by the hash of the
+configuration objects and project.yml sections they depend on, so a run
+after an edit only re-resolves the configurations that changed.
+
+    python3 -m pbxtool settings get SWIFT_VERSION PRODUCT_BUNDLE_IDENTIFIER
+    python3 -m pbxtool settings get --differing
+    python3 -m pbxtool settings set SWIFT_VERSION=5.9 -t FocusPal -t FocusPalTests
+    python3 -m pbxtool settings unset CODE_SIGN_IDENTITY -c Release
+"""
+
+import json
+import os
+
+from pbxtool import PROJECT_FILE, cache
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.operations import OperationError
+from pbxtool.pbxproj import Project
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+CACHE_NAME = 'settings'
+CACHE_VERSION = 1
+
+SPEC_FILE = 'project.yml'
+PROJECT_LEVEL = '(project)'
+INHERITED = '$(inherited)'
+
+
+def setting_text(value):
+    """Render a YAML scalar the way it would appear in project.pbxproj."""
+    if value is True:
+        return 'YES'
+    if value is False:
+        return 'NO'
+    if isinstance(value, list):
+        return [setting_text(v) for v in value]
+    return str(value)
+
+
+def load_spec(path=SPEC_FILE):
+    """Return project.yml as a dict, or {} if it is missing or PyYAML is not installed."""
+    if not os.path.exists(path):
+        return {}
+    if yaml is None:
+        print(f'⚠ PyYAML is not installed; ignoring {path} settings')
+        return {}
+    with open(path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def spec_layer(settings, configuration):
+    """Flatten an XcodeGen settings block for one configuration name."""
+    if not isinstance(settings, dict):
+        return {}
+    layer = {}
+    if 'base' in settings or 'configs' in settings:
+        layer.update(settings.get('base') or {})
+        for name, values in (settings.get('configs') or {}).items():
+            if name.lower() == configuration.lower():
+                layer.update(values or {})
+    else:
+        layer.update(settings)
+    return {k: setting_text(v) for k, v in layer.items()}
+
+
+def inherit(value, parent):
+    """Expand $(inherited) in value using the parent layer's value."""
+    if isinstance(value, list):
+        if INHERITED not in value:
+            return value
+        parent_items = parent if isinstance(parent, list) else (parent.split() if parent else [])
+        result = []
+        for item in value:
+            result.extend(parent_items if item == INHERITED else [item])
+        return result
+    if INHERITED in value:
+        parent_text = ' '.join(parent) if isinstance(parent, list) else (parent or '')
+        return value.replace(INHERITED, parent_text).strip()
+    return value
+
+
+def resolve(layers):
+    """Merge (origin, settings) layers into {key: [value, origin]}."""
+    result = {}
+    for origin, settings in layers:
+        for key, value in settings.items():
+            below = result.get(key)
+            result[key] = [inherit(value, below[0] if below else None), origin]
+    return result
+
+
+def configuration_lists(project):
+    """Yield (target name, configuration list id) with the project first."""
+    root = project.root
+    if 'buildConfigurationList' in root.fields:
+        yield PROJECT_LEVEL, root['buildConfigurationList']
+    for name, target_id in sorted(project.index.targets.items()):
+        list_id = project.objects[target_id].get('buildConfigurationList')
+        if list_id:
+            yield name, list_id
+
+
+def configurations(project, targets=None, names=None, project_level=False):
+    """Return [(target, configuration name, config id)] matching the filters.
+
+    targets and names are lists of target and configuration names; None
+    means all.  The project-level configurations are only included when
+    project_level is set or (project) is named in targets.
+    """
+    wanted = set(targets or ())
+    if wanted:
+        known = {name for name, _ in configuration_lists(project)}
+        missing = wanted - known
+        if missing:
+            raise OperationError(f"no target named {', '.join(sorted(missing))}")
+    result = []
+    for target, list_id in configuration_lists(project):
+        if target == PROJECT_LEVEL:
+            if not (project_level or PROJECT_LEVEL in wanted):
+                continue
+        elif project_level and not wanted:
+            continue
+        elif wanted and target not in wanted:
+            continue
+        for config_id in project.objects[list_id].get('buildConfigurations', ()):
+            name = project.objects[config_id].get('name')
+            if names and name not in names:
+                continue
+            result.append((target, name, config_id))
+    return result
+
+
+class SettingsView:
+    """Effective build settings for every target and configuration."""
+
+    def __init__(self, project, spec=None, tracer=None):
+        self.project = project
+        self.spec = load_spec() if spec is None else spec
+        self.tracer = tracer
+        self.rows = []
+        self._build()
+
+    def _object_hash(self, id):
+        span = self.project.spans.get(id)
+        if span is None or id in self.project.modified:
+            text = json.dumps(self.project.objects[id].fields, sort_keys=True)
+        else:
+            text = self.project.text[span[0]:span[1]]
+        return cache.content_hash(text.encode('utf-8'))
+
+    def _layers(self, target, name, config_id, project_configs):
+        layers = [('project.yml', spec_layer(self.spec.get('settings'), name))]
+        project_config = project_configs.get(name)
+        if project_config and project_config != config_id:
+            layers.append(('project', self.project.objects[project_config].get('buildSettings', {})))
+        if target != PROJECT_LEVEL:
+            target_spec = (self.spec.get('targets') or {}).get(target) or {}
+            layers.append((f'project.yml:{target}', spec_layer(target_spec.get('settings'), name)))
+        layers.append(('project' if target == PROJECT_LEVEL else target,
+                       self.project.objects[config_id].get('buildSettings', {})))
+        return layers
+
+    def _build(self):
+        project = self.project
+        cached = cache.load(CACHE_NAME, CACHE_VERSION)
+        views = cached.get('views', {})
+        project_configs = {name: id for target, name, id in configurations(project, project_level=True)
+                           if target == PROJECT_LEVEL}
+        hashes = {}
+        fresh = {}
+        resolved = 0
+        for target, name, config_id in configurations(project, [t for t, _ in configuration_lists(project)]):
+            target_spec = (self.spec.get('targets') or {}).get(target) or {}
+            sections = [self.spec.get('settings'), target_spec.get('settings')]
+            deps = [cache.content_hash(json.dumps(sections, sort_keys=True, default=str).encode())]
+            for id in (project_configs.get(name), config_id):
+                if id is not None:
+                    if id not in hashes:
+                        hashes[id] = self._object_hash(id)
+                    deps.append(hashes[id])
+            entry = views.get(config_id)
+            if entry is None or entry['deps'] != deps:
+                entry = {'deps': deps,
+                         'settings': resolve(self._layers(target, name, config_id, project_configs))}
+                resolved += 1
+            fresh[config_id] = entry
+            self.rows.append({'target': target, 'configuration': name, 'id': config_id,
+                              'settings': entry['settings']})
+        if resolved or len(fresh) != len(views):
+            cache.save(CACHE_NAME, CACHE_VERSION, {'views': fresh})
+        self.resolved = resolved
+
+    def select(self, targets=None, names=None):
+        return [row for row in self.rows
+                if (not targets or row['target'] in targets)
+                and (not names or row['configuration'] in names)]
+
+    def get(self, keys=None, targets=None, names=None):
+        """Return {key: [(target, configuration, value, origin)]}."""
+        rows = self.select(targets, names)
+        if not keys:
+            keys = sorted({key for row in rows for key in row['settings']})
+        result = {}
+        for key in keys:
+            result[key] = []
+            for row in rows:
+                value, origin = row['settings'].get(key, [None, None])
+                result[key].append((row['target'], row['configuration'], value, origin))
+        return result
+
+
+class SetBuildSettings:
+    """Set (or, with value None, remove) build settings in a batch."""
+
+    def __init__(self, values, targets=None, configurations=None, project_level=False):
+        self.values = dict(values)
+        self.targets = list(targets or ())
+        self.configurations = list(configurations or ())
+        self.project_level = project_level
+
+    def __repr__(self):
+        return f'SetBuildSettings({self.values!r}, targets={self.targets!r})'
+
+    def apply(self, project):
+        changes = []
+        for target, name, config_id in configurations(project, self.targets, self.configurations,
+                                                      self.project_level):
+            settings = project.objects[config_id].get('buildSettings', {})
+            edits = {k: v for k, v in self.values.items() if settings.get(k) != v
+                     and not (v is None and k not in settings)}
+            if not edits:
+                continue
+            config = project.modify(config_id)
+            settings = dict(config.fields.get('buildSettings', {}))
+            for key, value in edits.items():
+                if value is None:
+                    del settings[key]
+                    changes.append(f'removed {key} from {target} {name}')
+                else:
+                    settings[key] = value
+                    changes.append(f'set {key} = {format_value(value)} in {target} {name}')
+            config.fields['buildSettings'] = dict(sorted(settings.items()))
+        return changes
+
+
+def format_value(value):
+    if value is None:
+        return '-'
+    if isinstance(value, list):
+        return '(' + ', '.join(value) + ')'
+    return value
+
+
+def parse_assignment(text):
+    key, sep, value = text.partition('=')
+    if not sep or not key:
+        raise SystemExit(f'expected KEY=VALUE, got {text!r}')
+    value = value.strip()
+    if value.startswith('['):
+        value = [setting_text(v) for v in json.loads(value)]
+    return key.strip(), value
+
+
+def print_settings(result, differing):
+    for key, rows in result.items():
+        values = {json.dumps(value) for _, _, value, _ in rows}
+        if differing and len(values) < 2:
+            continue
+        print(key)
+        for target, name, value, origin in rows:
+            source = f'  [{origin}]' if origin else ''
+            print(f'    {target:<28}{name:<10}{format_value(value)}{source}')
+
+
+def main(args, tracer):
+    with tracer.step('settings: parse', path=args.project):
+        project = Project.load(args.project)
+    if args.action == 'get':
+        with tracer.step('settings: resolve') as step:
+            view = SettingsView(project, tracer=tracer)
+            step.objects = view.resolved
+        targets = args.target
+        if targets and args.project_level:
+            targets = targets + [PROJECT_LEVEL]
+        elif args.project_level:
+            targets = [PROJECT_LEVEL]
+        result = view.get(args.keys, targets, args.configuration)
+        if args.json:
+            print(json.dumps({key: [dict(zip(('target', 'configuration', 'value', 'origin'), row))
+                                    for row in rows] for key, rows in result.items()}, indent=2))
+        else:
+            print_settings(result, args.differing)
+        return 0
+    if args.action == 'set':
+        values = dict(parse_assignment(text) for text in args.keys)
+    else:
+        values = {key: None for key in args.keys}
+    if not values:
+        print('Nothing to change')
+        return 1
+    transaction = Transaction(args.project, tracer).queue(
+        SetBuildSettings(values, args.target, args.configuration, args.project_level))
+    try:
+        changes = transaction.commit(project)
+    except (OperationError, ConflictError) as e:
+        print(f'❌ {e}')
+        return 1
+    for change in changes:
+        print(f'✓ {change}')
+    if changes:
+        print(f'\n✅ Updated {args.project}')
+    else:
+        print('✓ Build settings already up to date')
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('settings', help='read and edit build settings in bulk')
+    parser.add_argument('action', choices=('get', 'set', 'unset'))
+    parser.add_argument('keys', nargs='*', help='KEY for get/unset, KEY=VALUE for set '
+                        '(a JSON list such as ["$(inherited)", "x"] sets a list)')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('-t', '--target', action='append',
+                        help='limit to a target (repeatable; default: all targets)')
+    parser.add_argument('-c', '--configuration', action='append',
+                        help='limit to a configuration such as Debug (repeatable)')
+    parser.add_argument('--project-level', action='store_true',
+                        help='use the project-level configurations')
+    parser.add_argument('--differing', action='store_true',
+                        help='get: only show settings whose value differs between rows')
+    parser.add_argument('--json', action='store_true', help='get: print JSON')
+    parser.set_defaults(func=main)
@@ -0,0 +1,235 @@
+"""
+Split a test bundle into balanced -only-testing: shards.
+
+The files come from the test target's Sources build phase (and any file
+system synchronized folders it uses).  Each file is scanned for
+XCTestCase subclasses and their test methods, reusing the classify scan
+cache.  A method weighs its recorded duration when the history file has
+one; otherwise it weighs its line count, converted to seconds at the
+average rate of the methods that do have durations.  Classes heavier
+than a fair share are split into per-method entries, and entries are
+handed out heaviest first to the lightest shard.
+
+Nothing here needs Xcode, so plans can be made and checked on Linux:
+
+    python3 -m pbxtool shards plan -n 4
+    xcodebuild test ... $(python3 -m pbxtool shards plan -n 4 --shard 2)
+    python3 -m pbxtool shards record xcodebuild.log
+"""
+
+import heapq
+import json
+import os
+import re
+import sys
+import tempfile
+
+from pbxtool import PROJECT_FILE, cache
+from pbxtool.classify import TEST_BASES, find_sources, inheritance, is_subclass, scan_all
+from pbxtool.operations import OperationError
+from pbxtool.pbxproj import Project
+
+DEFAULT_TARGET = 'FocusPalTests'
+HISTORY_FILE = os.path.join(cache.CACHE_DIR, 'test-durations.json')
+
+# Weight of the newest measurement when folding it into the history
+SMOOTHING = 0.5
+
+# Matches both the XCTest and the newer Xcode log formats:
+#   Test Case '-[FocusPalTests.PINServiceTests testHash]' passed (0.012 seconds).
+#   Test case 'PINServiceTests.testHash()' passed on 'iPhone 16' (0.012 seconds)
+RESULT_RE = re.compile(r"Test [Cc]ase '(?:-\[)?(?:\w+\.)?(\w+)[ .](\w+)(?:\(\))?\]?' "
+                       r"(?:passed|failed|skipped)[^(\n]*\((\d+(?:\.\d+)?) seconds\)")
+
+
+def test_sources(project, target_name):
+    """Swift files compiled into target_name."""
+    index = project.index
+    target_id = index.target(target_name)
+    if target_id is None:
+        raise OperationError(f'no target named {target_name}')
+    paths = []
+    phase_id = index.phase(target_id, 'PBXSourcesBuildPhase')
+    for build_id in project.objects[phase_id].get('files', ()) if phase_id else ():
+        ref_id = project.objects[build_id].get('fileRef') if build_id in project.objects else None
+        path = index.path(ref_id) if ref_id in project.objects else None
+        if path and path.endswith('.swift'):
+            if os.path.exists(path):
+                paths.append(path)
+            else:
+                print(f'⚠ {path} is in {target_name} but missing on disk', file=sys.stderr)
+    folders = [index.path(group_id) for group_id in
+               project.objects[target_id].get('fileSystemSynchronizedGroups', ())]
+    paths += find_sources([folder for folder in folders if folder])
+    return sorted(set(paths))
+
+
+def discover(results):
+    """Return [{class, file, methods: [{name, lines}]}] for test classes in results."""
+    parents = inheritance(results)
+    classes = {}
+    for path in sorted(results):
+        result = results[path]
+        decls = sorted(result['types'], key=lambda d: d['line'])
+        boundaries = sorted({d['line'] for d in decls} | {t['line'] for t in result['tests']})
+        for test in result['tests']:
+            # The innermost declaration whose body holds the method
+            owner = None
+            for decl in decls:
+                if decl['line'] > test['line']:
+                    break
+                if test['line'] <= decl['end']:
+                    owner = decl
+            if owner is None or not is_subclass(owner['name'], TEST_BASES, parents):
+                continue
+            later = [line for line in boundaries if line > test['line']]
+            end = min(later[0] if later else result['lines'] + 1, owner['end'])
+            entry = classes.setdefault(owner['name'], {'class': owner['name'], 'file': path, 'methods': []})
+            entry['methods'].append({'name': test['name'], 'lines': end - test['line']})
+    return [classes[name] for name in sorted(classes)]
+
+
+def load_history(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_history(path, history):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(history, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def weigh(classes, history):
+    """Set a weight on every method; returns the unit ('seconds' or 'lines')."""
+    known = [(history[f"{c['class']}/{m['name']}"], m['lines'])
+             for c in classes for m in c['methods'] if f"{c['class']}/{m['name']}" in history]
+    if not known:
+        for c in classes:
+            for m in c['methods']:
+                m['weight'] = m['lines']
+                m['measured'] = False
+        return 'lines'
+    rate = sum(s for s, _ in known) / max(sum(lines for _, lines in known), 1)
+    for c in classes:
+        for m in c['methods']:
+            key = f"{c['class']}/{m['name']}"
+            m['measured'] = key in history
+            m['weight'] = history[key] if key in history else m['lines'] * rate
+    return 'seconds'
+
+
+def plan(classes, count, target_name):
+    """Distribute test classes (or, for heavy classes, methods) over count shards."""
+    total = sum(m['weight'] for c in classes for m in c['methods'])
+    fair = total / count if count else total
+    units = []
+    for c in classes:
+        weight = sum(m['weight'] for m in c['methods'])
+        if weight > fair and len(c['methods']) > 1:
+            for m in c['methods']:
+                units.append((m['weight'], f"{target_name}/{c['class']}/{m['name']}", 1))
+        else:
+            units.append((weight, f"{target_name}/{c['class']}", len(c['methods'])))
+    units.sort(key=lambda u: (-u[0], u[1]))
+    shards = [{'weight': 0, 'tests': 0, 'only_testing': []} for _ in range(count)]
+    heap = [(0, i) for i in range(count)]
+    for weight, name, tests in units:
+        load, i = heapq.heappop(heap)
+        shard = shards[i]
+        shard['weight'] += weight
+        shard['tests'] += tests
+        shard['only_testing'].append(name)
+        heapq.heappush(heap, (shard['weight'], i))
+    for shard in shards:
+        shard['only_testing'].sort()
+    return shards
+
+
+def arguments(shard):
+    return ' '.join(f'-only-testing:{name}' for name in shard['only_testing'])
+
+
+def record(logs, history, smoothing=SMOOTHING):
+    """Fold test durations from xcodebuild logs into history; returns the count."""
+    count = 0
+    for log in logs:
+        if log == '-':
+            text = sys.stdin.read()
+        else:
+            with open(log, 'r', errors='replace') as f:
+                text = f.read()
+        for cls, method, seconds in RESULT_RE.findall(text):
+            key = f'{cls}/{method}'
+            seconds = float(seconds)
+            previous = history.get(key)
+            history[key] = round(seconds if previous is None else
+                                 previous + smoothing * (seconds - previous), 4)
+            count += 1
+    return count
+
+
+def print_plan(shards, unit):
+    for number, shard in enumerate(shards, 1):
+        weight = f"{shard['weight']:.1f} s" if unit == 'seconds' else f"{shard['weight']:.0f} lines"
+        print(f"shard {number}: {weight}, {shard['tests']} tests")
+        for name in shard['only_testing']:
+            print(f'    -only-testing:{name}')
+
+
+def main(args, tracer):
+    history_path = args.history or HISTORY_FILE
+    if args.action == 'record':
+        history = load_history(history_path)
+        with tracer.step('shards: record', logs=len(args.logs)) as step:
+            step.matches = record(args.logs or ['-'], history)
+        save_history(history_path, history)
+        print(f'✓ Recorded {step.matches} test durations in {history_path}')
+        return 0
+    if args.count < 1:
+        print('❌ --count must be at least 1')
+        return 1
+    project = Project.load(args.project)
+    try:
+        paths = test_sources(project, args.target)
+    except OperationError as e:
+        print(f'❌ {e}')
+        return 1
+    # The classify cache is shared: keep the entries of non-test files
+    results = scan_all(paths, tracer, args.jobs, prune=False)
+    with tracer.step('shards: plan', files=len(paths)) as step:
+        classes = discover(results)
+        unit = weigh(classes, {} if args.lines else load_history(history_path))
+        shards = plan(classes, args.count, args.target)
+        step.objects = len(classes)
+    if args.shard is not None:
+        if not 1 <= args.shard <= args.count:
+            print(f'❌ --shard must be between 1 and {args.count}')
+            return 1
+        print(arguments(shards[args.shard - 1]))
+    elif args.json:
+        print(json.dumps({'unit': unit, 'shards': shards}, indent=2))
+    else:
+        print_plan(shards, unit)
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('shards', help='plan balanced -only-testing: shards')
+    parser.add_argument('action', choices=('plan', 'record'))
+    parser.add_argument('logs', nargs='*', help='record: xcodebuild logs to read (default: stdin)')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('-t', '--target', default=DEFAULT_TARGET)
+    parser.add_argument('-n', '--count', type=int, default=2, help='number of shards')
+    parser.add_argument('--shard', type=int, help='print only the arguments for shard N (1-based)')
+    parser.add_argument('--history', help=f'test duration history (default: {HISTORY_FILE})')
+    parser.add_argument('--lines', action='store_true', help='ignore the history and weigh by lines')
+    parser.add_argument('--json', action='store_true', help='print the plan as JSON')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: CPU count)')
+    parser.set_defaults(func=main)
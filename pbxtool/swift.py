@@ -0,0 +1,155 @@
+"""
+Lightweight Swift source scanner.
+
+This is not a parser: comments and string literals are blanked out (line
+breaks are kept so line numbers stay valid) and the remaining code is
+matched with regular expressions.  That is enough to find type
+declarations, inheritance clauses, attributes and imports.
+"""
+
+import re
+
+STRIP_RE = re.compile(r'"""[\s\S]*?"""|"(?:[^"\\\n]|\\.)*"|//[^\n]*|/\*|\*/')
+
+DECL_RE = re.compile(r'''
+    \b(class|struct|enum|protocol|actor|extension)\s+
+    ([A-Za-z_][\w.]*)                       # name
+    (?:\s*<[^>{]*>)?                         # generic parameters
+    (?:\s*:\s*([^{]*?))?                     # inheritance clause
+    \s*(?:\bwhere\b[^{]*)?\{
+''', re.X)
+
+IMPORT_RE = re.compile(r'^[ \t]*(?:@\w+[ \t]+)*import[ \t]+'
+                       r'(?:(?:typealias|struct|class|enum|protocol|let|var|func)[ \t]+)?'
+                       r'([\w.]+)', re.M)
+# Capitalized identifiers: the candidate type references of a file
+TYPE_REF_RE = re.compile(r'\b[A-Z][A-Za-z0-9_]*\b')
+MAIN_RE = re.compile(r'@main\b|@UIApplicationMain\b')
+
+# Asset catalog and Core Data names live in string literals, so these run
+# on the original text: Image("Star"), UIColor(named: "Brand"),
+# NSFetchRequest(entityName: "ChildEntity")
+ASSET_RE = re.compile(r'\b(?:Image|Color|UIImage|UIColor|NSImage|NSColor)\(\s*(?:named:\s*)?"([^"\\\n]+)"')
+ENTITY_NAME_RE = re.compile(r'\b(?:entityName|forEntityName)\s*:\s*"([^"\\\n]+)"')
+# Generated asset symbols: Image(.star), Color.brand, ImageResource.star
+ASSET_SYMBOL_RE = re.compile(r'\b(?:Image|Color|UIImage|UIColor|NSImage|NSColor|ImageResource|ColorResource)'
+                             r'(?:\(\s*|\s*)\.([a-z]\w*)')
+
+# XCTest runs instance methods named test* that take no arguments
+TEST_METHOD_RE = re.compile(r'''
+    ^[ \t]*(?:@\w+(?:\([^)\n]*\))?\s+)*
+    (?:(?:public|internal|open|final|override|nonisolated)\s+)*
+    func\s+(test\w*)\s*\(\s*\)
+''', re.M | re.X)
+
+
+def _blank(text, filler):
+    return filler + '\n' * text.count('\n')
+
+
+def strip(text):
+    """Blank out comments (including nested ones) and string literals."""
+    out = []
+    pos = 0
+    depth = 0
+    comment_start = 0
+    for m in STRIP_RE.finditer(text):
+        token = m.group()
+        if depth:
+            if token == '/*':
+                depth += 1
+            elif token == '*/':
+                depth -= 1
+                if not depth:
+                    out.append(_blank(text[comment_start:m.end()], ' '))
+                    pos = m.end()
+            continue
+        if token == '*/':
+            continue
+        out.append(text[pos:m.start()])
+        if token == '/*':
+            depth = 1
+            comment_start = m.start()
+            continue
+        out.append(_blank(token, '""' if token.startswith('"') else ' '))
+        pos = m.end()
+    if depth:
+        out.append(_blank(text[comment_start:], ' '))
+    else:
+        out.append(text[pos:])
+    return ''.join(out)
+
+
+def split_inheritance(clause):
+    """Split 'Foo, Bar<Baz>, @unchecked Sendable' into bare type names."""
+    if not clause:
+        return []
+    names = []
+    depth = 0
+    current = ''
+    for c in clause:
+        if c == '<':
+            depth += 1
+        elif c == '>':
+            depth -= 1
+        elif c == ',' and not depth:
+            names.append(current)
+            current = ''
+            continue
+        if not depth and c not in '<>':
+            current += c
+    names.append(current)
+    result = []
+    for name in names:
+        name = re.sub(r'@\w+\s*', '', name).strip()
+        if name:
+            result.append(name.split('.')[-1])
+    return result
+
+
+def line_of(code, offset):
+    return code.count('\n', 0, offset) + 1
+
+
+def brace_pairs(code):
+    """Map the offset of each '{' in code to the offset of its closing '}'."""
+    pairs = {}
+    stack = []
+    for m in re.finditer(r'[{}]', code):
+        if m.group() == '{':
+            stack.append(m.start())
+        elif stack:
+            pairs[stack.pop()] = m.start()
+    return pairs
+
+
+def scan(text):
+    """Return the declarations, references, imports, test methods, attributes and
+    asset and entity names used in text."""
+    code = strip(text)
+    types = []
+    pairs = brace_pairs(code)
+    for m in DECL_RE.finditer(code):
+        kind, name, clause = m.groups()
+        # An unbalanced body runs to the end of the file
+        close = pairs.get(m.end() - 1, len(code))
+        types.append({
+            'kind': kind,
+            'name': name,
+            'inherits': split_inheritance(clause),
+            'line': line_of(code, m.start()),
+            'end': line_of(code, close),
+        })
+    return {
+        'types': types,
+        'assets': sorted(set(ASSET_RE.findall(text))),
+        'asset_symbols': sorted(set(ASSET_SYMBOL_RE.findall(code))),
+        'entity_names': sorted(set(ENTITY_NAME_RE.findall(text))),
+        'imports': sorted(set(IMPORT_RE.findall(code))),
+        'references': sorted(set(TYPE_REF_RE.findall(code))),
+        'tests': [{'name': m.group(1), 'line': line_of(code, m.start(1))}
+                  for m in TEST_METHOD_RE.finditer(code)],
+        'main': bool(MAIN_RE.search(code)),
+        'ui_testing': 'XCUIApplication' in code,
+        'lines': text.count('\n') + (0 if text.endswith('\n') or not text else 1),
+    }
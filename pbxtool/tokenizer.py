@@ -0,0 +1,316 @@
+"""
+Zero-copy event stream over a memory-mapped project.pbxproj.
+
+For read-only tooling there is no need to build the object graph.
+events() walks the file once and yields SAX-style tuples whose payloads
+are memoryview slices into the mapping, so nothing is decoded or copied
+unless a consumer asks for it with text():
+
+    ('object-begin', id, isa)     an entry of the objects dictionary
+    ('object-end', id, None)
+    ('key', key, None)            a dictionary key inside an object
+    ('value', value, None)        a scalar dictionary value
+    ('list-begin', None, None)
+    ('list-item', value, None)    a scalar list element
+    ('list-end', None, None)
+    ('dict-begin', None, None)    a nested dictionary such as buildSettings
+    ('dict-end', None, None)
+
+Top-level keys outside the objects dictionary (archiveVersion,
+rootObject, ...) are reported with the same key/value events.
+
+    python3 -m pbxtool validate           # streaming integrity checks
+    python3 -m pbxtool bench-tokenizer    # compare with read + regex
+"""
+
+import contextlib
+import mmap
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pbxtool import PROJECT_FILE
+from pbxtool.pbxproj import Project, ParseError, unquote
+
+TOKEN_RE = re.compile(rb'''
+    (?:\s+|/\*.*?\*/|//[^\n]*)+
+  | (?P<quoted>"(?:[^"\\]|\\.)*")
+  | (?P<punct>[{}()=;,])
+  | (?P<bare>(?:[^\s{}()=;,"/]|/(?![*/]))+)
+''', re.S | re.X)
+
+ISA_RE = re.compile(rb'\s*isa\s*=\s*([^\s;]+)\s*;')
+ID_RE = re.compile(rb'[0-9A-Z]{24}')
+
+OPEN_BRACE, CLOSE_BRACE = ord('{'), ord('}')
+OPEN_PAREN, CLOSE_PAREN = ord('('), ord(')')
+EQUALS, SEMICOLON, COMMA = ord('='), ord(';'), ord(',')
+
+
+def text(view):
+    """Decode an event payload to a Python string (quotes removed)."""
+    return unquote(bytes(view).decode('utf-8'))
+
+
+@contextlib.contextmanager
+def mapped(path):
+    """Map path read-only; yields b'' for an empty file.
+
+    Event payloads are only meaningful inside the with block.  Slices a
+    consumer still holds when it exits keep the mapping alive until they
+    are released, after which it is unmapped; that is a leak in the
+    consumer, so it is reported on stderr.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                print(f'⚠ {path} stays mapped: event payloads were held past the with block',
+                      file=sys.stderr)
+
+
+def events(buf):
+    """Yield (kind, payload, extra) events for a project.pbxproj buffer."""
+    view = memoryview(buf)
+    # Each frame: [is_dict, state, role, object_id]
+    stack = []
+    key = None
+    for m in TOKEN_RE.finditer(buf):
+        kind = m.lastgroup
+        if kind is None:
+            continue
+        start, end = m.span()
+        if kind == 'punct':
+            c = buf[start]
+            if not stack:
+                if c != OPEN_BRACE:
+                    raise ParseError(f'expected {{ at offset {start}')
+                stack.append([True, 'key', 'top', None])
+                continue
+            frame = stack[-1]
+            state = frame[1]
+            if c == OPEN_BRACE and state in ('value', 'item'):
+                role = 'dict'
+                object_id = None
+                if frame[2] == 'top' and key is not None and bytes(key) == b'objects':
+                    role = 'objects'
+                elif frame[2] == 'objects':
+                    role = 'object'
+                    object_id = key
+                    isa = ISA_RE.match(buf, end)
+                    yield 'object-begin', key, view[isa.start(1):isa.end(1)] if isa else None
+                if role == 'dict':
+                    yield 'dict-begin', None, None
+                frame[1] = 'semi' if state == 'value' else 'comma'
+                stack.append([True, 'key', role, object_id])
+            elif c == OPEN_PAREN and state in ('value', 'item'):
+                yield 'list-begin', None, None
+                frame[1] = 'semi' if state == 'value' else 'comma'
+                stack.append([False, 'item', 'list', None])
+            elif c == CLOSE_BRACE and frame[0] and state == 'key':
+                stack.pop()
+                if frame[2] == 'object':
+                    yield 'object-end', frame[3], None
+                elif frame[2] == 'dict':
+                    yield 'dict-end', None, None
+            elif c == CLOSE_PAREN and not frame[0] and state in ('item', 'comma'):
+                stack.pop()
+                yield 'list-end', None, None
+            elif c == EQUALS and state == 'eq':
+                frame[1] = 'value'
+            elif c == SEMICOLON and state == 'semi':
+                frame[1] = 'key'
+            elif c == COMMA and state == 'comma':
+                frame[1] = 'item'
+            else:
+                raise ParseError(f'unexpected {chr(c)!r} at offset {start}')
+            continue
+        if not stack:
+            raise ParseError(f'unexpected token at offset {start}')
+        frame = stack[-1]
+        state = frame[1]
+        token = view[start:end]
+        if state == 'key':
+            key = token
+            frame[1] = 'eq'
+            if frame[2] != 'objects':
+                yield 'key', token, None
+        elif state == 'value':
+            frame[1] = 'semi'
+            yield 'value', token, None
+        elif state == 'item':
+            frame[1] = 'comma'
+            yield 'list-item', token, None
+        else:
+            raise ParseError(f'unexpected token at offset {start}')
+    if stack:
+        raise ParseError('unexpected end of file')
+
+
+# -- validate ---------------------------------------------------------------
+
+def validate(path):
+    """Stream the project once and return a list of problems found."""
+    with mapped(path) as buf:
+        return check(buf)
+
+
+def check(buf):
+    """validate() for a buffer; keeps no event payloads once it returns."""
+    problems = []
+    defined = set()
+    referenced = {}
+    current = None
+    current_key = None
+    # (key, IDs seen) for each open list, innermost last
+    lists = []
+    for kind, payload, extra in events(buf):
+        if kind == 'object-begin':
+            current = bytes(payload)
+            if current in defined:
+                problems.append(f'duplicate object ID {current.decode()}')
+            defined.add(current)
+            if extra is None:
+                problems.append(f'object {current.decode()} has no isa')
+        elif kind == 'object-end':
+            current = None
+        elif kind == 'key':
+            current_key = payload
+        elif kind in ('value', 'list-item'):
+            if current is not None and len(payload) == 24 and ID_RE.fullmatch(payload):
+                ref = bytes(payload)
+                referenced.setdefault(ref, current)
+                if kind == 'list-item':
+                    key, items = lists[-1]
+                    if ref in items:
+                        problems.append(f'{ref.decode()} listed twice in {key} of {current.decode()}')
+                    items.add(ref)
+        elif kind == 'list-begin':
+            lists.append((text(current_key), set()))
+        elif kind == 'list-end':
+            lists.pop()
+    for ref, owner in referenced.items():
+        if ref not in defined:
+            problems.append(f'{owner.decode()} references missing object {ref.decode()}')
+    return problems
+
+
+def validate_main(args, tracer):
+    with tracer.step('validate', path=args.project) as step:
+        problems = validate(args.project)
+        step.bytes_scanned = os.path.getsize(args.project)
+        step.matches = len(problems)
+    for problem in problems:
+        print(f'⚠ {problem}')
+    if problems:
+        print(f'\n❌ {len(problems)} problem(s) in {args.project}')
+        return 1
+    print(f'✅ {args.project} is consistent')
+    return 0
+
+
+# -- benchmark --------------------------------------------------------------
+
+def count_streaming(path):
+    with mapped(path) as buf:
+        return count_objects(buf)
+
+
+def count_objects(buf):
+    counts = {}
+    for kind, _, isa in events(buf):
+        if kind == 'object-begin':
+            key = bytes(isa) if isa is not None else None
+            counts[key] = counts.get(key, 0) + 1
+    return sum(counts.values())
+
+
+def count_regex(path):
+    """The scripts' approach: read the whole file, then run regexes over it."""
+    with open(path, 'r') as f:
+        content = f.read()
+    counts = {}
+    for isa in re.findall(r'^\t\t\w+ (?:/\*.*?\*/ )?= \{\s*isa = (\w+);', content, re.M):
+        counts[isa] = counts.get(isa, 0) + 1
+    return sum(counts.values())
+
+
+def count_parsed(path):
+    return len(Project.load(path).objects)
+
+
+def scaled_copy(path, factor):
+    """Write a copy of path with the PBXFileReference section repeated factor times."""
+    with open(path, 'r') as f:
+        content = f.read()
+    begin = content.index('/* Begin PBXFileReference section */\n')
+    begin += len('/* Begin PBXFileReference section */\n')
+    end = content.index('/* End PBXFileReference section */')
+    section = content[begin:end]
+    copies = []
+    for n in range(1, factor):
+        copies.append(re.sub(r'^\t\t(\w{20})\w{4}', rf'\t\t\g<1>{n:04X}', section, flags=re.M))
+    fd, tmp = tempfile.mkstemp(suffix='.pbxproj')
+    with os.fdopen(fd, 'w') as f:
+        f.write(content[:end] + ''.join(copies) + content[end:])
+    return tmp
+
+
+def measure(func, path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def bench_main(args, tracer):
+    path = args.project
+    scaled = scaled_copy(path, args.scale) if args.scale > 1 else None
+    try:
+        target = scaled or path
+        size = os.path.getsize(target)
+        print(f'{target}: {size / 1024:.0f} KiB, best of {args.repeat}\n')
+        print(f"{'approach':<24}{'objects':>10}{'seconds':>12}{'peak KiB':>12}")
+        for name, func in (('mmap event stream', count_streaming),
+                           ('read + regex', count_regex),
+                           ('full parse', count_parsed)):
+            with tracer.step(f'bench: {name}', path=target) as step:
+                objects, seconds, peak = measure(func, target, args.repeat)
+                step.bytes_scanned = size
+                step.objects = objects
+            print(f'{name:<24}{objects:>10}{seconds:>12.4f}{peak / 1024:>12.0f}')
+    finally:
+        if scaled:
+            os.unlink(scaled)
+    return 0
+
+
+def register(subparsers):
+    parser = subparsers.add_parser('validate', help='streaming integrity checks for CI')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.set_defaults(func=validate_main)
+
+    parser = subparsers.add_parser('bench-tokenizer',
+                                   help='benchmark the event stream against read + regex')
+    parser.add_argument('--project', default=PROJECT_FILE)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=1,
+                        help='repeat the file references N times to simulate a larger project')
+    parser.set_defaults(func=bench_main)
@@ -0,0 +1,64 @@
+"""
+Scratch copies of the sample project for tests that edit files.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from pbxtool.pbxproj import Project
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(ROOT, 'tests', 'fixtures', 'Sample.xcodeproj')
+SAMPLE = 'Sample.xcodeproj/project.pbxproj'
+SOURCES = ('Sample/App.swift', 'Sample/Models/Store.swift', 'Sample/Views/Home.swift',
+           'SampleTests/StoreTests.swift')
+
+
+def write(path, text=''):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def git(*args):
+    """Run git in the working directory and return its output."""
+    return subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com',
+                           '-c', 'commit.gpgsign=false'] + list(args),
+                          check=True, capture_output=True, text=True).stdout
+
+
+class SampleProjectTestCase(unittest.TestCase):
+    """Runs each test in a scratch copy of the sample project."""
+
+    def setUp(self):
+        cwd = os.getcwd()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        shutil.copytree(FIXTURE, os.path.join(directory.name, 'Sample.xcodeproj'))
+        os.chdir(directory.name)
+        for path in SOURCES:
+            write(path)
+        self.project = Project.load(SAMPLE)
+        self.text = self.project.text
+
+    def edited(self, *replacements):
+        text = self.text
+        for old, new in replacements:
+            self.assertEqual(text.count(old), 1, old)
+            text = text.replace(old, new)
+        return text
+
+    def init_git(self):
+        """Make the scratch copy a git repository with one commit."""
+        git('init', '-q')
+        self.commit('base')
+
+    def commit(self, message):
+        git('add', '-A')
+        git('commit', '-q', '--allow-empty', '-m', message)
@@ -0,0 +1,151 @@
+"""
+Checks for affected-test selection (pbxtool.affected).
+"""
+
+import io
+import unittest
+from unittest import mock
+
+from pbxtool import affected
+from pbxtool.engine import Transaction
+from pbxtool.instrument import Tracer
+from pbxtool.operations import AddFile, RemoveFile
+from pbxtool.pbxproj import Project
+
+from sample import SAMPLE, SampleProjectTestCase, git, write
+
+
+def node(declares=(), references=(), targets=('App',)):
+    return {'declares': sorted(declares), 'references': sorted(references),
+            'imports': [], 'targets': sorted(targets)}
+
+
+class GraphTests(unittest.TestCase):
+
+    def test_update_recomputes_only_what_a_change_can_reach(self):
+        graph = affected.Graph({}, {})
+        nodes = {'A.swift': node(declares=['A']),
+                 'B.swift': node(references=['A']),
+                 'C.swift': node(declares=['C'])}
+        graph.update(nodes)
+        self.assertEqual(graph.updated, 3)
+        self.assertEqual(graph.deps, {'A.swift': [], 'B.swift': ['A.swift'], 'C.swift': []})
+        nodes = dict(nodes, **{'A.swift': node(declares=['A', 'Extra'])})
+        self.assertEqual(graph.update(nodes), {'A.swift'})
+        # A changed and B references a type A declares; C is untouched
+        self.assertEqual(graph.updated, 2)
+        self.assertEqual(graph.retargeted, set())
+
+    def test_edges_need_a_shared_target_or_import(self):
+        graph = affected.Graph({}, {})
+        graph.update({'A.swift': node(declares=['A'], targets=['App']),
+                      'T.swift': node(references=['A'], targets=['Tests'])})
+        self.assertEqual(graph.deps['T.swift'], [])
+        nodes = {'A.swift': node(declares=['A'], targets=['App']),
+                 'T.swift': dict(node(references=['A'], targets=['Tests']), imports=['App'])}
+        graph.update(nodes)
+        self.assertEqual(graph.deps['T.swift'], ['A.swift'])
+
+    def test_retargeted_and_affected(self):
+        graph = affected.Graph({}, {})
+        nodes = {'A.swift': node(declares=['A']),
+                 'B.swift': node(declares=['B'], references=['A']),
+                 'C.swift': node(references=['B'])}
+        graph.update(nodes)
+        graph.update(dict(nodes, **{'A.swift': node(declares=['A'], targets=['App', 'Widget'])}))
+        self.assertEqual(graph.retargeted, {'A.swift'})
+        self.assertEqual(graph.affected({'A.swift'}), {'A.swift', 'B.swift', 'C.swift'})
+        self.assertEqual(graph.affected({'C.swift'}), {'C.swift'})
+
+
+class ChangedFilesTests(SampleProjectTestCase):
+
+    def test_files_and_stdin(self):
+        self.assertEqual(affected.changed_files([], ['b.swift', 'a.swift']), ['a.swift', 'b.swift'])
+        diff = ('--- a/Old.swift\n+++ /dev/null\n'
+                '--- /dev/null\n+++ b/New.swift\n')
+        with mock.patch('sys.stdin', io.StringIO(diff)):
+            self.assertEqual(affected.changed_files(['-'], None), ['New.swift', 'Old.swift'])
+
+    def test_git_diff_and_base_revision(self):
+        self.init_git()
+        git('checkout', '-q', '-b', 'topic')
+        write('Sample/App.swift', 'struct App {}\n')
+        self.commit('topic')
+        git('checkout', '-q', '-')
+        write('README.md', 'main\n')
+        self.commit('main')
+        base = git('rev-parse', 'HEAD~1').strip()
+        self.assertEqual(affected.changed_files(['HEAD...topic'], None), ['Sample/App.swift'])
+        self.assertEqual(affected.base_revision(['HEAD...topic']), base)
+        self.assertEqual(affected.base_revision([]), 'HEAD')
+        self.assertEqual(affected.base_revision(['-']), None)
+        self.assertEqual(affected.base_revision(['main..topic']), 'main')
+        self.assertEqual(affected.base_revision(['..topic']), 'HEAD')
+        self.assertEqual(affected.base_revision(['HEAD~1', 'HEAD']), 'HEAD~1')
+
+
+class SelectTests(SampleProjectTestCase):
+    """Selection in a git copy of the sample project, whose Sample target
+    holds the test classes."""
+
+    def setUp(self):
+        super().setUp()
+        write('Sample/Models/Store.swift', 'struct Store {}\n')
+        write('Sample/App.swift', 'import XCTest\n\nfinal class AppTests: XCTestCase {\n'
+                                  '    func testStore() { _ = Store() }\n}\n')
+        # On disk, but not in the project yet
+        write('Sample/Views/Home.swift', 'import XCTest\n\nfinal class HomeTests: XCTestCase {\n'
+                                         '    func testHome() {}\n}\n')
+        self.init_git()
+
+    def select(self, changes, base='HEAD'):
+        selected, reason = affected.select(Project.load(SAMPLE), changes, 'Sample',
+                                           Tracer(verbose=False), base=base)
+        return sorted(c['class'] for c in selected), reason
+
+    def edit_project(self, *operations):
+        Transaction(SAMPLE).queue(*operations).commit()
+
+    def test_swift_change_selects_its_dependents(self):
+        self.assertEqual(self.select(['Sample/Models/Store.swift']), (['AppTests'], None))
+        self.assertEqual(self.select(['README.md']), ([], None))
+
+    def test_unknown_file_kind_runs_everything(self):
+        self.assertEqual(self.select(['Sample/Info.plist']),
+                         (['AppTests'], 'Sample/Info.plist is not a Swift file'))
+
+    def test_project_change_selects_retargeted_files(self):
+        self.edit_project(AddFile('Sample/Views/Home.swift', ['Sample']))
+        self.commit('add Home.swift')
+        changes = affected.changed_files(['HEAD~1', 'HEAD'], None)
+        self.assertEqual(changes, [SAMPLE])
+        # Cold cache, then warm: the graph has already seen the new membership
+        for _ in range(2):
+            self.assertEqual(self.select(changes, base='HEAD~1'), (['HomeTests'], None))
+
+    def test_project_change_without_base_uses_the_last_run(self):
+        self.select([])
+        self.edit_project(AddFile('Sample/Views/Home.swift', ['Sample']))
+        self.assertEqual(self.select([SAMPLE], base=None), (['HomeTests'], None))
+
+    def test_file_taken_out_of_its_targets(self):
+        self.edit_project(RemoveFile('Sample/Models/Store.swift'))
+        self.assertEqual(self.select([SAMPLE]), (['AppTests'], None))
+
+    def test_deleted_file_on_a_cold_and_a_warm_cache(self):
+        git('rm', '-q', 'Sample/Models/Store.swift')
+        self.commit('delete Store.swift')
+        for _ in range(2):
+            self.assertEqual(self.select(['Sample/Models/Store.swift'], base='HEAD~1'),
+                             (['AppTests'], None))
+
+    def test_deleted_file_without_history_runs_everything(self):
+        git('rm', '-q', 'Sample/Models/Store.swift')
+        selected, reason = self.select(['Sample/Models/Store.swift'], base=None)
+        self.assertEqual(selected, ['AppTests'])
+        self.assertIn('cannot be read', reason)
+
+
+if __name__ == '__main__':
+    unittest.main()
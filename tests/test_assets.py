@@ -0,0 +1,75 @@
+"""
+Checks for the asset catalog report (pbxtool.assets).
+"""
+
+import contextlib
+import io
+import json
+import unittest
+
+from pbxtool.__main__ import main
+from pbxtool.operations import AddFile
+from pbxtool.settings import SetBuildSettings
+
+from sample import SAMPLE, SampleProjectTestCase, write
+
+CATALOG = 'Sample/Assets.xcassets'
+APP_TARGET = '4A0000000000000000000001'
+CONTENTS = '{"info": {"author": "xcode", "version": 1}}\n'
+
+APP = '''import SwiftUI
+
+struct Badge: View {
+    var body: some View {
+        Text("Hi")
+            .foregroundColor(Color.brand)
+            .background(Color("Accent"))
+            .border(Color(UIColor(named: "Outline")!))
+    }
+}
+'''
+
+
+class MissingColorTests(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        write(f'{CATALOG}/Contents.json', CONTENTS)
+        for name in ('Brand', 'Highlight'):
+            write(f'{CATALOG}/{name}.colorset/Contents.json', CONTENTS)
+        write('Sample/App.swift', APP)
+        # The sample app has no resources yet
+        phase = self.project.add({'isa': 'PBXResourcesBuildPhase', 'buildActionMask': '2147483647',
+                                  'files': [], 'runOnlyForDeploymentPostprocessing': '0'},
+                                 'Resources', comment='Resources')
+        self.project.modify(APP_TARGET)['buildPhases'].append(phase.id)
+        AddFile(CATALOG, ['Sample']).apply(self.project)
+        SetBuildSettings({'ASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME': 'Tint'}, ['Sample']).apply(self.project)
+        self.project.save()
+
+    def assets(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(['assets', '--project', SAMPLE, '--json'])
+        return status, json.loads(out.getvalue())
+
+    def test_missing_colors_are_reported(self):
+        status, report = self.assets()
+        self.assertEqual(status, 1)
+        self.assertEqual(report['missing'], [
+            'asset "Accent" used by Sample/App.swift',
+            'asset "Outline" used by Sample/App.swift',
+            'asset "Tint" named by a build setting',
+        ])
+        self.assertEqual(report['unused'], [f'color Highlight ({CATALOG}/Highlight.colorset)'])
+        self.assertEqual(sorted((a['name'], a['targets']) for a in report['assets']),
+                         [('Brand', ['Sample']), ('Highlight', ['Sample'])])
+
+    def test_defining_the_colors_clears_the_report(self):
+        for name in ('Accent', 'Outline', 'Tint'):
+            write(f'{CATALOG}/{name}.colorset/Contents.json', CONTENTS)
+        status, report = self.assets()
+        self.assertEqual((status, report['missing'], report['duplicate']), (0, [], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Checks for classify runs and the scan cache they share (pbxtool.classify).
+"""
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from pbxtool.__main__ import main
+
+from sample import SAMPLE, SOURCES, SampleProjectTestCase, write
+
+
+class CacheTests(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for path in SOURCES:
+            name = os.path.splitext(os.path.basename(path))[0]
+            write(path, f'struct {name} {{}}\n')
+
+    def classify(self, *paths):
+        """Run classify --json --all; returns (rows, files scanned)."""
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(['--trace', 'trace.json', 'classify', '--project', SAMPLE,
+                           '--json', '--all'] + list(paths))
+        self.assertEqual(status, 0)
+        with open('trace.json') as f:
+            steps = {step['name']: step for step in json.load(f)['steps']}
+        os.remove('trace.json')
+        return json.loads(out.getvalue()), steps['classify: scan']['objects']
+
+    def test_subset_run_keeps_the_cache_of_other_files(self):
+        rows, scanned = self.classify()
+        self.assertEqual(scanned, 4)
+        subset, scanned = self.classify('SampleTests')
+        self.assertEqual(scanned, 0)
+        self.assertEqual(subset, [row for row in rows if row['path'].startswith('SampleTests/')])
+        self.assertEqual(self.classify(), (rows, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
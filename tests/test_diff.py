@@ -0,0 +1,79 @@
+"""
+Checks for the Merkle-tree project diff and its tree cache (pbxtool.diff).
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from pbxtool import cache, diff
+from pbxtool.instrument import Tracer
+from pbxtool.pbxproj import Project
+
+from sample import SampleProjectTestCase, write
+
+PROJECT_DEBUG = '8A0000000000000000000002'
+
+
+class CompareTests(SampleProjectTestCase):
+
+    def test_identical_trees_are_not_walked(self):
+        tree = diff.build_tree(self.project)
+        self.assertEqual(diff.compare(tree, diff.build_tree(Project(self.text))), ([], [], [], 0))
+
+    def test_only_changed_buckets_are_visited(self):
+        edited = Project(self.edited(('SDKROOT = iphoneos;', 'SDKROOT = macosx;')))
+        added, removed, modified, visited = diff.compare(diff.build_tree(self.project),
+                                                         diff.build_tree(edited))
+        self.assertEqual((added, removed, modified), ([], [], [PROJECT_DEBUG]))
+        # The three build configurations share the one bucket that changed
+        self.assertEqual(visited, 3)
+
+    def test_comments_and_layout_do_not_count(self):
+        edited = Project(self.edited(('/* Store.swift in Sources */ = {',
+                                      '/* Renamed */ = {')))
+        self.assertEqual(diff.build_tree(edited)['hash'], diff.build_tree(self.project)['hash'])
+
+
+class DiffTests(SampleProjectTestCase):
+
+    def diff(self, old, new):
+        return diff.diff(old, new, None, Tracer(verbose=False))
+
+    def revision(self, name, *replacements):
+        write(name, self.edited(*replacements))
+        return name
+
+    def test_describes_build_setting_changes(self):
+        old = self.revision('old.pbxproj')
+        new = self.revision('new.pbxproj', ('SDKROOT = iphoneos;', 'SDKROOT = macosx;'),
+                            ('com.example.SampleTests;', 'com.example.Tests;'))
+        lines, stats = self.diff(old, new)
+        self.assertEqual(lines, [
+            ('~', 'Sample Debug: SDKROOT iphoneos → macosx'),
+            ('~', 'SampleTests Debug: PRODUCT_BUNDLE_IDENTIFIER com.example.SampleTests → com.example.Tests'),
+        ])
+        self.assertEqual((stats['modified'], stats['identical']), (2, False))
+
+    def test_least_recently_used_trees_are_evicted(self):
+        revisions = [self.revision(f'{n}.pbxproj', ('SDKROOT = iphoneos;', f'SDKROOT = sdk{n};'))
+                     for n in range(3)]
+        hashes = [diff.Revision(path, None).hash for path in revisions]
+
+        def cached():
+            return [h for h in hashes if os.path.exists(
+                os.path.join(cache.CACHE_DIR, diff.TREE_PREFIX + h + '.json'))]
+
+        with mock.patch.object(diff, 'CACHE_ENTRIES', 2):
+            self.diff(revisions[0], revisions[1])
+            self.assertEqual(cached(), hashes[:2])
+            # Using 0 again makes 1 the least recently used
+            self.diff(revisions[0], revisions[0])
+            self.diff(revisions[2], revisions[0])
+            self.assertEqual(cached(), [hashes[0], hashes[2]])
+        self.assertEqual(cache.load(diff.CACHE_NAME, diff.CACHE_VERSION)['recent'],
+                         [hashes[2], hashes[0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
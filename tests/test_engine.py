@@ -0,0 +1,119 @@
+"""
+Checks for locked, conflict-checked project writes (pbxtool.engine).
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import unittest
+
+from pbxtool import engine
+from pbxtool.engine import ConflictError, Transaction
+from pbxtool.instrument import Tracer
+from pbxtool.operations import AddFile
+from pbxtool.pbxproj import Project
+
+from sample import SAMPLE, SampleProjectTestCase, write
+
+
+class Probe:
+    """An operation that records whether the project lock was held."""
+
+    def __init__(self):
+        self.locked = []
+
+    def apply(self, project):
+        self.locked.append(bool(engine._held))
+        return []
+
+
+def add(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        Transaction(SAMPLE).queue(AddFile(path, ['Sample'])).commit()
+
+
+class WriteTests(SampleProjectTestCase):
+
+    def test_stale_hash_raises(self):
+        text, digest = engine.read(SAMPLE)
+        engine.write(SAMPLE, text + '\n', digest)
+        with self.assertRaises(ConflictError) as cm:
+            engine.write(SAMPLE, text + '\n\n', digest)
+        self.assertEqual(cm.exception.path, SAMPLE)
+
+    def test_nested_locks_share_the_outer_one(self):
+        with engine.locked(SAMPLE):
+            with engine.locked(SAMPLE):
+                engine.write(SAMPLE, self.text)
+            self.assertEqual(len(engine._held), 1)
+        self.assertEqual(engine._held, {})
+
+
+class TransactionTests(SampleProjectTestCase):
+
+    def test_replay_runs_with_the_lock_held(self):
+        stale = Project.load(SAMPLE)
+        add('Sample/Views/Home.swift')
+        probe = Probe()
+        transaction = Transaction(SAMPLE, Tracer(verbose=False))
+        transaction.queue(AddFile('Sample/Other.swift', ['Sample']), probe)
+        write('Sample/Other.swift')
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            transaction.commit(stale)
+        self.assertIn('replaying 2 operation(s) with the project locked', out.getvalue())
+        self.assertEqual(probe.locked, [False, True])
+        text = engine.read(SAMPLE)[0]
+        self.assertIn('Home.swift in Sources', text)
+        self.assertIn('Other.swift in Sources', text)
+        commits = [s.to_dict() for s in transaction.tracer.steps if s.name == 'commit']
+        self.assertEqual([(s['attempt'], s['written']) for s in commits], [(1, True), (2, True)])
+
+    def test_parallel_writers_all_commit(self):
+        paths = [f'Sample/Parallel{i}.swift' for i in range(8)]
+        for path in paths:
+            write(path)
+        with multiprocessing.Pool(len(paths)) as pool:
+            pool.map(add, paths)
+        project = Project.load(SAMPLE)
+        self.assertEqual({p for p in paths if project.index.targets_of_path(p) == {'Sample'}}, set(paths))
+        self.assertEqual([name for name in os.listdir('Sample.xcodeproj') if name.endswith('.tmp')], [])
+
+
+class TracerRunTests(SampleProjectTestCase):
+
+    def run_quietly(self, func):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            result = Tracer(verbose=False).run(func)
+        return result, out.getvalue()
+
+    def test_lost_write_is_replayed_once_with_the_lock(self):
+        calls = []
+
+        def main(tracer):
+            calls.append(bool(engine._held))
+            content = tracer.read_text(SAMPLE)
+            if len(calls) == 1:
+                engine.write(SAMPLE, content + '\n')
+            tracer.write_text(SAMPLE, content.replace('Sample', 'Renamed'))
+            return 0
+
+        result, out = self.run_quietly(main)
+        self.assertEqual((result, calls), (0, [False, True]))
+        self.assertIn('replaying edits with the project locked', out)
+        self.assertTrue(engine.read(SAMPLE)[0].endswith('}\n\n'))
+
+    def test_other_conflicts_are_reported_not_retried(self):
+        calls = []
+
+        def main(tracer):
+            calls.append(None)
+            raise ConflictError(SAMPLE)
+
+        result, out = self.run_quietly(main)
+        self.assertEqual((result, len(calls)), (1, 1))
+        self.assertIn(f'❌ {SAMPLE} changed on disk', out)
+
+
+if __name__ == '__main__':
+    unittest.main()
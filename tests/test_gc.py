@@ -0,0 +1,55 @@
+"""
+Checks for mark and sweep of unused objects (pbxtool.gc).
+"""
+
+import unittest
+
+from pbxtool.gc import CollectGarbage, reachable
+from pbxtool.pbxproj import Project
+
+from sample import SampleProjectTestCase
+
+STORE = '2A0000000000000000000002'
+STORE_BUILD = '1A0000000000000000000002'
+MODELS = '3A0000000000000000000003'
+SAMPLE_GROUP = '3A0000000000000000000002'
+SOURCES_PHASE = '5A0000000000000000000001'
+MISSING = 'FF0000000000000000000001'
+
+
+class CollectGarbageTests(SampleProjectTestCase):
+
+    def test_sample_has_no_garbage(self):
+        self.assertEqual(reachable(self.project), set(self.project.objects))
+        self.assertEqual(CollectGarbage().apply(self.project), [])
+        self.assertFalse(self.project.dirty)
+
+    def test_sweeps_orphans_and_groups_holding_only_dangling_ids(self):
+        project = self.project
+        phase = project.modify(SOURCES_PHASE)
+        phase.fields['files'] = [f for f in phase['files'] if f != STORE_BUILD]
+        project.modify(MODELS).fields['children'] = [MISSING]
+        operation = CollectGarbage()
+        changes = operation.apply(project)
+        self.assertEqual(changes, [
+            'removed PBXBuildFile Store.swift in Sources (in no build phase)',
+            'removed PBXFileReference Store.swift (in no group or build phase)',
+            f'removed {MISSING} from PBXGroup Models (no such object)',
+            'removed PBXGroup Models (empty group)',
+        ])
+        self.assertEqual(operation.counts, {'PBXBuildFile': 1, 'PBXFileReference': 1,
+                                            'PBXGroup': 1, 'dangling reference': 1})
+        self.assertEqual(project.removed, {STORE_BUILD, STORE, MODELS})
+        self.assertNotIn(MODELS, project.objects[SAMPLE_GROUP]['children'])
+        again = Project(project.to_text())
+        self.assertEqual(CollectGarbage().apply(again), [])
+
+    def test_keep_empty_groups_still_drops_dangling_ids(self):
+        self.project.modify(MODELS).fields['children'].append(MISSING)
+        changes = CollectGarbage(groups=False).apply(self.project)
+        self.assertEqual(changes, [f'removed {MISSING} from PBXGroup Models (no such object)'])
+        self.assertEqual(self.project.objects[MODELS]['children'], [STORE])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Checks for the pre-commit hook (pbxtool.hook) in a git copy of the sample project.
+"""
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from pbxtool import engine
+from pbxtool.__main__ import main
+from pbxtool.pbxproj import Project
+
+from sample import SAMPLE, SampleProjectTestCase, git, write
+
+TEST_CASE = 'import XCTest\n\nfinal class HomeTests: XCTestCase {\n    func testHome() {}\n}\n'
+
+
+class HookTests(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.init_git()
+
+    def hook(self, *args):
+        """Run the hook; returns (exit status, output, names of the traced steps)."""
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(['--trace', 'trace.json', 'hook', '--project', SAMPLE] + list(args))
+        with open('trace.json') as f:
+            steps = [step['name'] for step in json.load(f)['steps']]
+        os.remove('trace.json')
+        return status, out.getvalue(), steps
+
+    def staged_project(self):
+        return Project(git('show', f':{SAMPLE}'))
+
+    def test_classifies_the_staged_contents(self):
+        write('SampleTests/HomeTests.swift', TEST_CASE)
+        git('add', 'SampleTests/HomeTests.swift')
+        # Unstaged edit that would make it look like app code
+        write('SampleTests/HomeTests.swift', 'struct Home {}\n')
+        status, out, _ = self.hook()
+        self.assertEqual(status, 0, out)
+        self.assertEqual(self.staged_project().index.targets_of_path('SampleTests/HomeTests.swift'),
+                         {'SampleTests'})
+        self.assertEqual(git('diff', '--name-only', '--', SAMPLE), '')
+
+    def test_staged_file_deleted_in_the_working_tree(self):
+        write('SampleTests/HomeTests.swift', TEST_CASE)
+        git('add', 'SampleTests/HomeTests.swift')
+        os.remove('SampleTests/HomeTests.swift')
+        status, out, _ = self.hook()
+        self.assertEqual(status, 0, out)
+        self.assertIn('added HomeTests.swift to target SampleTests', out)
+
+    def test_refuses_unstaged_project_edits(self):
+        write('SampleTests/HomeTests.swift', TEST_CASE)
+        git('add', 'SampleTests/HomeTests.swift')
+        edited = self.text.replace('SDKROOT = iphoneos;', 'SDKROOT = macosx;')
+        engine.write(SAMPLE, edited)
+        status, out, _ = self.hook()
+        self.assertEqual(status, 1)
+        self.assertIn('has unstaged changes', out)
+        self.assertEqual(engine.read(SAMPLE)[0], edited)
+        self.assertEqual(git('show', f':{SAMPLE}'), self.text)
+
+    def test_check_reads_the_staged_project(self):
+        write('SampleTests/HomeTests.swift', TEST_CASE)
+        git('add', 'SampleTests/HomeTests.swift')
+        self.assertEqual(self.hook('--check')[0], 1)
+        # Updated in the working tree only: the commit would still be behind
+        self.assertEqual(self.hook('--no-stage')[0], 0)
+        status, out, _ = self.hook('--check')
+        self.assertEqual(status, 1)
+        self.assertIn('does not match the staged Swift files', out)
+        git('add', SAMPLE)
+        self.assertEqual(self.hook('--check')[0], 0)
+
+    def test_up_to_date_project_is_not_parsed_again(self):
+        write('SampleTests/HomeTests.swift', TEST_CASE)
+        git('add', 'SampleTests/HomeTests.swift')
+        status, _, steps = self.hook()
+        self.assertEqual(status, 0)
+        self.assertIn('load', steps)
+        status, out, steps = self.hook()
+        self.assertEqual((status, out), (0, ''))
+        self.assertNotIn('load', steps)
+        self.assertNotIn('classify: suggest', steps)
+
+    def test_no_swift_changes_reads_nothing(self):
+        write('README.md', 'hello\n')
+        git('add', 'README.md')
+        status, out, steps = self.hook()
+        self.assertEqual((status, out, steps), (0, '', ['hook: staged']))
+
+
+if __name__ == '__main__':
+    unittest.main()
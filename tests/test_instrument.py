@@ -0,0 +1,85 @@
+"""
+Checks for step tracing and --strict (pbxtool.instrument).
+"""
+
+import contextlib
+import io
+import json
+import unittest
+
+from pbxtool import engine
+from pbxtool.instrument import Tracer
+from pbxtool.scripts import add_files
+
+from sample import SAMPLE, SampleProjectTestCase
+
+
+def quietly(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        result = func(*args)
+    return result, out.getvalue()
+
+
+class StrictTests(SampleProjectTestCase):
+
+    def test_zero_match_sub_blocks_the_write(self):
+        tracer = Tracer(strict=True)
+
+        def main():
+            content = tracer.read_text(SAMPLE)
+            content = tracer.sub('Sample', 'Renamed', content, 'Renamed the target')
+            content = tracer.sub('NoSuchThing', '', content, 'Removed nothing')
+            return tracer.write_text(SAMPLE, content)
+
+        written, out = quietly(main)
+        self.assertFalse(written)
+        self.assertIn('⚠ Removed nothing (no match, nothing changed)', out)
+        self.assertIn('Not writing', out)
+        self.assertEqual(engine.read(SAMPLE)[0], self.text)
+
+    def test_add_files_with_a_no_op_is_not_written(self):
+        files = [('Sample/Views/Home.swift', ['Sample']), ('Sample/App.swift', ['Sample'])]
+        tracer = Tracer(strict=True)
+        changes, out = quietly(add_files, files, tracer, SAMPLE)
+        self.assertIsNone(changes)
+        self.assertIn('1 operation(s) had nothing to do (--strict)', out)
+        self.assertEqual(engine.read(SAMPLE)[0], self.text)
+        self.assertEqual([s.name for s in tracer.steps if s.zero_match],
+                         ["AddFile('Sample/App.swift', targets=['Sample'])"])
+        changes, _ = quietly(add_files, files, Tracer(), SAMPLE)
+        self.assertEqual(len(changes), 3)
+
+
+
+class TraceTests(SampleProjectTestCase):
+
+    def edit(self, tracer):
+        content = tracer.read_text(SAMPLE)
+        content = tracer.sub('SDKROOT = iphoneos;', 'SDKROOT = macosx;', content, 'Set SDKROOT')
+        content = tracer.sub('NoSuchThing', '', content, 'Removed nothing')
+        tracer.write_text(SAMPLE, content)
+        return 0
+
+    def test_json_trace(self):
+        tracer = Tracer(trace_path='trace.json', memory=True, verbose=False)
+        self.assertEqual(tracer.run(self.edit), 0)
+        with open('trace.json') as f:
+            trace = json.load(f)
+        self.assertGreaterEqual(trace['total_seconds'], sum(step['seconds'] for step in trace['steps']))
+        self.assertEqual(trace['zero_match_steps'], ['Removed nothing'])
+        steps = {step['name']: step for step in trace['steps']}
+        self.assertEqual(list(steps), ['read', 'Set SDKROOT', 'Removed nothing', 'write'])
+        self.assertEqual((steps['read']['path'], steps['read']['bytes_scanned']), (SAMPLE, len(self.text)))
+        self.assertEqual({k: steps['Set SDKROOT'][k] for k in ('matches', 'replacements', 'zero_match')},
+                         {'matches': 1, 'replacements': 1, 'zero_match': False})
+        self.assertTrue(steps['Removed nothing']['zero_match'])
+        self.assertTrue(all('peak_memory' in step for step in trace['steps']))
+
+    def test_trace_to_stdout(self):
+        result, out = quietly(Tracer(trace_path='-', verbose=False).run, self.edit)
+        self.assertEqual(result, 0)
+        self.assertEqual([step['name'] for step in json.loads(out)['steps']][0], 'read')
+
+
+if __name__ == '__main__':
+    unittest.main()
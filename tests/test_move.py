@@ -0,0 +1,55 @@
+"""
+Checks for moving files and folders on disk and in the project (pbxtool.move).
+"""
+
+import contextlib
+import io
+import os
+import unittest
+
+from pbxtool.__main__ import main
+from pbxtool.pbxproj import Project
+
+from sample import SAMPLE, SampleProjectTestCase
+
+
+class MoveTests(SampleProjectTestCase):
+
+    def move(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(['move', '--project', SAMPLE] + list(args))
+        return status, out.getvalue()
+
+    def test_folder_moved_into_an_existing_folder(self):
+        status, out = self.move('Sample/Models', 'SampleTests')
+        self.assertEqual(status, 0, out)
+        self.assertIn('✓ moved Sample/Models to SampleTests/Models', out)
+        self.assertTrue(os.path.isfile('SampleTests/Models/Store.swift'))
+        self.assertFalse(os.path.exists('Sample/Models'))
+        project = Project.load(SAMPLE)
+        index = project.index
+        group = index.path_to_group['SampleTests/Models']
+        self.assertEqual(project.objects[group]['path'], 'Models')
+        self.assertEqual(index.parent[group], index.path_to_group['SampleTests'])
+        self.assertNotIn('Sample/Models/Store.swift', index.path_to_ref)
+        # Still built by the app, wherever it lives
+        self.assertEqual(index.targets_of_path('SampleTests/Models/Store.swift'), {'Sample'})
+        # Run again: new now names the moved folder itself, so nothing is left to do
+        status, out = self.move('Sample/Models', 'SampleTests')
+        self.assertEqual(status, 0, out)
+        self.assertIn('= Sample/Models → SampleTests/Models (already moved)', out)
+        self.assertEqual(Project.load(SAMPLE).to_text(), project.to_text())
+
+    def test_existing_name_in_the_folder_is_refused(self):
+        os.makedirs('SampleTests/Models')
+        status, out = self.move('Sample/Models', 'SampleTests')
+        self.assertEqual(status, 1)
+        self.assertIn('SampleTests/Models already exists', out)
+        self.assertIn('Nothing was moved', out)
+        self.assertTrue(os.path.isfile('Sample/Models/Store.swift'))
+        with open(SAMPLE, encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
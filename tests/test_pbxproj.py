@@ -0,0 +1,156 @@
+"""
+Round-trip and edit checks for pbxtool.pbxproj.
+
+Run from the project root:
+
+    python3 -m pytest tests
+"""
+
+import os
+import unittest
+
+from pbxtool import PROJECT_FILE
+from pbxtool.index import ProjectIndex
+from pbxtool.operations import AddFile, Move, RemoveFile
+from pbxtool.pbxproj import Project
+from pbxtool.tokenizer import check, events
+
+from sample import FIXTURE, ROOT, SAMPLE, SampleProjectTestCase
+
+
+class RoundTripTests(unittest.TestCase):
+
+    def assert_round_trip(self, path):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        project = Project(text, path)
+        self.assertEqual(project.to_text(), text)
+        # Re-serializing every object must not change a byte either
+        for id in project.objects:
+            project.modify(id)
+        self.assertEqual(project.to_text(), text)
+        # The event stream sees the same objects over the same bytes
+        data = text.encode('utf-8')
+        streamed = [(bytes(id).decode(), bytes(isa).decode())
+                    for kind, id, isa in events(data) if kind == 'object-begin']
+        self.assertEqual(streamed, [(id, obj.isa) for id, obj in project.objects.items()])
+        self.assertEqual(check(data), [])
+
+    def test_fixture(self):
+        self.assert_round_trip(os.path.join(FIXTURE, 'project.pbxproj'))
+
+    def test_focuspal_project(self):
+        self.assert_round_trip(os.path.join(ROOT, PROJECT_FILE))
+
+
+class EditTests(SampleProjectTestCase):
+    """Operations on the sample project change exactly the expected lines."""
+
+    def test_add_file(self):
+        changes = AddFile('Sample/Views/Home.swift', ['Sample']).apply(self.project)
+        self.assertEqual(changes, ['created group Sample/Views',
+                                   'added Sample/Views/Home.swift to group Sample/Views',
+                                   'added Home.swift to target Sample'])
+        build = '2F4B147E2C3001D4F1A96AE9 /* Home.swift in Sources */'
+        ref = '81D77905EFA2B806BFF44644 /* Home.swift */'
+        group = '711B30A97C96C3FB3EBAD5F9 /* Views */'
+        self.assertEqual(self.project.to_text(), self.edited(
+            ('/* End PBXBuildFile section */',
+             f'\t\t{build} = {{isa = PBXBuildFile; fileRef = {ref}; }};\n'
+             '/* End PBXBuildFile section */'),
+            ('/* End PBXFileReference section */',
+             f'\t\t{ref} = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; '
+             'path = Home.swift; sourceTree = "<group>"; };\n'
+             '/* End PBXFileReference section */'),
+            ('\t\t\t\t3A0000000000000000000003 /* Models */,\n',
+             f'\t\t\t\t3A0000000000000000000003 /* Models */,\n\t\t\t\t{group},\n'),
+            ('/* End PBXGroup section */',
+             f'\t\t{group} = {{\n\t\t\tisa = PBXGroup;\n\t\t\tchildren = (\n\t\t\t\t{ref},\n'
+             '\t\t\t);\n\t\t\tpath = Views;\n\t\t\tsourceTree = "<group>";\n\t\t};\n'
+             '/* End PBXGroup section */'),
+            ('\t\t\t\t1A0000000000000000000002 /* Store.swift in Sources */,\n',
+             f'\t\t\t\t1A0000000000000000000002 /* Store.swift in Sources */,\n\t\t\t\t{build},\n'),
+        ))
+
+    def test_remove_file(self):
+        RemoveFile('Sample/Models/Store.swift').apply(self.project)
+        self.assertEqual(self.project.to_text(), self.edited(
+            ('\t\t1A0000000000000000000002 /* Store.swift in Sources */ = {isa = PBXBuildFile; '
+             'fileRef = 2A0000000000000000000002 /* Store.swift */; };\n', ''),
+            ('\t\t2A0000000000000000000002 /* Store.swift */ = {isa = PBXFileReference; '
+             'lastKnownFileType = sourcecode.swift; path = Store.swift; sourceTree = "<group>"; };\n', ''),
+            ('\t\t\t\t2A0000000000000000000002 /* Store.swift */,\n', ''),
+            ('\t\t\t\t1A0000000000000000000002 /* Store.swift in Sources */,\n', ''),
+        ))
+
+    def test_move_file(self):
+        Move('Sample/Models/Store.swift', 'Sample/Store.swift').apply(self.project)
+        self.assertEqual(self.project.to_text(), self.edited(
+            ('\t\t\t\t2A0000000000000000000002 /* Store.swift */,\n', ''),
+            ('\t\t\t\t2A0000000000000000000001 /* App.swift */,\n',
+             '\t\t\t\t2A0000000000000000000001 /* App.swift */,\n'
+             '\t\t\t\t2A0000000000000000000002 /* Store.swift */,\n'),
+        ))
+        self.assertEqual(self.project.index.path('2A0000000000000000000002'), 'Sample/Store.swift')
+
+    def test_save_writes_only_the_changes(self):
+        RemoveFile('Sample/Models/Store.swift').apply(self.project)
+        expected = self.project.to_text()
+        self.project.save()
+        with open(SAMPLE, encoding='utf-8') as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(Project.load(SAMPLE).to_text(), expected)
+
+
+class RollbackTests(SampleProjectTestCase):
+
+    def test_rollback_restores_objects_and_index(self):
+        index = self.project.index
+        with self.assertRaises(RuntimeError):
+            with self.project.atomic():
+                AddFile('Sample/Views/Home.swift', ['Sample']).apply(self.project)
+                Move('Sample/Models', 'Sample/Store').apply(self.project)
+                RemoveFile('Sample/App.swift').apply(self.project)
+                raise RuntimeError
+        self.assertFalse(self.project.dirty)
+        self.assertEqual(self.project.to_text(), self.text)
+        # Restored in place, not dropped and rebuilt
+        self.assertIs(self.project.index, index)
+        fresh = ProjectIndex(Project(self.text))
+        for table in ('parent', 'phase_of', 'build_files', 'members',
+                      'path_to_ref', 'path_to_group', 'synchronized'):
+            self.assertEqual(getattr(index, table), getattr(fresh, table), table)
+        for id, path in index._paths.items():
+            self.assertEqual(path, fresh.path(id), id)
+
+    def test_rollback_cost_tracks_the_edits(self):
+        self.project.index
+        with self.assertRaises(RuntimeError):
+            with self.project.atomic() as savepoint:
+                RemoveFile('Sample/Models/Store.swift').apply(self.project)
+                raise RuntimeError
+        # Build file, file reference, group and phase; nothing else was copied
+        self.assertEqual(sorted(savepoint.objects), ['1A0000000000000000000002', '2A0000000000000000000002',
+                                                     '3A0000000000000000000003', '5A0000000000000000000001'])
+        self.assertEqual(savepoint.comments, {})
+        self.assertEqual(len(savepoint.index), 6)
+        self.assertEqual(self.project.to_text(), self.text)
+
+    def test_inner_rollback_keeps_the_outer_edits(self):
+        with self.project.atomic() as outer:
+            RemoveFile('Sample/App.swift').apply(self.project)
+            with self.assertRaises(RuntimeError):
+                with self.project.atomic():
+                    RemoveFile('Sample/Models/Store.swift').apply(self.project)
+                    raise RuntimeError
+            self.assertIn('Sample/Models/Store.swift', self.project.index.path_to_ref)
+        self.assertNotIn('Sample/App.swift', self.project.index.path_to_ref)
+        # The inner journal went with its rollback
+        self.assertNotIn('2A0000000000000000000002', outer.objects)
+        project = Project(self.text)
+        RemoveFile('Sample/App.swift').apply(project)
+        self.assertEqual(self.project.to_text(), project.to_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Checks that streaming rewrites (pbxtool.pipeline) match the in-place edits they replace.
+"""
+
+import contextlib
+import io
+import unittest
+
+from pbxtool import engine
+from pbxtool.__main__ import main
+from pbxtool.operations import RemoveFile
+from pbxtool.pbxproj import Project
+
+from sample import SAMPLE, SampleProjectTestCase
+
+STORE = '2A0000000000000000000002'
+SAMPLE_GROUP = '3A0000000000000000000002'
+MODELS_GROUP = '3A0000000000000000000003'
+
+
+class RewriteTests(SampleProjectTestCase):
+
+    def rewrite(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(['rewrite', '--project', SAMPLE] + list(args))
+        self.assertEqual(status, 0, out.getvalue())
+        return engine.read(SAMPLE)[0]
+
+    def test_rename_matches_replacing_the_text(self):
+        self.assertEqual(self.rewrite('--rename', 'Models', 'Entities'),
+                         self.text.replace('Models', 'Entities'))
+
+    def test_remove_file_matches_remove_file(self):
+        project = Project(self.text)
+        RemoveFile('Sample/Models/Store.swift').apply(project)
+        self.assertEqual(self.rewrite('--remove', STORE), project.to_text())
+
+    def test_remove_group_removes_its_contents(self):
+        project = Project(self.text)
+        RemoveFile('Sample/Models/Store.swift').apply(project)
+        parent = project.modify(SAMPLE_GROUP)
+        parent.fields['children'] = [c for c in parent['children'] if c != MODELS_GROUP]
+        project.remove(MODELS_GROUP)
+        text = self.rewrite('--remove', MODELS_GROUP)
+        self.assertEqual(text, project.to_text())
+        self.assertNotIn('Store.swift', text)
+        self.assertEqual(Project(text).index.targets_of_path('Sample/App.swift'), {'Sample'})
+
+
+if __name__ == '__main__':
+    unittest.main()
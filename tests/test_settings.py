@@ -0,0 +1,85 @@
+"""
+Checks for layered build settings and their resolved-view cache (pbxtool.settings).
+"""
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from pbxtool.__main__ import main
+from pbxtool.operations import OperationError
+from pbxtool.settings import SetBuildSettings, SettingsView
+
+from sample import SAMPLE, SampleProjectTestCase
+
+SPEC = {
+    'settings': {'base': {'SWIFT_VERSION': 5.0, 'OTHER_SWIFT_FLAGS': '-DBASE'},
+                 'configs': {'debug': {'ENABLE_TESTABILITY': True}}},
+    'targets': {'Sample': {'settings': {'SWIFT_VERSION': 5.9}}},
+}
+
+
+class LayeringTests(SampleProjectTestCase):
+
+    def view(self):
+        return SettingsView(self.project, spec=SPEC)
+
+    def value(self, key, target):
+        (row,) = self.view().get([key], [target])[key]
+        return row[2:]
+
+    def test_layers_lowest_first(self):
+        self.assertEqual(self.value('SWIFT_VERSION', 'Sample'), ('5.9', 'project.yml:Sample'))
+        self.assertEqual(self.value('SWIFT_VERSION', 'SampleTests'), ('5.0', 'project.yml'))
+        self.assertEqual(self.value('ENABLE_TESTABILITY', 'SampleTests'), ('YES', 'project.yml'))
+        self.assertEqual(self.value('SDKROOT', 'Sample'), ('iphoneos', 'project'))
+        self.assertEqual(self.value('PRODUCT_NAME', 'Sample'), ('$(TARGET_NAME)', 'Sample'))
+
+    def test_inherited_expands_the_layers_below(self):
+        SetBuildSettings({'OTHER_SWIFT_FLAGS': '$(inherited) -DPROJECT'}, project_level=True).apply(self.project)
+        SetBuildSettings({'OTHER_SWIFT_FLAGS': ['$(inherited)', '-DAPP']}, ['Sample']).apply(self.project)
+        self.assertEqual(self.value('OTHER_SWIFT_FLAGS', 'Sample'),
+                         (['-DBASE', '-DPROJECT', '-DAPP'], 'Sample'))
+        self.assertEqual(self.value('OTHER_SWIFT_FLAGS', 'SampleTests'), ('-DBASE -DPROJECT', 'project'))
+
+    def test_unknown_target(self):
+        with self.assertRaises(OperationError):
+            SetBuildSettings({'SDKROOT': 'macosx'}, ['Nope']).apply(self.project)
+
+
+class CacheTests(SampleProjectTestCase):
+
+    def settings(self, *args):
+        """Run settings; returns (output, configurations resolved)."""
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(['--trace', 'trace.json', 'settings', '--project', SAMPLE] + list(args))
+        self.assertEqual(status, 0, out.getvalue())
+        with open('trace.json') as f:
+            steps = {step['name']: step for step in json.load(f)['steps']}
+        os.remove('trace.json')
+        resolved = steps['settings: resolve']['objects'] if 'settings: resolve' in steps else None
+        return out.getvalue(), resolved
+
+    def get(self, key):
+        out, resolved = self.settings('get', key, '--json')
+        return {(row['target'], row['value']) for row in json.loads(out)[key]}, resolved
+
+    def test_edits_re_resolve_only_the_configurations_they_touch(self):
+        def rows(project, app, tests):
+            return {('(project)', project), ('Sample', app), ('SampleTests', tests)}
+
+        self.assertEqual(self.get('SDKROOT'), (rows('iphoneos', 'iphoneos', 'iphoneos'), 3))
+        self.assertEqual(self.get('SDKROOT')[1], 0)
+        self.settings('set', 'SDKROOT=macosx', '-t', 'Sample')
+        self.assertEqual(self.get('SDKROOT'), (rows('iphoneos', 'macosx', 'iphoneos'), 1))
+        self.settings('unset', 'SDKROOT', '-t', 'Sample')
+        self.assertEqual(self.get('SDKROOT'), (rows('iphoneos', 'iphoneos', 'iphoneos'), 1))
+        # Every target inherits from the project configuration
+        self.settings('set', 'SDKROOT=watchos', '--project-level')
+        self.assertEqual(self.get('SDKROOT'), (rows('watchos', 'watchos', 'watchos'), 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Checks for the test shard planner (pbxtool.shards); no Xcode needed.
+"""
+
+import os
+import tempfile
+import textwrap
+import unittest
+
+from pbxtool import shards, swift
+
+
+def scan(**files):
+    return {path: swift.scan(textwrap.dedent(text)) for path, text in files.items()}
+
+
+class DiscoverTests(unittest.TestCase):
+
+    def test_methods_belong_to_their_class(self):
+        classes = shards.discover(scan(**{'ATests.swift': '''
+            import XCTest
+
+            final class ATests: XCTestCase {
+                func testOne() {
+                    XCTAssertTrue(true)
+                }
+
+                func testTwo() {}
+            }
+        '''}))
+        self.assertEqual(classes, [{'class': 'ATests', 'file': 'ATests.swift', 'methods': [
+            {'name': 'testOne', 'lines': 4}, {'name': 'testTwo', 'lines': 1}]}])
+
+    def test_nested_type_declared_before_the_tests(self):
+        classes = shards.discover(scan(**{'FooTests.swift': '''
+            import XCTest
+
+            final class FooTests: XCTestCase {
+                private struct Fixture {
+                    let value = 1
+                }
+
+                func testA() {
+                    XCTAssertEqual(Fixture().value, 1)
+                }
+            }
+
+            struct Helper {
+                func testNotATest() {}
+            }
+        '''}))
+        self.assertEqual([c['class'] for c in classes], ['FooTests'])
+        self.assertEqual(classes[0]['methods'], [{'name': 'testA', 'lines': 3}])
+
+    def test_inherited_base_in_another_file(self):
+        classes = shards.discover(scan(**{
+            'Base.swift': 'import XCTest\nclass BaseTestCase: XCTestCase {}\n',
+            'BTests.swift': 'final class BTests: BaseTestCase {\n    func testB() {}\n}\n',
+        }))
+        self.assertEqual([c['class'] for c in classes], ['BTests'])
+
+
+def classes(**weights):
+    """Test classes whose methods weigh the given number of lines each."""
+    return [{'class': name, 'file': f'{name}.swift',
+             'methods': [{'name': f'test{i}', 'lines': lines} for i, lines in enumerate(methods)]}
+            for name, methods in weights.items()]
+
+
+class WeighTests(unittest.TestCase):
+
+    def test_lines_without_history(self):
+        tests = classes(ATests=[10, 20])
+        self.assertEqual(shards.weigh(tests, {}), 'lines')
+        self.assertEqual([m['weight'] for m in tests[0]['methods']], [10, 20])
+
+    def test_unmeasured_methods_use_the_measured_rate(self):
+        tests = classes(ATests=[10, 20])
+        self.assertEqual(shards.weigh(tests, {'ATests/test0': 2.0}), 'seconds')
+        self.assertEqual([m['weight'] for m in tests[0]['methods']], [2.0, 4.0])
+        self.assertEqual([m['measured'] for m in tests[0]['methods']], [True, False])
+
+
+class PlanTests(unittest.TestCase):
+
+    def test_balances_classes(self):
+        tests = classes(ATests=[30], BTests=[20], CTests=[10], DTests=[10])
+        shards.weigh(tests, {})
+        plan = shards.plan(tests, 2, 'AppTests')
+        self.assertEqual([s['weight'] for s in plan], [40, 30])
+        self.assertEqual(shards.arguments(plan[0]),
+                         '-only-testing:AppTests/ATests -only-testing:AppTests/DTests')
+        self.assertEqual(shards.arguments(plan[1]),
+                         '-only-testing:AppTests/BTests -only-testing:AppTests/CTests')
+
+    def test_splits_heavy_classes_into_methods(self):
+        tests = classes(ATests=[40, 40], BTests=[10])
+        shards.weigh(tests, {})
+        plan = shards.plan(tests, 2, 'AppTests')
+        self.assertEqual(sorted(name for s in plan for name in s['only_testing']),
+                         ['AppTests/ATests/test0', 'AppTests/ATests/test1', 'AppTests/BTests'])
+        self.assertEqual(sorted(s['tests'] for s in plan), [1, 2])
+
+    def test_more_shards_than_classes(self):
+        tests = classes(ATests=[5])
+        shards.weigh(tests, {})
+        plan = shards.plan(tests, 3, 'AppTests')
+        self.assertEqual(sum(1 for s in plan if s['only_testing']), 1)
+
+
+class RecordTests(unittest.TestCase):
+
+    LOG = textwrap.dedent('''\
+        Test Case '-[FocusPalTests.PINServiceTests testHash]' passed (0.012 seconds).
+        Test Case '-[FocusPalTests.PINServiceTests testVerify]' failed (1.500 seconds).
+        Test case 'TimerTests.testStart()' passed on 'iPhone 16' (2 seconds)
+        Test Suite 'All tests' passed at 2024-01-01 10:00:00.000.
+    ''')
+
+    def test_result_formats(self):
+        self.assertEqual(shards.RESULT_RE.findall(self.LOG), [
+            ('PINServiceTests', 'testHash', '0.012'),
+            ('PINServiceTests', 'testVerify', '1.500'),
+            ('TimerTests', 'testStart', '2'),
+        ])
+
+    def test_record_smooths_durations(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as f:
+            f.write(self.LOG)
+        self.addCleanup(os.unlink, f.name)
+        history = {'TimerTests/testStart': 1.0}
+        self.assertEqual(shards.record([f.name], history, smoothing=0.5), 3)
+        self.assertEqual(history, {'PINServiceTests/testHash': 0.012,
+                                   'PINServiceTests/testVerify': 1.5,
+                                   'TimerTests/testStart': 1.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
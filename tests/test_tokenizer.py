@@ -0,0 +1,97 @@
+"""
+Checks for the memory-mapped event stream and validate (pbxtool.tokenizer).
+"""
+
+import contextlib
+import io
+import os
+import unittest
+
+from pbxtool.pbxproj import ParseError
+from pbxtool.tokenizer import check, count_streaming, events, mapped, scaled_copy, text, validate
+
+from sample import FIXTURE
+
+A = b'AA0000000000000000000001'
+B = b'BB0000000000000000000002'
+
+
+def project(*objects):
+    body = b''.join(b'%s = {isa = PBXGroup; %s};\n' % (id, fields) for id, fields in objects)
+    return b'// !$*UTF8*$!\n{\n\tobjects = {\n' + body + b'\t};\n\trootObject = ' + A + b';\n}\n'
+
+
+def decoded(buf):
+    return [(kind, text(payload) if payload is not None else None,
+             text(extra) if extra is not None else None)
+            for kind, payload, extra in events(buf)]
+
+
+class EventTests(unittest.TestCase):
+
+    def test_events(self):
+        buf = project((A, b'children = (' + B + b' /* B */, ); name = "A B"; '
+                          b'settings = {X = 1; };'))
+        self.assertEqual(decoded(buf), [
+            ('key', 'objects', None),
+            ('object-begin', A.decode(), 'PBXGroup'),
+            ('key', 'isa', None), ('value', 'PBXGroup', None),
+            ('key', 'children', None),
+            ('list-begin', None, None), ('list-item', B.decode(), None), ('list-end', None, None),
+            ('key', 'name', None), ('value', 'A B', None),
+            ('key', 'settings', None),
+            ('dict-begin', None, None), ('key', 'X', None), ('value', '1', None),
+            ('dict-end', None, None),
+            ('object-end', A.decode(), None),
+            ('key', 'rootObject', None), ('value', A.decode(), None),
+        ])
+
+    def test_malformed_input_raises(self):
+        for buf in (b'objects = {};', b'{ a = b; ', b'{ a = ; }', b'{ a = (b c); }'):
+            with self.subTest(buf=buf), self.assertRaises(ParseError):
+                list(events(buf))
+
+
+class CheckTests(unittest.TestCase):
+
+    def test_consistent(self):
+        self.assertEqual(check(project((A, b'children = (' + B + b'); '), (B, b''))), [])
+
+    def test_problems(self):
+        buf = project((A, b'children = (' + B + b', ' + B + b'); '), (A, b''))
+        self.assertEqual(check(buf), [
+            f'{B.decode()} listed twice in children of {A.decode()}',
+            f'duplicate object ID {A.decode()}',
+            f'{A.decode()} references missing object {B.decode()}',
+        ])
+
+    def test_duplicates_after_a_nested_list(self):
+        buf = project((A, b'files = (' + B + b', {inner = (' + A + b'); }, ' + B + b'); '), (B, b''))
+        self.assertEqual(check(buf), [f'{B.decode()} listed twice in files of {A.decode()}'])
+
+
+class MappedTests(unittest.TestCase):
+
+    path = os.path.join(FIXTURE, 'project.pbxproj')
+
+    def test_fixture_is_consistent_without_leaking_the_mapping(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            self.assertEqual(validate(self.path), [])
+            self.assertEqual(count_streaming(self.path), 24)
+        self.assertEqual(err.getvalue(), '')
+
+    def test_payloads_held_past_the_block_are_reported(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            with mapped(self.path) as buf:
+                held = next(events(buf))
+        self.assertIn('stays mapped', err.getvalue())
+        del held
+
+    def test_scaled_copy_repeats_the_file_references(self):
+        scaled = scaled_copy(self.path, 3)
+        self.addCleanup(os.unlink, scaled)
+        self.assertEqual(count_streaming(scaled), 24 + 2 * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()